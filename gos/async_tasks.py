@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gos.executable_containers import ExecutableContainer
+from gos.instrumentation import mark_offloaded_work
+from gos.tasks import BaseTask
+
+
+class AsyncBaseTask(BaseTask):
+    """ A base class for tasks, which `run` method is a coroutine
+
+    Such tasks are awaited directly, when they are executed by an executable container with a truthful `asynchronous` attribute,
+    so that independent I/O heavy tasks can overlap their I/O. In any other executable container they are executed
+    in a separate event loop, as if they were regular blocking tasks.
+    """
+    name = "AsyncBaseTask"
+    asynchronous = True
+
+    async def run(self, manager):
+        raise NotImplementedError("run coroutine shall be implemented for all the subclasses of AsyncBaseTask")
+
+
+def run_coroutine(coroutine):
+    """ Executes supplied coroutine in a new event loop, blocking until it is finished, and returns its result """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def run_container(container, manager, path):
+    """ Executes all entries of supplied executable container in an event loop
+
+    Blocking entries are offloaded to a thread pool of `container.max_workers` size, so that the loop never stalls.
+    """
+    mark_offloaded_work()
+    with ThreadPoolExecutor(max_workers=container.max_workers) as executor:
+        run_coroutine(run_container_async(container=container, manager=manager, executor=executor, path=path))
+
+
+async def run_container_async(container, manager, executor, path):
+    """ Awaits batches of entries of supplied executable container one after another,
+    while entries inside each batch (see :meth:`ExecutableContainer.get_entries_batches`) are awaited concurrently
+    """
+    for batch in container.get_indexed_entries_batches():
+        await asyncio.gather(*[run_entry_async(entry=entry, manager=manager, executor=executor,
+                                               path=ExecutableContainer.get_entry_path(path, index, entry))
+                               for index, entry in batch])
+
+
+async def run_entry_async(entry, manager, executor, path):
+    if manager.skip_resumed(path=path):
+        return
+    cache_key = manager.get_task_cache_key(task=entry)
+    if cache_key is not None and manager.restore_cached_outputs(task=entry, key=cache_key):
+        return
+    durations = []
+    while True:
+        entry.do_self_loop = False
+        start = time.time()
+        await _run_entry_once_async(entry=entry, manager=manager, executor=executor, path=path)
+        durations.append(time.time() - start)
+        if not ExecutableContainer._continue_self_loop(entry=entry, manager=manager, durations=durations):
+            break
+        manager.start_self_loop_iteration(path=path)
+    manager.record_self_loop(entry=entry, durations=durations)
+    if cache_key is not None:
+        manager.store_cached_outputs(task=entry, key=cache_key)
+    if getattr(entry, "checkpoint", False):
+        manager.save_checkpoint(path=path)
+
+
+async def _run_entry_once_async(entry, manager, executor, path):
+    if isinstance(entry, AsyncBaseTask) and not (entry.remote and manager.process_pool is not None):
+        # entries, that are awaited concurrently, share the thread of the event loop, so their CPU time can not be told apart
+        with manager.measure(entry=entry, path=path, cpu_time_available=False):
+            await entry.run(manager=manager)
+    elif isinstance(entry, ExecutableContainer) and entry.asynchronous and manager.dag_scheduler is None:
+        with manager.measure(entry=entry, path=path, cpu_time_available=False):
+            await run_container_async(container=entry, manager=manager, executor=executor, path=path)
+    else:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(executor, ExecutableContainer._run_entry_once, entry, manager, path)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+
+from gos.configuration import Configuration, string_types
+from gos.exceptions import GOSIOException
+
+PICKLE_PROTOCOL = 2
+FILE_READ_CHUNK_SIZE = 1024 * 1024
+
+
+class TaskResultCache(object):
+    """ A content addressed on-disk storage of task outputs
+
+    Every cache entry is identified by a key, that is computed from:
+        * a source code of the task class
+        * a task specific configuration section (`algorithm->tasks-><task name>`)
+        * fingerprints of all shared data values, that are listed in task `inputs`.
+            Values, that are paths to existing files, are fingerprinted by the file content.
+
+    A cache entry stores values of all shared data entries, that are listed in task `outputs`,
+        so that a task with unchanged code, configuration and inputs can be skipped, and its outputs restored.
+    """
+
+    def __init__(self, dir_path):
+        self.dir_path = dir_path
+
+    @staticmethod
+    def get_task_source_fingerprint(task):
+        try:
+            source = inspect.getsource(task.__class__)
+        except (IOError, OSError, TypeError):
+            # no source is available (i.e. class was created dynamically), so the best we can do is to rely on the class location
+            source = task.__class__.__module__ + "." + task.__class__.__name__
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def get_normalized_value(value):
+        """ Recursively replaces sets and dicts in supplied value with lists of their elements / items in a sorted order
+
+        Iteration order of sets and dicts (i.e. of strings) depends on the hash seed of the process,
+            so without normalization equal values could have different pickled representations in different runs.
+        """
+        if isinstance(value, (set, frozenset)):
+            items = [TaskResultCache.get_normalized_value(item) for item in value]
+            return type(value).__name__, sorted(items, key=TaskResultCache._get_sort_key)
+        if type(value) is dict:
+            items = [(TaskResultCache.get_normalized_value(key), TaskResultCache.get_normalized_value(item))
+                     for key, item in value.items()]
+            return "dict", sorted(items, key=lambda entry: TaskResultCache._get_sort_key(entry[0]))
+        if type(value) in (list, tuple):
+            return type(value)(TaskResultCache.get_normalized_value(item) for item in value)
+        return value
+
+    @staticmethod
+    def _get_sort_key(value):
+        # values of different types can not be compared on Python 3, while their pickled representations always can
+        return pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+
+    @staticmethod
+    def get_value_fingerprint(value):
+        """ Computes a fingerprint of a shared data value
+
+        Sets and dicts are normalized before pickling (see :meth:`TaskResultCache.get_normalized_value`).
+
+        :raises: `pickle.PicklingError`, `TypeError`, `AttributeError` if value is not a path to a file and can not be pickled
+        """
+        digest = hashlib.sha256()
+        if isinstance(value, string_types) and os.path.isfile(value):
+            digest.update(value.encode("utf-8"))
+            with open(value, "rb") as source:
+                for chunk in iter(lambda: source.read(FILE_READ_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+        else:
+            digest.update(pickle.dumps(TaskResultCache.get_normalized_value(value), protocol=PICKLE_PROTOCOL))
+        return digest.hexdigest()
+
+    def get_key(self, task, configuration, data):
+        """ Computes a cache key for supplied task, given current configuration and shared data
+
+        :return: a hex digest, or None, if any of the task inputs can not be fingerprinted
+        :rtype: `str` or `None`
+        """
+        tasks_config = configuration.get(Configuration.ALGORITHM, {}).get(Configuration.TASKS, {})
+        task_config = tasks_config.get(task.name, {}) if isinstance(tasks_config, dict) else {}
+        try:
+            inputs = [(name, self.get_value_fingerprint(data.get(name))) for name in task.inputs]
+            task_config = json.dumps(task_config, sort_keys=True, default=repr)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return None
+        digest = hashlib.sha256()
+        for part in [task.name, self.get_task_source_fingerprint(task), task_config] + \
+                ["{name}={fingerprint}".format(name=name, fingerprint=fingerprint) for name, fingerprint in inputs]:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get_entry_path(self, key):
+        return os.path.join(self.dir_path, key + ".pickle")
+
+    def restore(self, key, data):
+        """ Updates supplied shared data with cached task outputs
+
+        :return: a flag indicating whether a cache entry for supplied key existed
+        :rtype: `bool`
+        """
+        path = self.get_entry_path(key)
+        if not os.path.isfile(path):
+            return False
+        try:
+            with open(path, "rb") as source:
+                outputs = pickle.load(source)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            return False
+        data.update(outputs)
+        return True
+
+    def store(self, key, task, data):
+        """ Stores values of task `outputs` from supplied shared data under supplied key
+
+        Entry is written to a temporary file first, so that an interrupted write never leaves a broken cache entry.
+            The temporary file is removed, if outputs could not be written.
+        """
+        outputs = {name: data[name] for name in task.outputs if name in data}
+        tmp_path = None
+        try:
+            if not os.path.exists(self.dir_path):
+                os.makedirs(self.dir_path)
+            path = self.get_entry_path(key)
+            descriptor, tmp_path = tempfile.mkstemp(dir=self.dir_path, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as destination:
+                pickle.dump(outputs, destination, protocol=PICKLE_PROTOCOL)
+            if os.path.exists(path):
+                # an existing entry has been produced from the same code, configuration and inputs
+                os.remove(tmp_path)
+            else:
+                os.rename(tmp_path, path)
+        except (IOError, OSError, pickle.PicklingError, TypeError, AttributeError) as ex:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise GOSIOException("Outputs of task {task_name} could not be cached: {exception}"
+                                 "".format(task_name=task.name, exception=ex))
@@ -1,5 +1,78 @@
 # -*- coding: utf-8 -*-
+import keyword
 import os
+import re
+from collections import namedtuple
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # python 2
+    from collections import Mapping
+
+try:
+    string_types = basestring  # python 2, where keys and values of JSON configs are unicode strings
+except NameError:
+    string_types = str
+
+from gos.exceptions import GOSConfigurationException
+
+FIELD_NAME_PATTERN = re.compile(r"^[A-Za-z][A-Za-z0-9_]*$")
+
+
+class FrozenDict(Mapping):
+    """ An immutable mapping, utilized in a compiled configuration for sections, which keys can not be attribute names
+        (i.e. task specific sections named after tasks) """
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = dict(data)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return "FrozenDict({data!r})".format(data=self._data)
+
+
+_sections_types = {}
+
+
+def get_section_type(fields):
+    """ Retrieves (creating it on first request) a namedtuple based type for a compiled configuration section with supplied fields """
+    if fields not in _sections_types:
+        _sections_types[fields] = namedtuple("ConfigurationSection", fields)
+    return _sections_types[fields]
+
+
+def freeze(value):
+    """ Recursively converts supplied configuration value into an immutable one
+
+    Dicts, which keys are all valid attribute names, become namedtuples (slotted and attribute accessible),
+        other dicts become :class:`FrozenDict` instances, lists become tuples.
+    """
+    if isinstance(value, dict):
+        keys = sorted(value)
+        if all(isinstance(key, string_types) and FIELD_NAME_PATTERN.match(key) and not keyword.iskeyword(key) for key in keys):
+            return get_section_type(tuple(keys))(**{key: freeze(value[key]) for key in keys})
+        return FrozenDict((key, freeze(entry)) for key, entry in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(entry) for entry in value)
+    return value
+
+
+def copy_tree(value):
+    """ Copies nested dicts and lists of a configuration, leaving all other values (i.e. logger destinations) shared """
+    if isinstance(value, dict):
+        return {key: copy_tree(entry) for key, entry in value.items()}
+    if isinstance(value, list):
+        return [copy_tree(entry) for entry in value]
+    return value
 
 
 class Configuration(dict):
@@ -50,11 +123,35 @@ class Configuration(dict):
         io_silent_fail: .-> io_silent_fail                # -- if any part of an algorithm performs io operation, this flag determines what
                                                           #    to do if an IO exception is thrown
         logger: .->logger                                 # --
+        scheduler: sequential                             # -- either "sequential" or "dag". with "dag" entries of every executable container
+                                                          #    are executed in the order determined by their "depends_on", "inputs" and
+                                                          #    "outputs" values, rather than in the listed order.
+                                                          #    only siblings of a single container are reordered: a nested
+                                                          #    container is finished as a whole before its dependants start
+        max_workers: 4                                    # -- maximum number of workers, utilized by the "dag" scheduler and the process pool
+        executor: local                                   # -- either "local" or "process". with "process" tasks, that have a truthful
+                                                          #    `remote` attribute, are executed on a process pool and receive a picklable
+                                                          #    task context (configuration and shared data) instead of a manager
+        cache:                                            # -- on-disk cache of outputs of tasks, that have a truthful `cacheable` attribute
+            enabled: false                                # -- when enabled, a cacheable task with unchanged source code, task specific
+                                                          #    configuration (algorithm->tasks-><task name>) and inputs is not executed,
+                                                          #    and its outputs are restored from cache instead. false by default
+            dir: .->dir + .gos_cache                      # -- directory, where cached tasks outputs are stored
+        checkpoints:                                      # -- saving of the shared data after executable containers with a truthful
+                                                          #    "checkpoint" flag are finished
+            dir: .->dir + checkpoints                     # -- directory, where the checkpoint file is stored
+            resume_from: null                             # -- either a path to a checkpoint file, or "last" for the latest checkpoint
+                                                          #    in the checkpoints directory. when specified, shared data is restored
+                                                          #    and all executable containers, that were finished before the checkpoint,
+                                                          #    are skipped. progress of unfinished self loops is not restored
         tasks:                                            # -- single processing entity specification
             paths: []                                     # -- unchangeable value is "./tasks". everything else specified will be appended
 
                                                           #    to "./tasks" directory. All *.py files are observed and all classes,
                                                           #    being subclasses of GOSTask will be processed and available for further usage
+            lazy: false                                   # -- if true, only tasks, that are referenced by executable containers, are loaded
+            index_file: null                              # -- a path to a task discovery index file. modules, that have not changed since
+                                                          #    they were indexed and do not contain any referenced task, are not imported
                                                           #################################################################################
         executable_containers:
             - name: stage
@@ -69,6 +166,24 @@ class Configuration(dict):
             - name: stage1                                # -- unique name of a stages, that it can be referenced by later.
               self_loop: false                            # -- flag determining if a stage must be executed again, after its first execution
                                                           #    is finished.
+              max_self_loop_iterations: 10                # -- maximum number of consecutive executions of a self looped stage.
+                                                          #    not limited by default
+              convergence_predicate: null                 # -- a fully qualified name of a function (executable_container, manager) -> bool,
+                                                          #    that stops a self loop of a stage, once it returns true
+              parallel: false                             # -- flag determining if consecutive independent entries of a stage are executed
+                                                          #    concurrently on a thread pool. false by default
+              max_workers: 4                              # -- maximum number of workers in a pool, utilized for parallel execution
+                                                          #    of entries. by default is determined by the concurrent.futures module
+              independent: false                          # -- flag determining if a stage can be executed concurrently with its
+                                                          #    neighbouring independent entries in a parallel round. false by default
+              checkpoint: false                           # -- flag determining if a checkpoint is saved after a stage is finished
+              asynchronous: false                         # -- flag determining if entries of a stage are executed in an event loop, where
+                                                          #    consecutive independent coroutine based tasks are awaited concurrently
+                                                          #    and blocking entries are offloaded to a thread pool. false by default
+              depends_on: []                              # -- names of sibling entries, that must be finished before this stage is executed
+                                                          #    by the "dag" scheduler
+              inputs: []                                  # -- names of data values, that are read by this stage
+              outputs: []                                 # -- names of data values, that are produced by this stage
               tasks:                                      # -- ordered list of tasks that stage includes in itself and will execute
                 - task1                                   # -- name based reference to previously specified task
                 - task2                                   # --
@@ -112,6 +227,11 @@ class Configuration(dict):
                                                           #    scaffolder execution
             dir: output->dir + stats/                     # -- directory where statistics files will be located
             file: stats.txt                               # -- default file name for the overall statistics file
+            instrumentation: false                        # -- when enabled, wall time, CPU time and peak RSS of every task and executable
+                                                          #    container invocation are recorded and written as a JSON report
+            instrumentation_file: execution_stats.json    # -- default file name for the instrumentation report
+            profile: []                                   # -- names of tasks / executable containers, which invocations are profiled with
+                                                          #    cProfile. statistics files are written to the stats directory
             logger: output->logger                        #
             io_silent_fail: output->io_silent_fail        #
                                                           #################################################################################
@@ -156,14 +276,35 @@ class Configuration(dict):
     PIPELINE = "pipeline"
     PATH = "path"
     PATHS = "paths"
+    LAZY = "lazy"
+    INDEX_FILE = "index_file"
     FILE = "file"
     GENOME_SPECIFIC = "genome_specific"
     GENOME_SPECIFIC_FNP = "genome_specific_file_name_pattern"
     OUTPUT_NG_FRAGMENTS = "output_non_glued_fragments"
     SELF_LOOP = "self_loop"
+    MAX_SELF_LOOP_ITERATIONS = "max_self_loop_iterations"
+    CONVERGENCE_PREDICATE = "convergence_predicate"
     EXECUTABLE_CONTAINERS = "executable_containers"
     ENTRIES = "entries"
     REFERENCE = "reference"
+    PARALLEL = "parallel"
+    MAX_WORKERS = "max_workers"
+    INDEPENDENT = "independent"
+    ASYNCHRONOUS = "asynchronous"
+    SCHEDULER = "scheduler"
+    EXECUTOR = "executor"
+    CACHE = "cache"
+    ENABLED = "enabled"
+    CHECKPOINTS = "checkpoints"
+    CHECKPOINT = "checkpoint"
+    RESUME_FROM = "resume_from"
+    INSTRUMENTATION = "instrumentation"
+    INSTRUMENTATION_FILE = "instrumentation_file"
+    PROFILE = "profile"
+    DEPENDS_ON = "depends_on"
+    INPUTS = "inputs"
+    OUTPUTS = "outputs"
 
     # predefined constants
     DEFAULT_IOSF = False
@@ -174,6 +315,8 @@ class Configuration(dict):
     DEFAULT_OUTPUT_DIR = "output"
     DEFAULT_OUTPUT_STATS_DIR = "stats"
     DEFAULT_OUTPUT_STATS_FILE = "stats.txt"
+    DEFAULT_OUTPUT_STATS_INSTRUMENTATION = False
+    DEFAULT_OUTPUT_STATS_INSTRUMENTATION_FILE = "execution_stats.json"
     DEFAULT_OUTPUT_AP_FILE = "assembly_points.txt"
     DEFAULT_OUTPUT_AP_DIR = "assembly_points"
     DEFAULT_OUTPUT_AP_GENOME_SPECIFIC = True
@@ -184,6 +327,18 @@ class Configuration(dict):
     DEFAULT_ALGORITHM_PIPELINE_SELF_LOOP = True
     DEFAULT_ALGORITHM_EC_SELF_LOOP = True
     DEFAULT_LOGGER_DESTINATION = None
+    DEFAULT_ALGORITHM_SCHEDULER = "sequential"
+    DEFAULT_ALGORITHM_MAX_WORKERS = None
+    DEFAULT_ALGORITHM_EXECUTOR = "local"
+    DEFAULT_ALGORITHM_CACHE_ENABLED = False
+    DEFAULT_ALGORITHM_CACHE_DIR = ".gos_cache"
+    DEFAULT_ALGORITHM_CHECKPOINTS_DIR = "checkpoints"
+    DEFAULT_ALGORITHM_CHECKPOINTS_FILE = "checkpoint.pickle"
+
+    # allowed values
+    ALGORITHM_SCHEDULERS = ("sequential", "dag")
+    ALGORITHM_EXECUTORS = ("local", "process")
+    LOGGER_LEVELS = ("notset", "debug", "info", "warning", "warn", "error", "critical", "fatal")
 
     def __init__(self, *args, **kwargs):
         super(Configuration, self).__init__(*args, **kwargs)
@@ -275,6 +430,17 @@ class Configuration(dict):
         Algorithm section:
             `io_silent_fail` is predefined with a top level `io_silent_fail` value
             `logger` is predefined with top level `logger` configuration
+            `scheduler` is predefined with :attr:`Configuration.DEFAULT_ALGORITHM_SCHEDULER`
+            `max_workers` is predefined with :attr:`Configuration.DEFAULT_ALGORITHM_MAX_WORKERS`
+            `executor` is predefined with :attr:`Configuration.DEFAULT_ALGORITHM_EXECUTOR`
+            `cache` section:
+                `enabled` is predefined with :attr:`Configuration.DEFAULT_ALGORITHM_CACHE_ENABLED`
+                `dir` is predefined with a relative path constructed with top level `dir` field and
+                        :attr:`Configuration.DEFAULT_ALGORITHM_CACHE_DIR`
+            `checkpoints` section:
+                `dir` is predefined with a relative path constructed with top level `dir` field and
+                        :attr:`Configuration.DEFAULT_ALGORITHM_CHECKPOINTS_DIR`
+                `resume_from` is predefined with None
             `tasks` section:
                 `paths` is predefined by [:attr:`Configuration.DEFAULT_ALGORITHM_TASKS_PATH`]. If value is supplied,
                         :attr:`Configuration.DEFAULT_ALGORITHM_TASKS_PATH` is prepended  to the supplied list
@@ -355,6 +521,24 @@ class Configuration(dict):
             self[self.ALGORITHM][self.TASKS] = {}
         if self.EXECUTABLE_CONTAINERS not in self[self.ALGORITHM]:
             self[self.ALGORITHM][self.EXECUTABLE_CONTAINERS] = []
+        if self.SCHEDULER not in self[self.ALGORITHM] or self[self.ALGORITHM][self.SCHEDULER] in ("", None):
+            self[self.ALGORITHM][self.SCHEDULER] = self.DEFAULT_ALGORITHM_SCHEDULER
+        if self.MAX_WORKERS not in self[self.ALGORITHM]:
+            self[self.ALGORITHM][self.MAX_WORKERS] = self.DEFAULT_ALGORITHM_MAX_WORKERS
+        if self.EXECUTOR not in self[self.ALGORITHM] or self[self.ALGORITHM][self.EXECUTOR] in ("", None):
+            self[self.ALGORITHM][self.EXECUTOR] = self.DEFAULT_ALGORITHM_EXECUTOR
+        if self.CACHE not in self[self.ALGORITHM] or self[self.ALGORITHM][self.CACHE] in ("", None):
+            self[self.ALGORITHM][self.CACHE] = {}
+        if self.ENABLED not in self[self.ALGORITHM][self.CACHE] or self[self.ALGORITHM][self.CACHE][self.ENABLED] in ("", None):
+            self[self.ALGORITHM][self.CACHE][self.ENABLED] = self.DEFAULT_ALGORITHM_CACHE_ENABLED
+        if self.DIR not in self[self.ALGORITHM][self.CACHE] or self[self.ALGORITHM][self.CACHE][self.DIR] in ("", None):
+            self[self.ALGORITHM][self.CACHE][self.DIR] = os.path.join(self[self.DIR], self.DEFAULT_ALGORITHM_CACHE_DIR)
+        if self.CHECKPOINTS not in self[self.ALGORITHM] or self[self.ALGORITHM][self.CHECKPOINTS] in ("", None):
+            self[self.ALGORITHM][self.CHECKPOINTS] = {}
+        if self.DIR not in self[self.ALGORITHM][self.CHECKPOINTS] or self[self.ALGORITHM][self.CHECKPOINTS][self.DIR] in ("", None):
+            self[self.ALGORITHM][self.CHECKPOINTS][self.DIR] = os.path.join(self[self.DIR], self.DEFAULT_ALGORITHM_CHECKPOINTS_DIR)
+        if self.RESUME_FROM not in self[self.ALGORITHM][self.CHECKPOINTS]:
+            self[self.ALGORITHM][self.CHECKPOINTS][self.RESUME_FROM] = None
 
         if self.PATHS not in self[self.ALGORITHM][self.TASKS] or self[self.ALGORITHM][self.TASKS][self.PATHS] in ("", None):
             self[self.ALGORITHM][self.TASKS][self.PATHS] = []
@@ -435,6 +619,143 @@ class Configuration(dict):
         self._update_logger_config(logger_to_update=self[self.OUTPUT][self.GENOMES][self.LOGGER],
                                    source_logger=self[self.OUTPUT][self.LOGGER])
 
+    def compile(self):
+        """ Freezes a fully resolved configuration into an immutable structure
+
+        A copy of the configuration is predefined with default values (see :meth:`Configuration.update_with_default_values`),
+            so that all values, that reference other values (i.e. `output->io_silent_fail`), are resolved once.
+            The copy is validated (see :meth:`Configuration.validate`) and converted with :func:`freeze`, so that values can be
+            retrieved with attribute access, i.e. `compiled.algorithm.io_silent_fail`.
+            The configuration itself is not changed.
+
+        :raises: :class:`gos.exceptions.GOSConfigurationException` with all validation errors, if configuration is invalid
+        :return: an immutable namedtuple based structure
+        """
+        resolved = Configuration(copy_tree(dict(self)))
+        resolved.update_with_default_values()
+        errors = resolved.validate()
+        if len(errors) > 0:
+            raise GOSConfigurationException(errors)
+        return freeze(dict(resolved))
+
+    def validate(self):
+        """ Checks all the configuration values, that have a predefined type or a set of allowed values
+
+        Configuration is expected to be predefined with default values. Validation does not stop on the first error,
+            so that all of them can be reported together.
+
+        :return: a list of errors descriptions, empty, if configuration is valid
+        :rtype: `list`(`str`)
+        """
+        errors = []
+
+        def check(condition, path, message):
+            if not condition:
+                errors.append("{path}: {message}".format(path=path, message=message))
+            return condition
+
+        def check_flag(section, key, path):
+            if key in section:
+                check(isinstance(section[key], bool), path + "->" + key, "must be a boolean, got {value!r}".format(value=section[key]))
+
+        def check_positive_int(section, key, path):
+            value = section.get(key)
+            check(value is None or (isinstance(value, int) and not isinstance(value, bool) and value > 0),
+                  path + "->" + key, "must be a positive integer or null, got {value!r}".format(value=value))
+
+        def check_reference(section, key, path):
+            value = section.get(key)
+            check(value is None or (isinstance(value, string_types) and "." in value),
+                  path + "->" + key, "must be a fully qualified name or null, got {value!r}".format(value=value))
+
+        def check_choice(section, key, choices, path):
+            if key in section:
+                check(section[key] in choices, path + "->" + key,
+                      "must be one of {choices}, got {value!r}".format(choices=", ".join(choices), value=section[key]))
+
+        def check_logger(section, path):
+            logger = section.get(self.LOGGER)
+            if not check_section(logger, path + "->" + self.LOGGER):
+                return
+            if logger.get(self.LEVEL) is not None:
+                check(str(logger[self.LEVEL]).lower() in self.LOGGER_LEVELS, path + "->" + self.LOGGER + "->" + self.LEVEL,
+                      "must be one of {choices}, got {value!r}".format(choices=", ".join(self.LOGGER_LEVELS), value=logger[self.LEVEL]))
+
+        def check_section(section, path):
+            return check(isinstance(section, dict), path, "must be a section, got {value!r}".format(value=section))
+
+        check(isinstance(self[self.DIR], string_types), self.DIR, "must be a string")
+        check_flag(self, self.IOSF, ".")
+        check_logger(self, ".")
+
+        # input section
+        input_config = self[self.INPUT]
+        if check_section(input_config, self.INPUT):
+            check_flag(input_config, self.IOSF, self.INPUT)
+            check_logger(input_config, self.INPUT)
+            if check(isinstance(input_config[self.SOURCE], list), self.INPUT + "->" + self.SOURCE, "must be a list"):
+                for index, source in enumerate(input_config[self.SOURCE]):
+                    check(isinstance(source, dict) and self.PATH in source,
+                          "{section}->{key}[{index}]".format(section=self.INPUT, key=self.SOURCE, index=index), "must specify a path")
+
+        # algorithm section
+        algorithm_config = self[self.ALGORITHM]
+        if check_section(algorithm_config, self.ALGORITHM):
+            check_flag(algorithm_config, self.IOSF, self.ALGORITHM)
+            check_logger(algorithm_config, self.ALGORITHM)
+            check_choice(algorithm_config, self.SCHEDULER, self.ALGORITHM_SCHEDULERS, self.ALGORITHM)
+            check_choice(algorithm_config, self.EXECUTOR, self.ALGORITHM_EXECUTORS, self.ALGORITHM)
+            check_positive_int(algorithm_config, self.MAX_WORKERS, self.ALGORITHM)
+            if check_section(algorithm_config.get(self.CACHE), self.ALGORITHM + "->" + self.CACHE):
+                check_flag(algorithm_config[self.CACHE], self.ENABLED, self.ALGORITHM + "->" + self.CACHE)
+            tasks_config = algorithm_config[self.TASKS]
+            if check_section(tasks_config, self.ALGORITHM + "->" + self.TASKS):
+                paths = tasks_config.get(self.PATHS)
+                check(isinstance(paths, list) and all(isinstance(path, string_types) for path in paths),
+                      self.ALGORITHM + "->" + self.TASKS + "->" + self.PATHS, "must be a list of strings")
+            for ecs in algorithm_config[self.EXECUTABLE_CONTAINERS]:
+                reference = ecs.get(self.REFERENCE)
+                group = algorithm_config.get(reference)
+                if not check(isinstance(group, list), self.ALGORITHM + "->" + str(reference), "must be a list"):
+                    continue
+                names = set()
+                for index, ec_config in enumerate(group):
+                    path = "{section}->{reference}[{index}]".format(section=self.ALGORITHM, reference=reference, index=index)
+                    if not check_section(ec_config, path):
+                        continue
+                    name = ec_config.get(self.NAME)
+                    check(name not in (None, ""), path, "must have a name")
+                    check(name not in names, path, "name {name!r} is not unique".format(name=name))
+                    names.add(name)
+                    for flag in (self.SELF_LOOP, self.PARALLEL, self.INDEPENDENT, self.ASYNCHRONOUS, self.CHECKPOINT):
+                        check_flag(ec_config, flag, path)
+                    check_positive_int(ec_config, self.MAX_WORKERS, path)
+                    check_positive_int(ec_config, self.MAX_SELF_LOOP_ITERATIONS, path)
+                    check_reference(ec_config, self.CONVERGENCE_PREDICATE, path)
+            pipeline_config = algorithm_config[self.PIPELINE]
+            if check_section(pipeline_config, self.ALGORITHM + "->" + self.PIPELINE):
+                check(isinstance(pipeline_config[self.ENTRIES], list), self.ALGORITHM + "->" + self.PIPELINE + "->" + self.ENTRIES,
+                      "must be a list")
+                check_flag(pipeline_config, self.SELF_LOOP, self.ALGORITHM + "->" + self.PIPELINE)
+                check_positive_int(pipeline_config, self.MAX_SELF_LOOP_ITERATIONS, self.ALGORITHM + "->" + self.PIPELINE)
+                check_reference(pipeline_config, self.CONVERGENCE_PREDICATE, self.ALGORITHM + "->" + self.PIPELINE)
+
+        # output section
+        output_config = self[self.OUTPUT]
+        if check_section(output_config, self.OUTPUT):
+            check_flag(output_config, self.IOSF, self.OUTPUT)
+            check_logger(output_config, self.OUTPUT)
+            for key in (self.STATS, self.ASSEMBLY_POINTS, self.GENOMES):
+                path = self.OUTPUT + "->" + key
+                if check_section(output_config[key], path):
+                    check_flag(output_config[key], self.IOSF, path)
+                    check_logger(output_config[key], path)
+            if isinstance(output_config[self.STATS], dict):
+                check_flag(output_config[self.STATS], self.INSTRUMENTATION, self.OUTPUT + "->" + self.STATS)
+                profile = output_config[self.STATS].get(self.PROFILE, [])
+                check(isinstance(profile, list), self.OUTPUT + "->" + self.STATS + "->" + self.PROFILE, "must be a list")
+        return errors
+
     @staticmethod
     def _update_logger_config(logger_to_update, source_logger):
         if logger_to_update in ("", None):
@@ -15,3 +15,11 @@ class GOSIOException(Exception):
 
 class GOSCriticalException(Exception):
     pass
+
+
+class GOSConfigurationException(Exception):
+    """ Raised when a configuration does not pass validation. All found errors are available in the `errors` attribute """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super(GOSConfigurationException, self).__init__("Configuration is invalid:\n" + "\n".join(self.errors))
@@ -1,9 +1,20 @@
 # -*- coding: utf-8 -*-
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+from gos.configuration import string_types
 from gos.exceptions import GOSExecutableContainerException
+from gos.instrumentation import mark_offloaded_work
+from gos.tasks import BaseTask
 from gos.utils.load import Loader
 
 DEFAULT_SELF_LOOP = False
+DEFAULT_PARALLEL = False
+DEFAULT_MAX_WORKERS = None
+DEFAULT_INDEPENDENT = False
+DEFAULT_ASYNCHRONOUS = False
+DEFAULT_MAX_SELF_LOOP_ITERATIONS = None
+DEFAULT_CHECKPOINT = False
 
 
 class ExecutableContainer(object):
@@ -12,7 +23,10 @@ class ExecutableContainer(object):
 
     def __init__(self, name=None, type_name=None, group_reference_name=None, self_loop=DEFAULT_SELF_LOOP, do_self_loop=False,
                  entries_names=None, entries=None,
-                 entries_type_names=None, logger=None):
+                 entries_type_names=None, logger=None, parallel=DEFAULT_PARALLEL, max_workers=DEFAULT_MAX_WORKERS,
+                 independent=DEFAULT_INDEPENDENT, depends_on=None, inputs=None, outputs=None, asynchronous=DEFAULT_ASYNCHRONOUS,
+                 max_self_loop_iterations=DEFAULT_MAX_SELF_LOOP_ITERATIONS, convergence_predicate=None,
+                 checkpoint=DEFAULT_CHECKPOINT):
 
         self.name = self.__class__.name if name is None else name
         self.type_name = self.__class__.type_name if type_name is None else type_name
@@ -35,19 +49,163 @@ class ExecutableContainer(object):
 
         self.self_loop = self_loop
         self.do_self_loop = do_self_loop
+        self.max_self_loop_iterations = max_self_loop_iterations
+        self.convergence_predicate = convergence_predicate
         self.logger = logger
 
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.independent = independent
+        self.asynchronous = asynchronous
+        self.checkpoint = checkpoint
+
+        self.depends_on = [] if depends_on is None else depends_on
+        self.inputs = [] if inputs is None else inputs
+        self.outputs = [] if outputs is None else outputs
+
     def _get_default_group_reference_name(self):
         return self.name + "s"
 
-    def run(self, manager):
-        for entry in self.entries:
+    def run(self, manager, path=None):
+        """ Executes all entries of this executable container
+
+        :param path: a unique location of this execution inside the pipeline (see :meth:`ExecutableContainer.get_entry_path`).
+            Defaults to the name of this executable container, as it is for the top level pipeline
+        """
+        path = self.name if path is None else path
+        if manager.dag_scheduler is not None:
+            manager.dag_scheduler.run(entries=self.entries, manager=manager, run_entry=self._run_entry, path=path)
+            return
+        if self.asynchronous:
+            from gos.async_tasks import run_container
+            run_container(container=self, manager=manager, path=path)
+            return
+        if self.parallel:
+            self._run_parallel(manager=manager, path=path)
+            return
+        for index, entry in enumerate(self.entries):
+            self._run_entry(entry=entry, manager=manager, path=self.get_entry_path(path, index, entry))
+
+    @staticmethod
+    def get_entry_path(path, index, entry):
+        """ Constructs a unique location of an entry execution inside the pipeline, given a location of its parent execution
+
+        Locations are utilized to identify finished executable containers, when an execution is resumed from a checkpoint.
+        """
+        return "{path}/{index}:{name}".format(path=path, index=index, name=entry.name)
+
+    def has_converged(self, manager):
+        """ Determines if self loop over this executable container can be stopped, even though `do_self_loop` flag is set
+
+        :return: a result of `convergence_predicate` call with this executable container and a manager, or False if it is not set
+        :rtype: `bool`
+        """
+        if self.convergence_predicate is None:
+            return False
+        return self.convergence_predicate(self, manager)
+
+    @staticmethod
+    def _run_entry(entry, manager, path=None):
+        if path is not None and manager.skip_resumed(path=path):
+            return
+        cache_key = manager.get_task_cache_key(task=entry)
+        if cache_key is not None and manager.restore_cached_outputs(task=entry, key=cache_key):
+            return
+        durations = []
+        while True:
             entry.do_self_loop = False
-            entry.run(manager=manager)
-            while entry.self_loop and entry.do_self_loop:
-                entry.do_self_loop = False
+            start = time.time()
+            ExecutableContainer._run_entry_once(entry=entry, manager=manager, path=path)
+            durations.append(time.time() - start)
+            if not ExecutableContainer._continue_self_loop(entry=entry, manager=manager, durations=durations):
+                break
+            if path is not None:
+                manager.start_self_loop_iteration(path=path)
+        manager.record_self_loop(entry=entry, durations=durations)
+        if cache_key is not None:
+            manager.store_cached_outputs(task=entry, key=cache_key)
+        if path is not None and getattr(entry, "checkpoint", False):
+            manager.save_checkpoint(path=path)
+
+    @staticmethod
+    def _continue_self_loop(entry, manager, durations):
+        """ Decides if supplied entry shall be executed once more, after it has been executed `len(durations)` times in a row
+
+        Self loop stops, when an entry does not request it, when it has reached its `max_self_loop_iterations` limit,
+        or when its `has_converged` method returns a truthful value.
+        """
+        if not (entry.self_loop and entry.do_self_loop):
+            return False
+        max_iterations = getattr(entry, "max_self_loop_iterations", DEFAULT_MAX_SELF_LOOP_ITERATIONS)
+        if max_iterations is not None and len(durations) >= max_iterations:
+            manager.logger.warning("Self loop over {name} was stopped after reaching the limit of {limit} iterations"
+                                   "".format(name=entry.name, limit=max_iterations))
+            return False
+        if entry.has_converged(manager=manager):
+            manager.logger.debug("Self loop over {name} has converged after {iterations} iterations"
+                                 "".format(name=entry.name, iterations=len(durations)))
+            return False
+        return True
+
+    @staticmethod
+    def _run_entry_once(entry, manager, path=None):
+        with manager.measure(entry=entry, path=path):
+            if getattr(entry, "remote", False) and manager.process_pool is not None:
+                manager.run_remote_task(task=entry)
+            elif isinstance(entry, BaseTask) and entry.asynchronous:
+                from gos.async_tasks import run_coroutine
+                run_coroutine(entry.run(manager=manager))
+            elif isinstance(entry, ExecutableContainer) and path is not None:
+                entry.run(manager=manager, path=path)
+            else:
                 entry.run(manager=manager)
 
+    def _run_parallel(self, manager, path):
+        """ Runs batches of independent entries concurrently on a thread pool, waiting for each batch to finish before the next one """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for batch in self.get_indexed_entries_batches():
+                if len(batch) == 1:
+                    index, entry = batch[0]
+                    self._run_entry(entry=entry, manager=manager, path=self.get_entry_path(path, index, entry))
+                    continue
+                mark_offloaded_work()
+                futures = [executor.submit(self._run_entry, entry, manager, self.get_entry_path(path, index, entry))
+                           for index, entry in batch]
+                for future in futures:
+                    future.result()
+
+    def get_entries_batches(self):
+        """ Splits entries into consecutive batches, that can be executed concurrently
+
+        Consecutive entries with a truthful `independent` attribute are grouped together,
+        while every other entry forms a batch on its own and thus acts as a barrier.
+        Same entry is never put twice into a single batch, as it would then be run concurrently with itself.
+
+        :return: a generator of lists of entries, preserving the original entries order
+        """
+        for batch in self.get_indexed_entries_batches():
+            yield [entry for index, entry in batch]
+
+    def get_indexed_entries_batches(self):
+        """ Same as :meth:`ExecutableContainer.get_entries_batches`, but every entry is accompanied by its index in `entries`
+
+        :return: a generator of lists of (index, entry) tuples
+        """
+        batch = []
+        for index, entry in enumerate(self.entries):
+            if getattr(entry, "independent", DEFAULT_INDEPENDENT) and not any(entry is other for _, other in batch):
+                batch.append((index, entry))
+                continue
+            if len(batch) > 0:
+                yield batch
+                batch = []
+            if getattr(entry, "independent", DEFAULT_INDEPENDENT):
+                batch.append((index, entry))
+            else:
+                yield [(index, entry)]
+        if len(batch) > 0:
+            yield batch
+
     @staticmethod
     def setup_from_config(manager, config):
         try:
@@ -58,8 +216,23 @@ class ExecutableContainer(object):
         entries_type_names = config.get("entries_type_names")
         entries_names = config.get("entries_names")
         self_loop = config.get("self_loop", DEFAULT_SELF_LOOP)
+        parallel = config.get("parallel", DEFAULT_PARALLEL)
+        max_workers = config.get("max_workers", DEFAULT_MAX_WORKERS)
+        independent = config.get("independent", DEFAULT_INDEPENDENT)
+        depends_on = config.get("depends_on")
+        inputs = config.get("inputs")
+        outputs = config.get("outputs")
+        asynchronous = config.get("asynchronous", DEFAULT_ASYNCHRONOUS)
+        max_self_loop_iterations = config.get("max_self_loop_iterations", DEFAULT_MAX_SELF_LOOP_ITERATIONS)
+        convergence_predicate = config.get("convergence_predicate")
+        if isinstance(convergence_predicate, string_types):
+            convergence_predicate = Loader.import_object(convergence_predicate)
+        checkpoint = config.get("checkpoint", DEFAULT_CHECKPOINT)
         result = ExecutableContainer(name=name, self_loop=self_loop, entries_names=entries_names, entries_type_names=entries_type_names,
-                                     group_reference_name=reference)
+                                     group_reference_name=reference, parallel=parallel, max_workers=max_workers,
+                                     independent=independent, depends_on=depends_on, inputs=inputs, outputs=outputs,
+                                     asynchronous=asynchronous, max_self_loop_iterations=max_self_loop_iterations,
+                                     convergence_predicate=convergence_predicate, checkpoint=checkpoint)
         manager.logger.debug("Created {name} executable container from config".format(name=result.name))
         return result
 
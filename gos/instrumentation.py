@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+_cpu_clock = None
+
+# measurements in progress on every thread, see mark_offloaded_work
+_active_measurements = threading.local()
+
+
+def get_cpu_clock():
+    """ Resolves (once) a clock, that measures CPU time of the calling thread, in the order of preference:
+        * `time.thread_time` (Python 3.7+)
+        * `resource.getrusage(resource.RUSAGE_THREAD)` (Linux)
+        * `time.clock` (or `time.process_time`, where `time.clock` is not available), that measures the whole process CPU time
+
+    :return: a pair of a clock function and a flag indicating, whether the clock measures CPU time of the calling thread only
+    :rtype: `tuple`(`callable`, `bool`)
+    """
+    global _cpu_clock
+    if _cpu_clock is None:
+        if hasattr(time, "thread_time"):
+            _cpu_clock = time.thread_time, True
+        elif resource is not None and hasattr(resource, "RUSAGE_THREAD"):
+            _cpu_clock = get_rusage_thread_time, True
+        else:
+            _cpu_clock = getattr(time, "clock", None) or getattr(time, "process_time"), False
+    return _cpu_clock
+
+
+def get_rusage_thread_time():
+    usage = resource.getrusage(resource.RUSAGE_THREAD)
+    return usage.ru_utime + usage.ru_stime
+
+
+def get_peak_rss():
+    """ Retrieves a peak resident set size of the current process in kilobytes, or None, if it can not be determined """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # on macOS the value is reported in bytes, rather than in kilobytes
+        peak_rss //= 1024
+    return peak_rss
+
+
+def get_active_measurements():
+    if not hasattr(_active_measurements, "measurements"):
+        _active_measurements.measurements = []
+    return _active_measurements.measurements
+
+
+def mark_offloaded_work():
+    """ Marks CPU time of all measurements in progress on the calling thread as unavailable,
+    as a part of measured work is executed on other threads / processes (i.e. on a thread pool, on a process pool,
+    or in an event loop along with other entries), which CPU time is not accounted by the clock of the calling thread
+    """
+    for measurement in get_active_measurements():
+        measurement.cpu_time_available = False
+
+
+class NullMeasurement(object):
+    """ A no-op replacement for :class:`Measurement`, utilized when instrumentation is disabled """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_MEASUREMENT = NullMeasurement()
+
+
+class Measurement(object):
+    """ Measures a single invocation of a task / an executable container and stores the result in :class:`Instrumentation`
+
+    Wall time is measured with `time.time`, CPU time is measured for the executing thread only (if supported by the platform,
+    see :func:`get_cpu_clock`, otherwise the record is marked with a "process" CPU time scope),
+    and peak RSS corresponds to the whole process peak resident set size at the end of the invocation.
+    CPU time of an invocation, that is not executed entirely by the measuring thread (see :func:`mark_offloaded_work`),
+    or that shares the thread with other invocations (`cpu_time_available` is False), is not recorded
+    and the record is marked with an "unavailable" CPU time scope.
+    """
+
+    def __init__(self, instrumentation, entry, path, cpu_time_available=True):
+        self.instrumentation = instrumentation
+        self.entry = entry
+        self.path = path
+        self.cpu_time_available = cpu_time_available
+        self.profile = None
+        self.wall_time_start = None
+        self.cpu_time_start = None
+
+    def __enter__(self):
+        if self.entry.name in self.instrumentation.profile_names:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        self.wall_time_start = time.time()
+        self.cpu_time_start = get_cpu_clock()[0]()
+        get_active_measurements().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        cpu_clock, per_thread = get_cpu_clock()
+        cpu_time = cpu_clock() - self.cpu_time_start
+        wall_time = time.time() - self.wall_time_start
+        # measurements of entries, that are awaited concurrently in an event loop, are not finished in the reverse order
+        measurements = get_active_measurements()
+        measurements[:] = [measurement for measurement in measurements if measurement is not self]
+        if not self.cpu_time_available:
+            cpu_time, cpu_time_scope = None, "unavailable"
+        else:
+            cpu_time_scope = "thread" if per_thread else "process"
+        if self.profile is not None:
+            self.profile.disable()
+            self.instrumentation.dump_profile(entry=self.entry, profile=self.profile)
+        self.instrumentation.add_record({
+            "name": self.entry.name,
+            "path": self.path,
+            "type": getattr(self.entry, "type_name", "task"),
+            "wall_time": wall_time,
+            "cpu_time": cpu_time,
+            "cpu_time_scope": cpu_time_scope,
+            "peak_rss": get_peak_rss(),
+            "failed": exc_type is not None,
+        })
+        return False
+
+
+class Instrumentation(object):
+    """ Accumulates measurements of all tasks / executable containers invocations during a pipeline run
+
+    :param profile_names: names of tasks / executable containers, which invocations are profiled with `cProfile`
+    :param profile_dir: a directory, where `cProfile` statistics files are written to
+    """
+
+    def __init__(self, profile_names=None, profile_dir=None):
+        self.profile_names = set(profile_names or [])
+        self.profile_dir = profile_dir
+        self.records = []
+        self._lock = threading.Lock()
+        self._profiles_counts = {}
+
+    def measure(self, entry, path=None, cpu_time_available=True):
+        return Measurement(instrumentation=self, entry=entry, path=path, cpu_time_available=cpu_time_available)
+
+    def add_record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def dump_profile(self, entry, profile):
+        with self._lock:
+            count = self._profiles_counts.get(entry.name, 0)
+            self._profiles_counts[entry.name] = count + 1
+        if not os.path.exists(self.profile_dir):
+            os.makedirs(self.profile_dir)
+        profile.dump_stats(os.path.join(self.profile_dir, "{name}.{count}.prof".format(name=entry.name, count=count)))
+
+    def get_report(self):
+        """ Creates a structured report with all invocations measurements and per name summary
+
+        :return: a dict with an "invocations" list of measurements (in order of invocations completion)
+            and a "summary" dict, where for every name a number of invocations, total wall and CPU times and a peak RSS are stored.
+            CPU time scope is "process", if CPU time of any invocation was measured for the whole process, rather than a thread,
+            and it is "unavailable" (with no total CPU time), if CPU time of any invocation is unavailable
+        :rtype: `dict`
+        """
+        with self._lock:
+            records = list(self.records)
+        summary = {}
+        for record in records:
+            entry_summary = summary.setdefault(record["name"], {"type": record["type"], "invocations": 0,
+                                                                "wall_time": 0.0, "cpu_time": 0.0, "cpu_time_scope": "thread",
+                                                                "peak_rss": None})
+            entry_summary["invocations"] += 1
+            entry_summary["wall_time"] += record["wall_time"]
+            if record["cpu_time"] is None or entry_summary["cpu_time"] is None:
+                entry_summary["cpu_time"], entry_summary["cpu_time_scope"] = None, "unavailable"
+            else:
+                entry_summary["cpu_time"] += record["cpu_time"]
+                if record.get("cpu_time_scope") == "process":
+                    entry_summary["cpu_time_scope"] = "process"
+            if record["peak_rss"] is not None:
+                entry_summary["peak_rss"] = max(entry_summary["peak_rss"] or 0, record["peak_rss"])
+        return {"invocations": records, "summary": summary}
+
+    def write_report(self, file_path):
+        dir_path = os.path.dirname(file_path)
+        if dir_path != "" and not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        with open(file_path, "wt") as destination:
+            json.dump(self.get_report(), destination, indent=2, sort_keys=True)
@@ -1,8 +1,129 @@
 # -*- coding: utf-8 -*-
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from gos.cache import TaskResultCache
 from gos.configuration import Configuration
-from gos.exceptions import GOSTaskException, GOSExecutableContainerException
+from gos.exceptions import GOSTaskException, GOSExecutableContainerException, GOSIOException
 from gos.executable_containers import ExecutableContainer
-from gos.tasks import TaskLoader
+from gos.instrumentation import Instrumentation, NULL_MEASUREMENT, mark_offloaded_work
+from gos.tasks import TaskLoader, TaskContext, run_task_in_context
+from gos.utils.files import replace_file
+
+SEQUENTIAL_SCHEDULER = "sequential"
+DAG_SCHEDULER = "dag"
+LOCAL_EXECUTOR = "local"
+PROCESS_EXECUTOR = "process"
+RESUME_FROM_LAST = "last"
+
+
+class DAGScheduler(object):
+    """ Executes entries of an executable container in a dependency driven order
+
+    Dependencies between sibling entries are retrieved from their `depends_on`, `inputs` and `outputs` attributes:
+        * an entry depends on every other sibling entry, which name is listed in its `depends_on`
+        * an entry, that lists some value in its `inputs`, depends on every preceding sibling, that lists it in `outputs`
+        * an entry, that lists some value in its `outputs`, depends on every preceding sibling, that lists it in either `inputs`
+            or `outputs`, so that values are never overwritten out of order
+        * multiple occurrences of the same entry are executed in their listed order
+
+    Entries with no dependencies between them are executed concurrently on a thread pool,
+        and every entry is dispatched as soon as all of its predecessors have finished.
+
+    Only sibling entries of a single executable container are scheduled together: a nested executable container
+        (i.e. a stage of a round) is finished as a whole before its dependants start,
+        so tasks of different containers never overlap, even if they do not depend on each other.
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    @staticmethod
+    def get_dependencies(entries):
+        """ Computes a dependency graph for supplied list of entries
+
+        :param entries: an ordered list of tasks / executable containers
+        :return: a list, where i-th element is a set of indexes of entries, that i-th entry depends on
+        :rtype: `list`(`set`(`int`))
+        """
+        names = {}
+        for index, entry in enumerate(entries):
+            names.setdefault(entry.name, []).append(index)
+        result = [set() for _ in entries]
+        for index, entry in enumerate(entries):
+            for dependency_name in getattr(entry, "depends_on", None) or []:
+                if dependency_name not in names:
+                    raise GOSExecutableContainerException("Entry {entry_name} depends on {dependency_name}, "
+                                                          "which is not present among its siblings"
+                                                          "".format(entry_name=entry.name, dependency_name=dependency_name))
+                result[index].update(other for other in names[dependency_name] if other != index)
+            inputs = set(getattr(entry, "inputs", None) or [])
+            outputs = set(getattr(entry, "outputs", None) or [])
+            for other_index, other in enumerate(entries[:index]):
+                other_inputs = set(getattr(other, "inputs", None) or [])
+                other_outputs = set(getattr(other, "outputs", None) or [])
+                if other is entry or inputs & other_outputs or outputs & (other_inputs | other_outputs):
+                    result[index].add(other_index)
+        return result
+
+    def get_order(self, entries, dependencies=None):
+        """ Topologically sorts supplied entries, preferring listed order among entries, that are ready at the same time
+
+        :param dependencies: a precomputed result of :meth:`DAGScheduler.get_dependencies` for supplied entries
+        :raises: `GOSExecutableContainerException` if dependencies between entries contain a cycle
+        :return: a list of indexes of entries in execution order
+        :rtype: `list`(`int`)
+        """
+        if dependencies is None:
+            dependencies = self.get_dependencies(entries)
+        result = []
+        done = set()
+        while len(result) < len(entries):
+            ready = [index for index in range(len(entries))
+                     if index not in done and dependencies[index] <= done]
+            if len(ready) == 0:
+                raise GOSExecutableContainerException("Dependencies between entries {names} contain a cycle"
+                                                      "".format(names=[entries[index].name for index in range(len(entries))
+                                                                       if index not in done]))
+            result.extend(ready)
+            done.update(ready)
+        return result
+
+    def run(self, entries, manager, run_entry, path=None):
+        """ Executes all supplied entries in a dependency driven order
+
+        :param run_entry: a callable, that is invoked with an entry, a manager and a location of entry execution
+            to execute each entry
+        :param path: a location of the parent executable container execution, utilized to compute locations of entries executions
+        """
+        dependencies = self.get_dependencies(entries)
+        order = self.get_order(entries, dependencies=dependencies)
+        waiting_for = [set(entry_dependencies) for entry_dependencies in dependencies]
+        submitted = set()
+        mark_offloaded_work()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+
+            def submit_ready():
+                for index in order:
+                    if index not in submitted and len(waiting_for[index]) == 0:
+                        submitted.add(index)
+                        entry_path = None if path is None else ExecutableContainer.get_entry_path(path, index, entries[index])
+                        running[executor.submit(run_entry, entries[index], manager, entry_path)] = index
+
+            submit_ready()
+            while len(running) > 0:
+                finished, _ = wait(list(running.keys()), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    future.result()
+                    for entry_waiting_for in waiting_for:
+                        entry_waiting_for.discard(index)
+                submit_ready()
 
 
 class Manager(object):
@@ -12,11 +133,48 @@ class Manager(object):
         self.tasks_instances = {}
         self.executable_containers_classes = {}
         self.executable_containers_instances = {}
+        self.dag_scheduler = None
+        self.process_pool = None
+        self.task_cache = None
+        self.checkpoint_file = None
+        self.instrumentation = None
+        self.completed_paths = set()
+        self.resumed_paths = set()
+        self._checkpoint_lock = threading.Lock()
+        self.data = {}
+        self.self_loop_statistics = {}
+        self.compiled_configuration = None
+        logger_config = self.configuration.get(Configuration.LOGGER) or {}
+        self.logger = logging.getLogger(logger_config.get(Configuration.NAME) or Configuration.DEFAULT_LOGGER_NAME)
 
     def initiate_tasks(self):
-        """ Loads all tasks using `TaskLoader` from respective configuration option """
-        self.tasks_classes = TaskLoader().load_tasks(
-            paths=self.configuration[Configuration.ALGORITHM][Configuration.TASKS][Configuration.PATHS])
+        """ Loads all tasks using `TaskLoader` from respective configuration option
+
+        If `algorithm->tasks->lazy` is truthful and executable containers are already initiated,
+            only tasks, that are referenced by executable containers entries, are loaded.
+            Together with `algorithm->tasks->index_file` it allows to import only modules, that contain such tasks.
+        """
+        tasks_config = self.configuration[Configuration.ALGORITHM][Configuration.TASKS]
+        names = None
+        if tasks_config.get(Configuration.LAZY, False):
+            names = self.get_referenced_entries_names()
+            if names is None:
+                self.logger.debug("No executable containers are initiated yet, all tasks are loaded")
+        loader = TaskLoader(index_file=tasks_config.get(Configuration.INDEX_FILE))
+        self.tasks_classes = loader.load_tasks(paths=tasks_config[Configuration.PATHS], names=names)
+
+    def get_referenced_entries_names(self):
+        """ Retrieves names of all entries, that are referenced by initiated executable containers
+
+        :return: a set of entries names, or None, if no executable containers are initiated
+        :rtype: `set`(`str`) or `None`
+        """
+        if len(self.executable_containers_instances) == 0:
+            return None
+        result = set()
+        for executable_container in self.executable_containers_instances.values():
+            result.update(executable_container.entries_names)
+        return result
 
     def instantiate_tasks(self):
         """ All loaded tasks are initialized. Depending on configuration fails in such instantiations may be silent """
@@ -61,8 +219,251 @@ class Manager(object):
                     entry = self.executable_containers_instances[entry_name]
                 executable_container.entries.append(entry)
 
+    def setup_scheduler(self):
+        """ Creates a `DAGScheduler`, if dependency driven execution is requested in the algorithm section of configuration """
+        algorithm_config = self.configuration.get(Configuration.ALGORITHM, {})
+        if algorithm_config.get(Configuration.SCHEDULER, SEQUENTIAL_SCHEDULER) == DAG_SCHEDULER:
+            self.dag_scheduler = DAGScheduler(max_workers=algorithm_config.get(Configuration.MAX_WORKERS))
+        else:
+            self.dag_scheduler = None
+
+    def setup_task_cache(self):
+        """ Creates a `TaskResultCache`, if it is enabled in the algorithm->cache section of configuration """
+        cache_config = self.configuration.get(Configuration.ALGORITHM, {}).get(Configuration.CACHE) or {}
+        if cache_config.get(Configuration.ENABLED, Configuration.DEFAULT_ALGORITHM_CACHE_ENABLED):
+            dir_path = cache_config.get(Configuration.DIR) or os.path.join(self.configuration.get(Configuration.DIR) or os.getcwd(),
+                                                                           Configuration.DEFAULT_ALGORITHM_CACHE_DIR)
+            self.task_cache = TaskResultCache(dir_path=dir_path)
+        else:
+            self.task_cache = None
+
+    def get_task_cache_key(self, task):
+        """ Computes a cache key for supplied entry, if caching is enabled and entry has a truthful `cacheable` attribute
+
+        :rtype: `str` or `None`
+        """
+        if self.task_cache is None or not getattr(task, "cacheable", False):
+            return None
+        return self.task_cache.get_key(task=task, configuration=self.configuration, data=self.data)
+
+    def restore_cached_outputs(self, task, key):
+        """ Restores cached outputs of supplied task into the shared data
+
+        :return: a flag indicating whether task outputs were restored and thus task execution can be skipped
+        :rtype: `bool`
+        """
+        if not self.task_cache.restore(key=key, data=self.data):
+            return False
+        self.logger.info("Outputs of {name} are restored from cache, its execution is skipped".format(name=task.name))
+        return True
+
+    def store_cached_outputs(self, task, key):
+        """ Stores outputs of supplied task in cache. Depending on configuration fails in such storing may be silent """
+        try:
+            self.task_cache.store(key=key, task=task, data=self.data)
+        except GOSIOException as ex:
+            if not self.configuration.get(Configuration.ALGORITHM, {}).get(Configuration.IOSF):
+                raise
+            self.logger.warning(str(ex))
+
+    def setup_checkpoints(self):
+        """ Determines a checkpoint file location and restores the state from a checkpoint,
+        if it is requested by the `resume_from` value in the algorithm->checkpoints section of configuration
+        """
+        checkpoints_config = self.configuration.get(Configuration.ALGORITHM, {}).get(Configuration.CHECKPOINTS) or {}
+        dir_path = checkpoints_config.get(Configuration.DIR) or os.path.join(self.configuration.get(Configuration.DIR) or os.getcwd(),
+                                                                             Configuration.DEFAULT_ALGORITHM_CHECKPOINTS_DIR)
+        self.checkpoint_file = os.path.join(dir_path, Configuration.DEFAULT_ALGORITHM_CHECKPOINTS_FILE)
+        self.completed_paths = set()
+        self.resumed_paths = set()
+        resume_from = checkpoints_config.get(Configuration.RESUME_FROM)
+        if resume_from in ("", None, False):
+            return
+        self.load_checkpoint(file_path=self.checkpoint_file if resume_from in (True, RESUME_FROM_LAST) else resume_from)
+
+    def load_checkpoint(self, file_path):
+        """ Restores shared data and a set of finished executions from a checkpoint file
+
+        Every finished execution, recorded in the checkpoint, is skipped once during the current run.
+        """
+        try:
+            with open(file_path, "rb") as source:
+                state = pickle.load(source)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError) as ex:
+            raise GOSIOException("Could not resume from checkpoint {file_path}: {exception}"
+                                 "".format(file_path=file_path, exception=ex))
+        self.data = state["data"]
+        self.completed_paths = set(state["completed_paths"])
+        self.resumed_paths = set(state["completed_paths"])
+        self.logger.info("Resuming from checkpoint {file_path} with {count} finished executions"
+                         "".format(file_path=file_path, count=len(self.completed_paths)))
+
+    def skip_resumed(self, path):
+        """ Checks if an execution at supplied location has been finished before the checkpoint, the current run was resumed from
+
+        Each such location is skipped only once, so that later self loop iterations over it are executed as usual.
+
+        :rtype: `bool`
+        """
+        with self._checkpoint_lock:
+            if path not in self.resumed_paths:
+                return False
+            self.resumed_paths.discard(path)
+        self.logger.info("{path} has been finished before the checkpoint, its execution is skipped".format(path=path))
+        return True
+
+    def save_checkpoint(self, path):
+        """ Records the execution at supplied location as finished and writes shared data along with all finished executions
+        into a checkpoint file. Depending on configuration fails in such writing may be silent
+        """
+        with self._checkpoint_lock:
+            self.completed_paths.add(path)
+            if not self._write_checkpoint(description="after {path}".format(path=path)):
+                return
+        self.logger.info("Checkpoint saved after {path}".format(path=path))
+
+    def start_self_loop_iteration(self, path):
+        """ Forgets finished executions nested into the execution at supplied location, as it is about to be repeated by a self loop
+
+        Nested locations are the same in every iteration, so if they were kept, a run resumed from a checkpoint, that was saved
+        during a later iteration, would skip entries, that have been finished in earlier iterations only.
+        A checkpoint is saved right away, so that a run resumed from it repeats the new iteration from its beginning.
+        """
+        prefix = path + "/"
+        with self._checkpoint_lock:
+            nested_paths = {entry for entry in self.completed_paths | self.resumed_paths if entry.startswith(prefix)}
+            if len(nested_paths) == 0:
+                return
+            self.completed_paths -= nested_paths
+            self.resumed_paths -= nested_paths
+            self._write_checkpoint(description="before a self loop iteration over {path}".format(path=path))
+
+    def _write_checkpoint(self, description):
+        """ Writes shared data along with all finished executions into a checkpoint file, replacing the previous one
+
+        :return: a flag indicating if the checkpoint has been written
+        :rtype: `bool`
+        """
+        try:
+            dir_path = os.path.dirname(self.checkpoint_file)
+            if not os.path.exists(dir_path):
+                os.makedirs(dir_path)
+            descriptor, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+            with os.fdopen(descriptor, "wb") as destination:
+                pickle.dump({"data": self.data, "completed_paths": sorted(self.completed_paths)}, destination)
+            # the previous checkpoint is replaced atomically, so that an interrupted write never leaves no checkpoint at all
+            replace_file(tmp_path, self.checkpoint_file)
+        except (IOError, OSError, pickle.PicklingError, TypeError, AttributeError) as ex:
+            message = "Checkpoint {description} could not be saved: {exception}".format(description=description, exception=ex)
+            if not self.configuration.get(Configuration.ALGORITHM, {}).get(Configuration.IOSF):
+                raise GOSIOException(message)
+            self.logger.warning(message)
+            return False
+        return True
+
+    def get_stats_dir(self):
+        """ Determines the output->stats directory, resolving it relative to the output directory """
+        output_config = self.configuration.get(Configuration.OUTPUT) or {}
+        output_dir = output_config.get(Configuration.DIR) or os.path.join(self.configuration.get(Configuration.DIR) or os.getcwd(),
+                                                                          Configuration.DEFAULT_OUTPUT_DIR)
+        stats_config = output_config.get(Configuration.STATS) or {}
+        return os.path.join(output_dir, stats_config.get(Configuration.DIR) or Configuration.DEFAULT_OUTPUT_STATS_DIR)
+
+    def setup_instrumentation(self):
+        """ Creates an `Instrumentation`, if it is enabled in the output->stats section of configuration """
+        stats_config = (self.configuration.get(Configuration.OUTPUT) or {}).get(Configuration.STATS) or {}
+        if stats_config.get(Configuration.INSTRUMENTATION, Configuration.DEFAULT_OUTPUT_STATS_INSTRUMENTATION):
+            self.instrumentation = Instrumentation(profile_names=stats_config.get(Configuration.PROFILE),
+                                                   profile_dir=self.get_stats_dir())
+        else:
+            self.instrumentation = None
+
+    def measure(self, entry, path=None, cpu_time_available=True):
+        """ Provides a context manager, that measures a single invocation of supplied entry, if instrumentation is enabled """
+        if self.instrumentation is None:
+            return NULL_MEASUREMENT
+        return self.instrumentation.measure(entry=entry, path=path, cpu_time_available=cpu_time_available)
+
+    def write_execution_report(self):
+        """ Writes an instrumentation report as a JSON file into the output->stats directory.
+        Depending on configuration fails in such writing may be silent
+        """
+        stats_config = (self.configuration.get(Configuration.OUTPUT) or {}).get(Configuration.STATS) or {}
+        file_name = stats_config.get(Configuration.INSTRUMENTATION_FILE) or Configuration.DEFAULT_OUTPUT_STATS_INSTRUMENTATION_FILE
+        file_path = os.path.join(self.get_stats_dir(), file_name)
+        try:
+            self.instrumentation.write_report(file_path=file_path)
+        except (IOError, OSError) as ex:
+            if not stats_config.get(Configuration.IOSF):
+                raise GOSIOException("Execution report could not be written to {file_path}: {exception}"
+                                     "".format(file_path=file_path, exception=ex))
+            self.logger.warning("Execution report could not be written to {file_path}: {exception}"
+                                "".format(file_path=file_path, exception=ex))
+
+    def record_self_loop(self, entry, durations):
+        """ Stores wall time of every iteration of a finished (self looped) execution of an entry
+
+        Statistics are accumulated in `self_loop_statistics`, where for every entry name a list of executions is stored,
+        and each execution is represented by a list of its iterations wall times in seconds.
+        """
+        self.self_loop_statistics.setdefault(entry.name, []).append(durations)
+        if entry.self_loop:
+            self.logger.info("{name} finished after {iterations} self loop iteration(s) in {time:.3f} seconds"
+                             "".format(name=entry.name, iterations=len(durations), time=sum(durations)))
+
+    def get_compiled_configuration(self):
+        """ Retrieves an immutable, attribute accessible version of the configuration, compiling it on the first request
+
+        Tasks, that read configuration values repeatedly, shall prefer it to nested string keyed lookups, i.e.
+            `manager.get_compiled_configuration().algorithm.io_silent_fail`.
+            Changes made to the configuration after the first request are not reflected in the compiled version.
+
+        :raises: :class:`gos.exceptions.GOSConfigurationException` if configuration is invalid
+        """
+        if self.compiled_configuration is None:
+            self.compiled_configuration = Configuration(self.configuration).compile()
+        return self.compiled_configuration
+
+    def get_task_context(self, task):
+        """ Creates a picklable context for a task, that is going to be executed in a separate process
+
+        If a task lists any names in its `inputs`, only respective values from the shared data are supplied in the context,
+        otherwise the whole shared data is supplied.
+
+        :rtype: `gos.tasks.TaskContext`
+        """
+        if len(task.inputs) > 0:
+            data = {name: self.data[name] for name in task.inputs if name in self.data}
+        else:
+            data = dict(self.data)
+        return TaskContext(configuration=self.configuration, data=data)
+
+    def run_remote_task(self, task):
+        """ Executes supplied task on a process pool with a picklable context and collects its outputs into the shared data """
+        mark_offloaded_work()
+        future = self.process_pool.submit(run_task_in_context, task, self.get_task_context(task=task))
+        outputs, do_self_loop = future.result()
+        self.data.update(outputs)
+        task.do_self_loop = do_self_loop
+
     def run(self):
-        self.executable_containers_instances["pipeline"].run(manager=self)
+        self.setup_scheduler()
+        self.setup_task_cache()
+        self.setup_checkpoints()
+        self.setup_instrumentation()
+        algorithm_config = self.configuration.get(Configuration.ALGORITHM, {})
+        if algorithm_config.get(Configuration.EXECUTOR, LOCAL_EXECUTOR) == PROCESS_EXECUTOR:
+            self.process_pool = ProcessPoolExecutor(max_workers=algorithm_config.get(Configuration.MAX_WORKERS))
+        try:
+            pipeline = self.executable_containers_instances["pipeline"]
+            with self.measure(entry=pipeline, path=pipeline.name):
+                pipeline.run(manager=self)
+        finally:
+            if self.process_pool is not None:
+                self.process_pool.shutdown()
+                self.process_pool = None
+            if self.instrumentation is not None:
+                self.write_execution_report()
 
     def get_task_instance(self, task_name):
         return self.tasks_instances[task_name]
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import json
 import os
 from gos.exceptions import GOSTaskException, GOSIOException
 from gos.utils.load import Loader
@@ -8,12 +9,121 @@ class BaseTask(object):
     name = "BaseTask"
     self_loop = False
     do_self_loop = False
+    independent = False
+    depends_on = ()
+    inputs = ()
+    outputs = ()
+    remote = False
+    asynchronous = False
+    max_self_loop_iterations = None
+    cacheable = False
 
     def run(self, manager):
         raise NotImplemented("run method shall be implemented for all the subclasses of BaseTask")
 
+    def has_converged(self, manager):
+        """ Determines if self loop over this task can be stopped, even though `do_self_loop` flag is set. Never by default """
+        return False
+
+
+class TaskContext(object):
+    """ A lightweight picklable replacement for a `Manager`, that is supplied to tasks executed in a separate process
+
+    Task, that has a truthful `remote` attribute, receives an instance of this class as a `manager` argument of its `run` method,
+    when a manager is executing tasks on a process pool. Values, that a task stores in `data` under names listed in its `outputs`
+    are collected back into the manager shared data after the task is finished.
+    """
+
+    def __init__(self, configuration, data=None):
+        self.configuration = configuration
+        self.data = {} if data is None else data
+
+
+def run_task_in_context(task, context):
+    """ Executes supplied task with supplied context as its manager. Utilized as a process pool target
+
+    :return: a tuple of a dict with task output values and a `do_self_loop` flag value of the task after execution
+    :rtype: `tuple`(`dict`, `bool`)
+    """
+    task.do_self_loop = False
+    result = task.run(manager=context)
+    if task.asynchronous:
+        from gos.async_tasks import run_coroutine
+        run_coroutine(result)
+    outputs = {name: context.data[name] for name in task.outputs if name in context.data}
+    return outputs, task.do_self_loop
+
 
 class TaskLoader(object):
+    """ Loads subclasses of `BaseTask` from python modules
+
+    :param index_file: a path to a JSON file, where a discovery index is persisted. For every successfully imported module
+        its modification time, size and names of tasks it contains are stored, so that during consequent loads, when only
+        specific tasks are requested, modules, that are known to not contain any of them, are not imported at all
+    """
+
+    def __init__(self, index_file=None):
+        self.index_file = index_file
+        self.index = self.load_index() if index_file is not None else {}
+        self.index_changed = False
+
+    def load_index(self):
+        try:
+            with open(self.index_file, "rt") as source:
+                return json.load(source)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def save_index(self):
+        """ Persists the discovery index, if it has changed. Failures are silent, as the index is only an optimization """
+        if self.index_file is None or not self.index_changed:
+            return
+        try:
+            with open(self.index_file, "wt") as destination:
+                json.dump(self.index, destination, indent=2, sort_keys=True)
+            self.index_changed = False
+        except (IOError, OSError):
+            pass
+
+    @staticmethod
+    def _get_file_signature(file_path):
+        stat = os.stat(file_path)
+        return getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size
+
+    def get_indexed_task_names(self, file_path):
+        """ Retrieves names of tasks, that a module contains, from the discovery index
+
+        :return: a set of tasks names, or None, if the module is not indexed, or has changed since it was indexed
+        :rtype: `set`(`str`) or `None`
+        """
+        entry = self.index.get(os.path.abspath(file_path))
+        if entry is None:
+            return None
+        try:
+            mtime, size = self._get_file_signature(file_path)
+        except (IOError, OSError):
+            return None
+        if entry["mtime"] != mtime or entry["size"] != size:
+            return None
+        return set(entry["tasks"])
+
+    def update_index(self, file_path, tasks_names):
+        if self.index_file is None:
+            return
+        mtime, size = self._get_file_signature(file_path)
+        self.index[os.path.abspath(file_path)] = {"mtime": mtime, "size": size, "tasks": sorted(tasks_names)}
+        self.index_changed = True
+
+    def is_referenced(self, file_path, names):
+        """ Checks if a module has to be imported to load tasks with supplied names
+
+        :param names: names of tasks, that are to be loaded, or None, if all tasks are to be loaded
+        :rtype: `bool`
+        """
+        if names is None:
+            return True
+        indexed_tasks_names = self.get_indexed_task_names(file_path)
+        return indexed_tasks_names is None or len(indexed_tasks_names.intersection(names)) > 0
 
     def load_tasks_from_file(self, file_path):
         """ Imports specified python module and returns subclasses of BaseTask from it
@@ -35,15 +145,18 @@ class TaskLoader(object):
                     result[entry.name] = entry
             except TypeError:
                 continue
+        self.update_index(file_path=file_path, tasks_names=[name for name in result if name != BaseTask.name])
         return result
 
-    def load_tasks_from_dir(self, dir_path, propagate_exceptions=False):
+    def load_tasks_from_dir(self, dir_path, propagate_exceptions=False, names=None):
         """ Imports all python modules in specified directories and returns subclasses of BaseTask from them
 
         :param propagate_exceptions: a flag that indicates if exceptions from single file import shall be raised during the
             whole directory lookup
         :param dir_path: fully qualified directory path, where all python modules will be search for subclasses of BaseTask
         :type dir_path: `str`
+        :param names: names of tasks, that are to be loaded. If specified, modules, that are known from the discovery index
+            to not contain any of them, are not imported. By default all modules are imported
         :return: a dict of CustomTasks, where key is CustomTask.name, and value is a CustomClass task itself
         :rtype: `dict`
         """
@@ -54,6 +167,8 @@ class TaskLoader(object):
         result = {}
         for file_basename in os.listdir(dir_path):
             full_file_path = os.path.join(dir_path, file_basename)
+            if not self.is_referenced(file_path=full_file_path, names=names):
+                continue
             try:
                 result.update(self.load_tasks_from_file(full_file_path))
             except (GOSTaskException, GOSIOException):
@@ -61,13 +176,15 @@ class TaskLoader(object):
                     raise
         return result
 
-    def load_tasks(self, paths, propagate_exception=False):
+    def load_tasks(self, paths, propagate_exception=False, names=None):
         """ Loads all subclasses of BaseTask from modules that are contained in supplied directory paths or direct module paths
 
         :param propagate_exception: a flag that indicates if exceptions from single file import shall be raised during the
             whole directory lookup
         :param paths: an iterable of fully qualified paths to python modules / directories, from where we import subclasses of BaseClass
         :type paths: `iterable`(`str`)
+        :param names: names of tasks, that are to be loaded. If specified, modules, that are known from the discovery index
+            to not contain any of them, are not imported. By default all modules are imported
         :return: a dict of CustomTasks, where key is CustomTask.name, and value is a CustomClass task itself
         :rtype: `dict`
         """
@@ -76,8 +193,8 @@ class TaskLoader(object):
             for path in paths:
                 try:
                     if os.path.isdir(path):
-                        result.update(self.load_tasks_from_dir(dir_path=path, propagate_exceptions=propagate_exception))
-                    elif os.path.isfile(path):
+                        result.update(self.load_tasks_from_dir(dir_path=path, propagate_exceptions=propagate_exception, names=names))
+                    elif os.path.isfile(path) and self.is_referenced(file_path=path, names=names):
                         result.update(self.load_tasks_from_file(file_path=path))
                 except (GOSTaskException, GOSIOException):
                     if propagate_exception:
@@ -85,3 +202,5 @@ class TaskLoader(object):
             return result
         except TypeError:
             raise GOSTaskException("Argument for `load_tasks` method must be iterable")
+        finally:
+            self.save_index()
@@ -1,11 +1,15 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
-from copy import deepcopy
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from bg import Multicolor, KBreak, BreakpointGraph, GRIMMReader, NewickReader, BGGenome
-import itertools
-import networkx as nx
 import os
 
+from gos.tmp.scaffolding_utils import MaskedBreakpointGraph, identify_speculatively, get_speculative_assemblies, \
+    process_subnets, DEFAULT_SUBNETS_BATCH_SIZE, get_max_weight_matching, MulticolorEncoder, \
+    VertexIndex, DEFAULT_SCORES_CACHE_SIZE, get_target_masks, read_cached_inputs, \
+    ComponentsTracker, get_batch_scores, Tracer, AssemblyPointsWriter
+
 __author__ = "Sergey Aganezov"
 __email__ = "aganezov(at)gwu.edu"
 
@@ -64,7 +68,7 @@ def supports_a_pair_of_irregular_edges(graph, edge):
 #
 ################################################################################################################
 
-def get_support_edge_scores(graph, subnet, target_multicolor, tree, verbose=False, verbose_destination=None):
+def get_support_edge_scores(graph, subnet, target_multicolor, tree, encoder=None, vertex_index=None, tracer=None):
     """
     For supplied connected components (this connected components is assumed to be pre-filtered before hand)
      for every regular edge in it (which after pre-filtration would correspond to "supporting" edge only)
@@ -73,358 +77,366 @@ def get_support_edge_scores(graph, subnet, target_multicolor, tree, verbose=Fals
         (every support edge corresponds to a pair of irregular edges), as if assembly DID NOT happened
      where "after" is a score for a pair of irregular edges under observation and their support
         (every support edge corresponds to a pair of irregular edges), as if assembly DID happened
+    All multicolors are encoded as bitmasks by supplied encoder (see MulticolorEncoder), which is created
+        from the tree, if not supplied, and scores for all support edges are computed in a single batch (see get_batch_scores)
+    Irregular edges and surrounding multicolors of vertices are looked up in supplied vertex index (see VertexIndex),
+        which is created over the graph in a lazy mode, if not supplied
+    If tracer (see Tracer) is supplied, multicolors and scores of sampled possible assembly points are written to it
     """
-    result = []
+    if encoder is None:
+        encoder = MulticolorEncoder(tree)
+    if vertex_index is None:
+        vertex_index = VertexIndex(graph, encoder, lazy=True)
+
+    target_mask = encoder.encode(target_multicolor)
+
     # we iterate over all regular edges in pre-filtered connected component,
     # as all of them correspond to possible assembly points
-    if verbose:
-        print(">Getting support edge scores", file=verbose_destination)
+    points = []
+    surroundings1, surroundings2, irregular_masks1, irregular_masks2, support_masks = [], [], [], [], []
     for edge in filter(lambda e: not e.is_irregular_edge, subnet.edges()):
-        ex_data = {}
-        if verbose:
-            print("Possible assembly point", edge.vertex1.name, edge.vertex2.name,
-                  [color.name for color in edge.multicolor.multicolors.elements()], file=verbose_destination)
-
         # basic references to most important parts of the observed possible assembly point
         v1, v2 = edge.vertex1, edge.vertex2
-        sedge, iedge1, iedge2 = edge, None, None
-
-        # since each vertex has at most 1 irregular edge incident to it, we can safely retrieve
-        #   the first one for each vertex
-        iedge1 = get_irregular_edge_by_vertex(subnet, v1)
-        iedge2 = get_irregular_edge_by_vertex(subnet, v2)
-
-        if verbose:
-            print("irregular edge 1:", iedge1.vertex1.name, iedge1.vertex2.name,
-                  [color.name for color in iedge1.multicolor.multicolors.elements()], file=verbose_destination)
-            print("irregular edge 2:", iedge2.vertex1.name, iedge2.vertex2.name,
-                  [color.name for color in iedge2.multicolor.multicolors.elements()], file=verbose_destination)
-
-        # we need a full multicolor to determine which colors are missing (indels) on both vertices,
-        #   that determine an assembly point
-        full_multicolor = max(tree.consistent_multicolors, key=lambda multicolor: len(list(multicolor.multicolors.elements())))
-        full_multicolor = Multicolor(*full_multicolor.colors)
+        points.append((v1, v2))
 
         # we accumulated multicolors for both vertices,
         #   that are present in all edges combined, that are incident to them
         # we need to retrieve that information from the original whole graph, and not from the filtered one
-        surrounding1 = Multicolor(*get_vertex_surrounding_multicolor(graph, v1).colors)
-        surrounding2 = Multicolor(*get_vertex_surrounding_multicolor(graph, v2).colors)
-
-        # we compute complementary multicolors for each vertex
-        #   (multicolors, that are not present in edges, that are incident to respective vertices)
-        c_1_multicolor = full_multicolor - surrounding1
-        c_2_multicolor = full_multicolor - surrounding2
-
-        # their intersection correspond to multicolors, that are not present at both vertices
-        c = c_1_multicolor.intersect(c_2_multicolor)
-
-        # and these colors correspond to colors, that are lacking uniquely at each vertex
-        c_a = c_1_multicolor - c
-        c_b = c_2_multicolor - c
-
-        # a list of tree consistent multicolors, that are used to split any given multicolor into a smallest set of
-        #   T-consistent multicolors
-        guidance = tree.consistent_multicolors
-
-        if verbose:
-            print("\tfull multicolor:", [color.name for color in full_multicolor.multicolors.elements()],
-                  file=verbose_destination)
-            print("\ts1 multicolor:", [color.name for color in surrounding1.multicolors.elements()],
-                  file=verbose_destination)
-            print("\ts2 multicolor:", [color.name for color in surrounding2.multicolors.elements()],
-                  file=verbose_destination)
-            print("\tc_1 multicolor:", [color.name for color in c_1_multicolor.multicolors.elements()],
-                  file=verbose_destination)
-            print("\tc_2 multicolor:", [color.name for color in c_2_multicolor.multicolors.elements()],
-                  file=verbose_destination)
-            print("\tc multicolor:", [color.name for color in c.multicolors.elements()],
-                  file=verbose_destination)
-            print("\tc_a multicolor:", [color.name for color in c_a.multicolors.elements()],
-                  file=verbose_destination)
-            print("\tc_b multicolor:", [color.name for color in c_b.multicolors.elements()],
-                  file=verbose_destination)
-
-        # we compute summands for the "before" score for respective three edges
-        # we add lacking colors to the edges multicolors during this computation
-
-        ###################################################
-        # we don't account for multiplicity in guidance, as in guidance we have each colors present exactly once,
-        # as it is when no information about whole genome duplication is available,
-        # but since there might be duplications in the multicolors on the edges, we would like to interpret
-        # those multicolors as multicolors, where each present colors has multiplicity 1
-        ###################################################
-        ie1_score = len(Multicolor.split_colors(Multicolor(*iedge1.multicolor.colors) + c_a, guidance=guidance,
-                                                account_for_color_multiplicity_in_guidance=False))
-        ie2_score = len(Multicolor.split_colors(Multicolor(*iedge2.multicolor.colors) + c_b, guidance=guidance,
-                                                account_for_color_multiplicity_in_guidance=False))
-        s_multicolor = (Multicolor(*sedge.multicolor.colors))
-        ex_data["s_support"] = sorted(sorted([color.name for color in target_multicolor.intersect(s_multicolor).colors]))
-        if target_multicolor <= s_multicolor:
-            s_multicolor -= target_multicolor
-        se_score = len(Multicolor.split_colors(s_multicolor + c, guidance=guidance,
-                                               account_for_color_multiplicity_in_guidance=False))
-        before = ie1_score + ie2_score + se_score
-
-        if verbose:
-            print("score before: iedge1 score =", ie1_score,
-                  "iedge2 score =", ie2_score,
-                  "support edge score =", se_score,
-                  "\"before\" score =", before,
-                  file=verbose_destination)
-
-        # we compute summands for the "after" score for respective three edges, as if the assembly was performed
-        # we add lacking colors to the edges multicolors during this computation
+        surroundings1.append(vertex_index.get_surrounding_mask(v1))
+        surroundings2.append(vertex_index.get_surrounding_mask(v2))
 
         ###################################################
         # we don't account for multiplicity in guidance, as in guidance we have each colors present exactly once,
         # as it is when no information about whole genome duplication is available,
         # but since there might be duplications in the multicolors on the edges, we would like to interpret
         # those multicolors as multicolors, where each present colors has multiplicity 1
+        #   (which bitmasks do by construction)
+        #
+        # since each vertex has at most 1 irregular edge incident to it, we can safely retrieve
+        #   the first one for each vertex
+        # support edges are present in the subnet only if irregular edges at both their vertices are present there
+        #   as well, so they can be retrieved from the whole graph
         ###################################################
-        new_ie1_score = len(Multicolor.split_colors(Multicolor(*iedge1.multicolor.colors) - target_multicolor + c_a, guidance=guidance,
-                                                    account_for_color_multiplicity_in_guidance=False))
-        new_ie2_score = len(Multicolor.split_colors(Multicolor(*iedge2.multicolor.colors) - target_multicolor + c_b, guidance=guidance,
-                                                    account_for_color_multiplicity_in_guidance=False))
-        new_se_score = len(Multicolor.split_colors(s_multicolor + target_multicolor + c, guidance=guidance,
-                                                   account_for_color_multiplicity_in_guidance=False))
+        irregular_masks1.append(encoder.encode(vertex_index.get_irregular_edge(v1).multicolor))
+        irregular_masks2.append(encoder.encode(vertex_index.get_irregular_edge(v2).multicolor))
+        support_masks.append(encoder.encode(edge.multicolor))
+
+    # we compute "before" and "after" scores for all possible assembly points at once
+    #   lacking at vertices colors are added to the edges multicolors during this computation
+    scores = get_batch_scores(encoder, target_mask, surroundings1, surroundings2, irregular_masks1, irregular_masks2,
+                              support_masks)
+
+    if tracer is not None:
+        for i, ((v1, v2), (before, after)) in enumerate(zip(points, scores)):
+            if tracer.is_sampled(v1.name) or tracer.is_sampled(v2.name):
+                tracer.write("possible_assembly_point", v1=v1.name, v2=v2.name,
+                             s1=encoder.get_names(surroundings1[i]), s2=encoder.get_names(surroundings2[i]),
+                             ie1=encoder.get_names(irregular_masks1[i]), ie2=encoder.get_names(irregular_masks2[i]),
+                             support=encoder.get_names(support_masks[i]),
+                             s_support=encoder.get_names(target_mask & support_masks[i]),
+                             before=before, after=after)
 
-        after = new_ie1_score + new_ie2_score + new_se_score
+    # we return result as a list of tuples, where each tuple contains information about a pair of vertices
+    #   (possible assembly point), "before" and "after" score for this possible assembly point
+    #   and a bitmask of the multicolor of its support edge (which is kept as an integer, to be decoded only if needed)
+    return [(point, before, after, support_mask)
+            for point, (before, after), support_mask in zip(points, scores, support_masks)]
 
-        if verbose:
-            print("score after: iedge1 score =", new_ie1_score,
-                  "iedge2 score =", new_ie2_score,
-                  "support edge score =", new_se_score,
-                  "\"after\" score =", after)
 
-        result.append(((v1, v2), before, after, ex_data))
+def trace_removed_edge(tracer, bgedge, reason):
+    """ Writes a removal of an edge during subnets filtration to supplied tracer, if any of its vertices is sampled """
+    if tracer.is_sampled(bgedge.vertex1.name) or tracer.is_sampled(bgedge.vertex2.name):
+        tracer.write("removed_edge", v1=bgedge.vertex1.name, v2=bgedge.vertex2.name, reason=reason,
+                     multicolor=[color.name for color in bgedge.multicolor.multicolors.elements()])
 
-    # we return result as a list of tuples, where each tuple contains information about a pair of vertices
-    #   (possible assembly point), and "before" and "after" score for this possible assembly point
-    return result
 
-
-def get_irregular_subnets(cc, target_multicolor, exclude, verbose=False, verbose_destination=None):
+def get_irregular_subnets(cc, target_multicolor, exclude, tracer=None):
     """
-    For a supplied connected component (which is assumed to be a deepcopy from an original breakpoint graph)
+    For a supplied connected component (which is never changed, as it is a view on an original breakpoint graph)
     we filter out all edges, that are of no interest for the scaffolding purposes with current target multicolor:
         1. target multicolor must be fully present in the irregular edge
         2. all colors from the target multicolor must be present exactly once in irregular edge multicolor
         3. no colors from the "exclude" set must be present in the irregular edge multicolor
         4. regular edge must "support" two irregular edges, that have survived the filtration specified above
+    Edges of interest are collected into an edge mask, and subnets are returned as read-only views over it
+    If tracer (see Tracer) is supplied, removals of edges, that are incident to sampled vertices, are written to it
     """
-    to_remove = []
-
-    if verbose:
-        print(">Getting irregular subnets", file=verbose_destination)
-        print("Graph contains", len(list(cc.edges())), "edges", file=verbose_destination)
-        print("Removing uninteresting irregular edges", file=verbose_destination)
 
     ####################################################################################################
-    # we work with a supplied connected components,
-    #   assuming that its a deepcopy of the connected components in the original graph
-    # so we can do with it whatever we want, without affecting data in the original graph
+    # instead of deleting uninteresting edges from a deepcopy of the connected component,
+    #   we remember all the interesting ones, and skip all the others
     ####################################################################################################
+    edges = []  # all edges of interest (and all regular edges) in the order of their appearance in the connected component
+    vertices_with_irregular_edges = set()
     for bgedge, key in cc.edges(keys=True):
+        if not bgedge.is_irregular_edge:
+            edges.append((bgedge, key))
+            continue
         ####################################################################################################
         # infinity edges must fully contain target multicolor
         ####################################################################################################
-        if bgedge.is_irregular_edge and not target_multicolor <= bgedge.multicolor:
-            if verbose:
-                print("  removing", bgedge.vertex1.name, "--", bgedge.vertex2.name,
-                      [color.name for color in bgedge.multicolor.multicolors.elements()], ": no target multicolor",
-                      file=verbose_destination)
-            to_remove.append((bgedge, key))
+        if not target_multicolor <= bgedge.multicolor:
+            if tracer is not None:
+                trace_removed_edge(tracer, bgedge, "no target multicolor")
             continue
         ####################################################################################################
         # infinity edges must not contain colors from the excluded group
         ####################################################################################################
-        if bgedge.is_irregular_edge and any(map(lambda color: color in bgedge.multicolor.colors, exclude)):
-            if verbose:
-                print("  removing", bgedge.vertex1.name, "--", bgedge.vertex2.name,
-                      [color.name for color in bgedge.multicolor.multicolors.elements()],
-                      ": contains exclude multicolor", file=verbose_destination)
-            to_remove.append((bgedge, key))
+        if any(map(lambda color: color in bgedge.multicolor.colors, exclude)):
+            if tracer is not None:
+                trace_removed_edge(tracer, bgedge, "contains exclude multicolor")
             continue
         ####################################################################################################
         # in infinity edge multicolor all colors from targetted multicolor must have multiplicity one
         ####################################################################################################
-        if bgedge.is_irregular_edge and any(map(lambda color: bgedge.multicolor.multicolors[color] > 1, target_multicolor.colors)):
-            if verbose:
-                print("  removing", bgedge.vertex1.name, "--", bgedge.vertex2.name,
-                      [color.name for color in bgedge.multicolor.multicolors.elements()],
-                      ": multicplicity of some target multicolor os greater than 1", file=verbose_destination)
-            to_remove.append((bgedge, key))
+        if any(map(lambda color: bgedge.multicolor.multicolors[color] > 1, target_multicolor.colors)):
+            if tracer is not None:
+                trace_removed_edge(tracer, bgedge, "multiplicity of some target color is greater than 1")
             continue
-            ####################################################################################################
-
-    ##########################################################################################################
-    # once we've gathered all uninteresting / ambiguous (from target multicolor scaffolding stand point) irregular edges
-    #   we remove them
-    ##########################################################################################################
-    for bgedge, key in to_remove:
-        cc.delete_bgedge(bgedge, key)
-    if verbose:
-        print("Graph contains", len(list(cc.edges())), "edges", file=verbose_destination)
+        edges.append((bgedge, key))
+        vertices_with_irregular_edges.add(bgedge.vertex1)
+        vertices_with_irregular_edges.add(bgedge.vertex2)
 
-    to_remove = []
     ################################################################################
     # after we have left only those infinity edges are of interesting for the scaffolding purposses
     # we filter regular edges to leave only those, that are supporting these infinity edges
+    # (have infinity edges, that were left during the previous step, at both vertices, that they are incident to)
     ################################################################################
-    if verbose:
-        print("Removing uninteresting regular edges", file=verbose_destination)
-    for bgedge, key in cc.edges(keys=True):
-        ################################################################################
-        # we only need edges that are either infinity edges, that were left during the presious step
-        # or support edges (have infinity edges at both vertices, that they are incident to)
-        ################################################################################
-        if not bgedge.is_irregular_edge and not supports_a_pair_of_irregular_edges(cc, bgedge):
-            if verbose:
-                print("  removing", bgedge.vertex1.name, "--", bgedge.vertex2.name,
-                      [color.name for color in bgedge.multicolor.multicolors.elements()],
-                      ": does not support any irregular edge", file=verbose_destination)
-            to_remove.append((bgedge, key))
+    mask = MaskedBreakpointGraph()
+    for bgedge, key in edges:
+        if bgedge.is_irregular_edge:
+            mask.add_bgedge(bgedge, key)
+        elif bgedge.vertex1 in vertices_with_irregular_edges and bgedge.vertex2 in vertices_with_irregular_edges:
+            mask.add_bgedge(bgedge, key)
+        elif tracer is not None:
+            trace_removed_edge(tracer, bgedge, "does not support any irregular edge")
 
     ##########################################################################################################
-    # once we've gathered all regular edges, that do not support pairs of interesting (from scaffolding stand point)
-    #   irregular edges
-    ##########################################################################################################
-    for bgedge, key in to_remove:
-        cc.delete_bgedge(bgedge, key)
-    if verbose:
-        print("Graph contains", len(list(cc.edges())), "edges", file=verbose_destination)
-
-    ##########################################################################################################
-    # once we've deleted all the uninteresting for scaffolding purposes infinity and regular edges,
+    # once we've skipped all the uninteresting for scaffolding purposes infinity and regular edges,
     #   our connected component
     # is being torn apart into multiple connected components, each of which we can process independently
     # and which contain only edges of interest for us
     ##########################################################################################################
+    return list(mask.connected_components_subgraphs(copy=False))
+
+
+def get_subnet_assemblies(graph, subnet, bgtree, target_multicolor, offset, threshold,
+                          verbose=False, verbose_destination=None, encoder=None, vertex_index=None, tracer=None):
+    """
+    Identifies assembly points in a single irregular subnet, by computing a maximum weight matching on its support edges
+        subnets are independent of each other, so this function is called for them in any order, or in parallel
+    """
+    supporting_edge_scores = get_support_edge_scores(graph, subnet, target_multicolor, bgtree, encoder=encoder,
+                                                     vertex_index=vertex_index, tracer=tracer)
+
+    # we collect weighted support edges for the purpose of computing maximum weight matching on them
+    matching_edges = []
+    if verbose:
+        print("\tcontains", len(supporting_edge_scores), "possible assembly points", file=verbose_destination)
+
+    # we'll keep track of possible assembly points for future reference
+    support_edge_dict = {}
+    for (v1, v2), before, after, support_mask in supporting_edge_scores:
+        ##########################################################################################
+        #
+        # INSERT YOUR CODE ASSEMBLY SCORE THRESHOLD FILTRATION HERE IF NEED BE
+        #
+        ##########################################################################################
+        if before - after - offset < threshold:
+            continue
+        ##########################################################################################
+        #
+        # by default networkx assumes all edges, that have weight >= 0 are good
+        #
+        ##########################################################################################
+        matching_edges.append((v1, v2, before - after - offset))
+        support_edge_dict[(v1, v2)] = (before, after + offset, support_mask)
+        support_edge_dict[(v2, v1)] = (before, after + offset, support_mask)
+
+    # trivial instances (disjoint edges, paths and cycles) are solved directly,
+    #   and only ambiguous ones are passed to the general networkx algorithm
+    maximal_matching = get_max_weight_matching(matching_edges)
+
+    if verbose:
+        print("\t", len(maximal_matching) // 2, "assembly points are identified", file=verbose_destination)
+
+    # as networkx provides a maximum matching in a form of adjacency list, every identified edge
+    #   (pair of vertices) is present their twice (i.e. matching[v1]=v2 and matching[v2]=v1)
+    #   we need to make sure we only add every edge only once
     result = []
-    for cc in cc.connected_components_subgraphs(copy=False):
-        if len(list(cc.edges())) > 0:
-            result.append(cc)
+    visited = set()
+    for v1, v2 in maximal_matching.items():
+        if v1 in visited or v2 in visited:
+            continue
+        visited.add(v1)
+        visited.add(v2)
+        result.append((v1, v2, support_edge_dict[(v1, v2)]))
+        if tracer is not None and (tracer.is_sampled(v1.name) or tracer.is_sampled(v2.name)):
+            before, after, _ = support_edge_dict[(v1, v2)]
+            tracer.write("assembly_point", v1=v1.name, v2=v2.name, before=before, after=after,
+                         target=sorted(color.name for color in target_multicolor.colors))
     return result
 
 
-def identify_assembly_points(graph, bgtree, target_multicolor, exclude=None, verbose=False, verbose_destination=None):
+def identify_assembly_points(graph, bgtree, target_multicolor, exclude=None, verbose=False, verbose_destination=None,
+                             by_component=False, speculative_assemblies=None, touched_vertices=None,
+                             executor=None, batch_size=DEFAULT_SUBNETS_BATCH_SIZE, encoder=None, vertex_index=None,
+                             components=None, tracer=None):
     """
     The main granular assembling function, that IDENTIFIES assembly points, but does not perform the assembly on its own
     It DOES NOT change the supplied breakpoint graph in any way!!!
+    If by_component is specified, the result is a list of pairs (connected component, assembly points identified in it)
+    If speculative_assemblies (see identify_speculatively) are supplied, they are reused for every connected component,
+        that has no vertices in touched_vertices, and only the rest of connected components is processed
+    If executor is supplied, irregular subnets are processed on it in batches of at least batch_size edges
+        (verbose output for every subnet is omitted in such case)
+    If encoder (see MulticolorEncoder) is supplied, it is reused for scoring, otherwise a new one is created from the tree
+    If vertex_index (see VertexIndex) of the graph is supplied, it is used for scoring,
+        unless subnets are processed on executor, where lazy indices over subnets neighbourhoods are used instead
+    If components (connected components of the graph, see ComponentsTracker) are supplied, they are used,
+        instead of being computed from the graph
+    If tracer (see Tracer) is supplied, diagnostics for sampled vertices are written to it
+        (unless subnets are processed on executor, as a tracer is never passed to worker processes)
     """
+    if encoder is None:
+        encoder = MulticolorEncoder(bgtree)
     if verbose:
         print(">>Identifying assemblies for target multicolor:",
               [e.name for e in target_multicolor.multicolors.elements()], file=verbose_destination)
 
-    guidance = bgtree.consistent_multicolors[:]
-    offset = len(Multicolor.split_colors(target_multicolor, guidance=guidance,
-                                         account_for_color_multiplicity_in_guidance=False)) - 1
+    offset = encoder.get_split_count(encoder.encode(target_multicolor)) - 1
 
     threshold = 1 if offset == 0 else 2
-    assemblies = []  # the overall result
+    components_assemblies = []  # pairs (connected component, assembly points identified in it)
     if exclude is None:
         exclude = []  # a container with single colors of genomes, that are to be considered fully assembled
 
-    p_t_consistent_multicolors_in_target = Multicolor.split_colors(target_multicolor, guidance=guidance,
-                                                                   account_for_color_multiplicity_in_guidance=False)
-    t_consistent_multicolors_in_target = []
-    for tcmc in p_t_consistent_multicolors_in_target:
-        t_consistent_multicolors_in_target.append(sorted(color.name for color in tcmc.colors))
+    if tracer is not None:
+        # tree consistent multicolors, that the target multicolor is split into
+        p_t_consistent_multicolors_in_target = Multicolor.split_colors(target_multicolor,
+                                                                       guidance=bgtree.consistent_multicolors,
+                                                                       account_for_color_multiplicity_in_guidance=False)
+        tracer.write("target", target=sorted(color.name for color in target_multicolor.colors),
+                     tcmc=[sorted(color.name for color in tcmc.colors) for tcmc in p_t_consistent_multicolors_in_target])
+
+    # pairs (assembly points of a connected component, irregular subnet in it), that are yet to be processed
+    subnets = []
     # we work with each connected component separately, as connected components usually preserve fragmentation points
     ################################################################################################
     #
-    # its important that we iterate over connected components making each particular one a deepcopy of an
-    #   underlying breakpoint graph connected component
+    # connected components are not copied, as they are only read during the filtration,
+    #   and subnets are returned as read-only views over edges of interest
     #
     ################################################################################################
-    for i, cc in enumerate(graph.connected_components_subgraphs(copy=True)):
+    if components is None:
+        components = graph.connected_components_subgraphs(copy=False)
+    for i, cc in enumerate(components):
+
+        # speculatively identified assembly points are valid for connected components, that were not touched since then
+        if speculative_assemblies is not None:
+            component_assemblies = get_speculative_assemblies(cc, speculative_assemblies, touched_vertices)
+            if component_assemblies is not None:
+                components_assemblies.append((cc, component_assemblies))
+                continue
 
         # we filter current connected component of uninteresting / ambiguous edges and retrieve a list of
         #   connected components that are left in the original connected components after filtration
-        irregular_subnets = get_irregular_subnets(cc, target_multicolor, exclude)
+        irregular_subnets = get_irregular_subnets(cc, target_multicolor, exclude, tracer=tracer)
 
         if len(irregular_subnets) > 0 and verbose:
             print(">>Processing", str(i) + "th", "connected component", file=verbose_destination)
             print("\tcontains", len(irregular_subnets), "subnet groups", file=verbose_destination)
 
         # each subnet can be processed separately
+        component_assemblies = []
+        components_assemblies.append((cc, component_assemblies))
         for subnet in irregular_subnets:
-
-            supporting_edge_scores = get_support_edge_scores(graph, subnet, target_multicolor, bgtree)
-
-            # we create a new dummy graph for the purpose of computing maximum weight matching for support edges in it
-            new_graph = nx.Graph()
-            if verbose:
-                print("\tcontains", len(supporting_edge_scores), "possible assembly points", file=verbose_destination)
-
-            # we'll keep track of possible assembly points for future reference
-            support_edge_dict = {}
-            for (v1, v2), before, after, ex_data in supporting_edge_scores:
-                ex_data["tcmc"] = t_consistent_multicolors_in_target
-                ##########################################################################################
-                #
-                # INSERT YOUR CODE ASSEMBLY SCORE THRESHOLD FILTRATION HERE IF NEED BE
-                #
-                ##########################################################################################
-                if before - after - offset < threshold:
-                    continue
-                ##########################################################################################
-                #
-                # by default networkx assumes all edges, that have weight >= 0 are good
-                #
-                ##########################################################################################
-                new_graph.add_edge(v1, v2, weight=before - after - offset)
-                support_edge_dict[(v1, v2)] = (before, after + offset, ex_data)
-                support_edge_dict[(v2, v1)] = (before, after + offset, ex_data)
-
-            maximal_matching = nx.max_weight_matching(new_graph)
-
-            if verbose:
-                print("\t", len(maximal_matching) // 2, "assembly points are identified", file=verbose_destination)
-
-            # as networkx provides a maximum matching in a form of adjacency list, every identified edge
-            #   (pair of vertices) is present their twice (i.e. matching[v1]=v2 and matching[v2]=v1)
-            #   we need to make sure we only add every edge only once
-            visited = set()
-            for v1, v2 in maximal_matching.items():
-                if v1 in visited or v2 in visited:
-                    continue
-                visited.add(v1)
-                visited.add(v2)
-                assemblies.append((v1, v2, support_edge_dict[(v1, v2)]))
+            subnets.append((component_assemblies, subnet))
+
+    process_subnet = functools.partial(get_subnet_assemblies, bgtree=bgtree, target_multicolor=target_multicolor,
+                                       offset=offset, threshold=threshold,
+                                       verbose=verbose and executor is None,
+                                       verbose_destination=verbose_destination if executor is None else None,
+                                       encoder=encoder, vertex_index=vertex_index if executor is None else None,
+                                       tracer=tracer if executor is None else None)
+    subnets_assemblies = process_subnets(graph, [subnet for _, subnet in subnets], process_subnet,
+                                         executor=executor, batch_size=batch_size)
+    for (component_assemblies, _), subnet_assemblies in zip(subnets, subnets_assemblies):
+        component_assemblies.extend(subnet_assemblies)
 
     # we return the result as a list of assembly points that were identified for the targeted multicolor
-    # as a list of tuples (v1, v2, ("before", "after"))
+    # as a list of tuples (v1, v2, ("before", "after", support mask))
     # where v1 and v2 correspond to assembly point and "before" and "after" are used to compute the assembly score
-    return assemblies
+    # and support mask is a bitmask of the support edge multicolor (see MulticolorEncoder)
+    if by_component:
+        return components_assemblies
+    return [assembly for _, component_assemblies in components_assemblies for assembly in component_assemblies]
 
 
-def assemble_points(graph, assemblies, multicolor, verbose=False, verbose_destination=None):
+def assemble_points(graph, assemblies, multicolor, verbose=False, verbose_destination=None, touched_vertices=None,
+                    vertex_index=None, components_tracker=None):
     """
     This function actually does assembling being provided
         a graph, to play with
         a list of assembly points
         and a multicolor, which to assemble
+    If touched_vertices set is supplied, all vertices, which edges are changed by assembling, are added to it
+    If vertex_index (see VertexIndex) is supplied, irregular edges are looked up in it,
+        and its entries for all vertices, which edges are changed by assembling, are updated
+    If components_tracker (see ComponentsTracker) is supplied, all such vertices are reported to it
     """
     if verbose:
         print(">>Assembling for multicolor", [e.name for e in multicolor.multicolors.elements()],
               file=verbose_destination)
     for assembly in assemblies:
-        v1, v2, (before, after, ex_data) = assembly
-        iv1 = get_irregular_vertex(get_irregular_edge_by_vertex(graph, vertex=v1))
-        iv2 = get_irregular_vertex(get_irregular_edge_by_vertex(graph, vertex=v2))
+        v1, v2, (before, after, _) = assembly
+        if vertex_index is not None:
+            iv1 = get_irregular_vertex(vertex_index.get_irregular_edge(v1))
+            iv2 = get_irregular_vertex(vertex_index.get_irregular_edge(v2))
+        else:
+            iv1 = get_irregular_vertex(get_irregular_edge_by_vertex(graph, vertex=v1))
+            iv2 = get_irregular_vertex(get_irregular_edge_by_vertex(graph, vertex=v2))
         kbreak = KBreak(start_edges=[(v1, iv1), (v2, iv2)],
                         result_edges=[(v1, v2), (iv1, iv2)],
                         multicolor=multicolor)
+        if touched_vertices is not None:
+            touched_vertices.update((v1, v2, iv1, iv2))
         if verbose:
             print("(", v1.name, ",", iv1.name, ")x(", v2.name, ",", iv2.name, ")", " score=", before - after, sep="",
                   file=verbose_destination)
         graph.apply_kbreak(kbreak=kbreak, merge=True)
+        if vertex_index is not None:
+            vertex_index.update((v1, v2, iv1, iv2))
+        if components_tracker is not None:
+            components_tracker.update((v1, v2, iv1, iv2))
 
 
-def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=False, verbose_destination=None):
+def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=False, verbose_destination=None,
+                       speculative=False, parallel=False, max_workers=None, batch_size=DEFAULT_SUBNETS_BATCH_SIZE,
+                       scores_cache_size=DEFAULT_SCORES_CACHE_SIZE, tracer=None, writer=None, support_columns=False):
+    """
+    Iteratively identifies and performs assemblies for all tree consistent target multicolors
+        If speculative is specified, assembly points for all target multicolors are identified in parallel
+        (on max_workers processes) against the original graph, and are then committed in the regular order.
+        Only connected components, that were touched by preceding assemblies, are processed again,
+        so the result is exactly the same, as in the regular mode
+        If parallel is specified, irregular subnets are processed on max_workers processes in batches of
+        at least batch_size edges
+    All multicolors are encoded as bitmasks for scoring purposes with a single color <-> bit index for the whole run
+        and their scores are cached for the whole run as well, in a cache of at most scores_cache_size entries
+    Irregular edges and surrounding multicolors of vertices are indexed once (see VertexIndex),
+        and the index is updated, as assemblies are performed
+    Connected components are computed once as well (see ComponentsTracker),
+        and only components, that were changed by assembling, are recomputed
+    If tracer (see Tracer) is supplied, diagnostics of identification for sampled vertices are written to it
+    If writer (see AssemblyPointsWriter) is supplied, assembly points are written to it (a line per genome),
+        as soon as they are committed for every target multicolor, instead of being accumulated in the result
+        if support_columns is specified, every line is extended with colors of the target multicolor,
+        that are present on the support edge of the assembly point, and with tree consistent multicolors,
+        that the target multicolor is split into
+    """
     overall_assembling_result = []
+    encoder = MulticolorEncoder(bgtree, cache_size=scores_cache_size)
 
     # all genomes stacked up together
     overall_target_multicolor = Multicolor(*target_organisms)
@@ -439,54 +451,67 @@ def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=Fa
               len(tree_consistent_target_multicolors), "T-consistent sets:", file=verbose_destination)
         for multicolor in tree_consistent_target_multicolors:
             print("\t", [color.name for color in multicolor.multicolors.elements()], file=verbose_destination)
-        print("Expanding target multicolors to include all T-consistent subcolors")
+        print("Expanding target multicolors to include all T-consistent subcolors", file=verbose_destination)
 
     # now we need to expand that list into a larger list to include every possible tree consistent sub-color,
-    #   of whatever is already in the list
+    #   of whatever is already in the list, and every union of pairwise disjoint multicolors from the expanded list
     #
-    # we will change it as we go, so better iterate over a copy
-    for target_multicolor in tree_consistent_target_multicolors[:]:
-        for tree_c_multicolor in deepcopy(bgtree.consistent_multicolors):
-            if tree_c_multicolor <= target_multicolor \
-                    and tree_c_multicolor not in tree_consistent_target_multicolors \
-                    and len(tree_c_multicolor.colors) > 0:
-                tree_consistent_target_multicolors.append(tree_c_multicolor)
-
-    tree_consistent_target_multicolors = sorted(tree_consistent_target_multicolors,
-                                                key=lambda mc: len(mc.hashable_representation),
-                                                reverse=True)
-
-    all_target_multicolors = tree_consistent_target_multicolors[:]
-    for i in range(2, len(tree_consistent_target_multicolors) + 1):
-        for comb in itertools.combinations(tree_consistent_target_multicolors[:], i):
-            comb = list(comb)
-            for mc1, mc2 in itertools.combinations(comb, 2):
-                if len(mc1.intersect(mc2).colors) > 0:
-                    break
-            else:
-                new_mc = Multicolor()
-                for mc in comb:
-                    new_mc += mc
-                all_target_multicolors.append(new_mc)
-    hashed_vertex_tree_consistent_multicolors = {mc.hashable_representation for mc in all_target_multicolors}
-    all_target_multicolors = [Multicolor(*hashed_multicolor) for hashed_multicolor in
-                              hashed_vertex_tree_consistent_multicolors]
-    all_target_multicolors = sorted(all_target_multicolors,
-                                    key=lambda mc: len(mc.hashable_representation),
-                                    reverse=True)
+    # unions are generated directly on bitmasks, every distinct one exactly once, and the largest ones go first
+    all_target_multicolors = [Multicolor(*encoder.decode(mask))
+                              for mask in get_target_masks(encoder, tree_consistent_target_multicolors)]
     if verbose:
         print("Determined full list of targeted for scaffolding multicolors of length",
               len(all_target_multicolors), file=verbose_destination)
         for multicolor in all_target_multicolors:
             print("\t", [color.name for color in multicolor.multicolors.elements()], file=verbose_destination)
-    for i, multicolor in enumerate(all_target_multicolors):
-        print("working with multicolor", i)
-        assembly_points = identify_assembly_points(graph, bgtree, target_multicolor=multicolor, exclude=exclude,
-                                                   verbose_destination=verbose_destination)
-        for v1, v2, (before, after, ex_data) in assembly_points:
-            overall_assembling_result.append((v1, v2, (before, after, ex_data), multicolor))
-        assemble_points(graph, assemblies=assembly_points, multicolor=multicolor,
-                        verbose_destination=verbose_destination)
+    speculative_results = None
+    touched_vertices = set()
+    if speculative:
+        identify_components = functools.partial(identify_assembly_points, bgtree=bgtree, exclude=exclude, by_component=True,
+                                                encoder=encoder)
+        speculative_results = identify_speculatively(graph, all_target_multicolors, identify_components,
+                                                     max_workers=max_workers)
+    vertex_index = VertexIndex(graph, encoder)
+    components_tracker = ComponentsTracker(graph)
+    executor = ProcessPoolExecutor(max_workers=max_workers) if parallel else None
+    try:
+        for i, multicolor in enumerate(all_target_multicolors):
+            if verbose:
+                print("Working with multicolor", i, file=verbose_destination)
+            assembly_points = identify_assembly_points(graph, bgtree, target_multicolor=multicolor, exclude=exclude,
+                                                       verbose_destination=verbose_destination,
+                                                       speculative_assemblies=speculative_results[i] if speculative else None,
+                                                       touched_vertices=touched_vertices,
+                                                       executor=executor, batch_size=batch_size, encoder=encoder,
+                                                       vertex_index=vertex_index,
+                                                       components=components_tracker.get_components(),
+                                                       tracer=tracer)
+            if writer is not None:
+                support_fields = ()
+                if support_columns:
+                    target_mask = encoder.encode(multicolor)
+                    t_consistent_multicolors_in_target = [
+                        sorted(color.name for color in tcmc.colors)
+                        for tcmc in Multicolor.split_colors(multicolor, guidance=bgtree.consistent_multicolors,
+                                                            account_for_color_multiplicity_in_guidance=False)]
+                for v1, v2, (before, after, support_mask) in assembly_points:
+                    if support_columns:
+                        support_fields = (encoder.get_names(target_mask & support_mask), t_consistent_multicolors_in_target)
+                    for color in multicolor.colors:
+                        writer.write(color.name, color.name, before - after, v1.name, v2.name, *support_fields)
+                writer.flush()
+            else:
+                for v1, v2, (before, after, support_mask) in assembly_points:
+                    overall_assembling_result.append((v1, v2, (before, after, support_mask), multicolor))
+            assemble_points(graph, assemblies=assembly_points, multicolor=multicolor,
+                            verbose_destination=verbose_destination,
+                            touched_vertices=touched_vertices if speculative else None, vertex_index=vertex_index,
+                            components_tracker=components_tracker)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if verbose:
+        print("Multicolor scores cache statistics:", encoder.get_cache_stats(), file=verbose_destination)
     return overall_assembling_result
 
 
@@ -512,6 +537,13 @@ FULL_SOURCE_DIR = os.path.join(DATA_SOURCE_ROOT_DIR, DATA_SOURCE_REL_DIR, DATA_T
 SOURCE_GRIMM_FILES = [os.path.join(FULL_SOURCE_DIR, file) for file in os.listdir(FULL_SOURCE_DIR) if file.endswith(".grimm")]
 
 GRIMM_FILES = SOURCE_GRIMM_FILES
+INPUTS_CACHE_DIR = FULL_SOURCE_DIR
+TRACE_FILE = None  # a path to a JSON lines file for diagnostics of identification (see Tracer), tracing is off if None
+TRACE_SAMPLE_RATE = 0.01
+ASSEMBLY_POINTS_DIR = "."
+ASSEMBLY_POINTS_FILE = "assemblies.txt"
+# assemblies.txt lines are extended with the target support and the T-consistent split of the target multicolor
+ASSEMBLY_POINTS_SUPPORT_COLUMNS = True
 F_NEWICK_STRING_TREE = "((((((fugu,Stickleback),Medaka),Tetraodon),zebra_fish),Coelacanth),Anguilla_japonica);"
 NEWICK_STRING_TREE = "(vvi,(ptr,(egr,(cpa,(tpa,(cru,(ath,aly)))))));"
 F_TARGET_ORGANISM_NAMES = ["Anguilla_japonica", "Coelacanth", "fugu", "Medaka"]
@@ -526,27 +558,29 @@ F_COMPLETE_ORGANISM_NAMES = ["Stickleback", "Tetraodon"]
 ################################################################################################################
 
 if __name__ == "__main__":
-    print("Reading data into breakpoint graph...")
-    graph = BreakpointGraph()
-    for file in GRIMM_FILES:
-        with open(file, "rt") as source:
-            graph.update(GRIMMReader.get_breakpoint_graph(source), merge_edges=True)
-
-    print("Getting a tree...")
-    bgtree = NewickReader.from_string(NEWICK_STRING_TREE)
+    print("Reading data into breakpoint graph and getting a tree...")
+    # parsed inputs are cached in a binary form, and are reused, until any of the GRIMM files changes
+    # otherwise files are streamed in chunks, that are parsed in parallel into partial graphs, and merged afterwards
+    with ProcessPoolExecutor() as executor:
+        graph, bgtree = read_cached_inputs(INPUTS_CACHE_DIR, GRIMM_FILES, NEWICK_STRING_TREE, executor=executor,
+                                           verbose=True)
 
     print("Preparing organisms for assembling...")
     target_organisms = [BGGenome(organism) for organism in TARGET_ORGANISM_NAMES]
     exclude = [BGGenome(organism) for organism in COMPLETE_ORGANISM_NAMES]
 
     print("Staring the assembly process...")
-    result = assemble_scaffolds(graph=graph, bgtree=bgtree, target_organisms=target_organisms, exclude=exclude,
-                                verbose=True)
+    trace_destination = open(TRACE_FILE, "wt") if TRACE_FILE is not None else None
+    try:
+        tracer = Tracer(trace_destination, sample_rate=TRACE_SAMPLE_RATE) if trace_destination is not None else None
+        # assembly points are written out, as they are committed, into an overall file and into per genome files
+        with AssemblyPointsWriter(ASSEMBLY_POINTS_DIR, ASSEMBLY_POINTS_FILE) as writer:
+            assemble_scaffolds(graph=graph, bgtree=bgtree, target_organisms=target_organisms, exclude=exclude,
+                               verbose=True, tracer=tracer, writer=writer,
+                               support_columns=ASSEMBLY_POINTS_SUPPORT_COLUMNS)
+    finally:
+        if trace_destination is not None:
+            trace_destination.close()
     print("Finished assembling!")
-    print("Were identified", sum([len(multicolor.colors) for _, _, (_, _, ex_data), multicolor in result]), "assembly points")
-
-    with open("assemblies.txt", "wt") as destination:
-        for v1, v2, (before, after, ex_data), multicolor in result:
-            for color in multicolor.colors:
-                print(color.name, before - after, v1.name, v2.name, ex_data["s_support"], ex_data["tcmc"])
+    print("Were identified", writer.count, "assembly points")
 
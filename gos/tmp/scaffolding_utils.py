@@ -0,0 +1,1064 @@
+# -*- coding: utf-8 -*-
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sys
+import tempfile
+import zlib
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+from bg import BreakpointGraph, GRIMMReader, NewickReader
+
+try:
+    import numpy as np
+except ImportError:  # batch scoring falls back to processing multicolors one by one
+    np = None
+
+from gos.configuration import Configuration
+from gos.utils.files import replace_file
+
+__author__ = "Sergey Aganezov"
+__email__ = "aganezov(at)gwu.edu"
+
+
+################################################################################################################
+#
+# START OF supporting infrastructure, that is shared by scaffolding scripts
+#
+################################################################################################################
+
+class MaskedBreakpointGraph(object):
+    """
+    A read-only view over a breakpoint graph, that exposes only a subset (a mask) of its edges
+        it mimics the part of the BreakpointGraph interface, that is utilized by the scaffolding functions,
+        so that filtering of uninteresting edges is performed by skipping them, rather than by deep copying
+        a connected component and deleting edges from the copy
+    Edges are stored as pairs (bgedge, key), exactly as they are yielded by BreakpointGraph.edges(keys=True),
+        and are never changed by the view
+    """
+
+    def __init__(self, edges=None):
+        self._edges = []
+        self._adjacency = defaultdict(list)
+        for bgedge, key in edges or []:
+            self.add_bgedge(bgedge, key)
+
+    def add_bgedge(self, bgedge, key):
+        self._edges.append((bgedge, key))
+        self._adjacency[bgedge.vertex1].append((bgedge, key))
+        if bgedge.vertex2 != bgedge.vertex1:
+            self._adjacency[bgedge.vertex2].append((bgedge, key))
+
+    def edges(self, keys=False):
+        for bgedge, key in self._edges:
+            if keys:
+                yield bgedge, key
+            else:
+                yield bgedge
+
+    def nodes(self):
+        return iter(self._adjacency)
+
+    def get_edges_by_vertex(self, vertex, keys=False):
+        for bgedge, key in self._adjacency.get(vertex, []):
+            if keys:
+                yield bgedge, key
+            else:
+                yield bgedge
+
+    def __len__(self):
+        return len(self._edges)
+
+    def get_edge_by_two_vertices(self, vertex1, vertex2):
+        for bgedge in self.get_edges_by_vertex(vertex1):
+            if bgedge.vertex2 == vertex2 or (bgedge.vertex1 == vertex2 and bgedge.vertex2 == vertex1):
+                return bgedge
+        return None
+
+    def connected_components_subgraphs(self, copy=False):
+        """
+        Splits the view into connected components, each of which is a new view over the same edges (in the same order)
+            copy argument is accepted only for interface compatibility, as edges are never copied
+        """
+        components = {}
+        result = []
+        for start in self._adjacency:
+            if start in components:
+                continue
+            component_index = len(result)
+            result.append(MaskedBreakpointGraph())
+            components[start] = component_index
+            stack = [start]
+            while stack:
+                vertex = stack.pop()
+                for bgedge, key in self._adjacency[vertex]:
+                    for neighbour in (bgedge.vertex1, bgedge.vertex2):
+                        if neighbour not in components:
+                            components[neighbour] = component_index
+                            stack.append(neighbour)
+        for bgedge, key in self._edges:
+            result[components[bgedge.vertex1]].add_bgedge(bgedge, key)
+        return iter(result)
+
+
+def get_neighbourhood(graph, vertices):
+    """
+    Creates a view, that contains all edges of supplied graph, that are incident to any of supplied vertices
+        for supplied vertices it can be used instead of the whole graph, when their surroundings are examined
+    """
+    result = MaskedBreakpointGraph()
+    added = set()
+    for vertex in vertices:
+        for bgedge, key in graph.get_edges_by_vertex(vertex, keys=True):
+            edge_id = frozenset((bgedge.vertex1, bgedge.vertex2)), key
+            if edge_id not in added:
+                added.add(edge_id)
+                result.add_bgedge(bgedge, key)
+    return result
+
+
+class ComponentsTracker(object):
+    """
+    Keeps connected components of a breakpoint graph up to date, as the graph is changed
+        components are computed once, and after vertices, which incident edges were changed, are reported with update,
+        only components, that contain them (and components, that got connected to those), are recomputed
+        on the next get_components call, while all other components are reused as they are
+    Recomputed components are read-only views (see get_neighbourhood) over the graph
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.components = OrderedDict()  # component id -> (component, its vertices), in order of their appearance
+        self.vertices_components = {}  # vertex -> component id
+        self.next_id = 0
+        self.touched_vertices = OrderedDict()  # an ordered set of vertices, which edges were changed since the last refresh
+        for cc in graph.connected_components_subgraphs(copy=False):
+            self.add_component(cc, list(cc.nodes()))
+
+    def add_component(self, cc, vertices):
+        self.components[self.next_id] = cc, vertices
+        for vertex in vertices:
+            self.vertices_components[vertex] = self.next_id
+        self.next_id += 1
+
+    def update(self, vertices):
+        for vertex in vertices:
+            self.touched_vertices[vertex] = True
+
+    def get_components(self):
+        if len(self.touched_vertices) > 0:
+            self.refresh()
+        return [cc for cc, _ in self.components.values()]
+
+    def refresh(self):
+        dirty_ids = {self.vertices_components[vertex] for vertex in self.touched_vertices if vertex in self.vertices_components}
+        seeds = list(self.touched_vertices)
+        for component_id in sorted(dirty_ids):
+            seeds.extend(self.components[component_id][1])
+        self.touched_vertices = OrderedDict()
+        visited = set()
+        new_components = []
+        for seed in seeds:
+            if seed in visited:
+                continue
+            visited.add(seed)
+            component_vertices = []
+            has_edges = False
+            queue = deque([seed])
+            while len(queue) > 0:
+                vertex = queue.popleft()
+                component_vertices.append(vertex)
+                for bgedge in self.graph.get_edges_by_vertex(vertex):
+                    has_edges = True
+                    neighbour = bgedge.vertex2 if bgedge.vertex1 == vertex else bgedge.vertex1
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        queue.append(neighbour)
+                        # a clean component, that got connected to a dirty one, is absorbed by the recomputed one
+                        if neighbour in self.vertices_components:
+                            dirty_ids.add(self.vertices_components[neighbour])
+            # vertices, that were left without edges, are removed from the graph by assembling
+            if has_edges:
+                new_components.append(component_vertices)
+        for component_id in dirty_ids:
+            _, vertices = self.components.pop(component_id)
+            for vertex in vertices:
+                if self.vertices_components.get(vertex) == component_id:
+                    del self.vertices_components[vertex]
+        for component_vertices in new_components:
+            self.add_component(get_neighbourhood(self.graph, component_vertices), component_vertices)
+
+
+################################################################################################################
+#
+# bitset encoding of multicolors for scoring
+#
+################################################################################################################
+
+DEFAULT_SCORES_CACHE_SIZE = 100000
+
+# bitmasks are vectorized as numpy uint64 arrays, so larger sets of colors are processed one by one
+MAX_VECTORIZED_COLORS = 64
+
+
+def get_bits_count(mask):
+    return bin(mask).count("1")
+
+
+class MulticolorEncoder(object):
+    """
+    Encodes sets of colors (genomes) as integer bitmasks, with a color <-> bit index, that is built once per run
+        all scoring computations are performed on multicolors, as if multiplicity of every color in them was one,
+        so set operations on bitmasks give exactly the same results, as respective Multicolor operations do:
+            a + b -> a | b, a - b -> a & ~b, a.intersect(b) -> a & b, a <= b -> a & b == a
+    Number of tree consistent multicolors, that a multicolor is split into
+        (as Multicolor.split_colors does with account_for_color_multiplicity_in_guidance=False),
+        is computed on bitmasks as well and is memoized in a cache of at most cache_size entries,
+        where least recently used entries are evicted first
+    A single encoder is meant to be shared by all target multicolors during the run, so that is its cache
+        (copies of the encoder, that are sent to worker processes, carry only the color <-> bit index and the guidance,
+        and start with empty caches of their own, so that a payload of every task does not grow as the cache warms up)
+    """
+
+    def __init__(self, tree, cache_size=DEFAULT_SCORES_CACHE_SIZE):
+        self.bits = {}
+        self.colors = []
+        guidance = []
+        for multicolor in tree.consistent_multicolors:
+            mask = self.encode(multicolor)
+            if mask != 0 and mask not in guidance:
+                guidance.append(mask)
+        # bigger multicolors are utilized first, as Multicolor.split_colors does
+        self.guidance = sorted(guidance, key=get_bits_count, reverse=True)
+        self.full_mask = max([0] + guidance, key=get_bits_count)
+        self.cache_size = cache_size
+        self.split_counts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_bit(self, color):
+        if color not in self.bits:
+            self.bits[color] = 1 << len(self.colors)
+            self.colors.append(color)
+        return self.bits[color]
+
+    def encode(self, multicolor):
+        mask = 0
+        for color in multicolor.multicolors:
+            mask |= self.bits[color] if color in self.bits else self.get_bit(color)
+        return mask
+
+    def decode(self, mask):
+        return [color for index, color in enumerate(self.colors) if mask >> index & 1]
+
+    def get_names(self, mask):
+        return sorted(color.name for color in self.decode(mask))
+
+    def get_split_count(self, mask):
+        """ Computes a number of tree consistent multicolors, that a multicolor encoded by supplied mask is split into """
+        if mask in self.split_counts:
+            self.hits += 1
+            self.split_counts.move_to_end(mask)
+            return self.split_counts[mask]
+        self.misses += 1
+        result, rest = 0, mask
+        # first guidance multicolors, that are fully present, are ripped off
+        for g_mask in self.guidance:
+            if g_mask & rest == g_mask:
+                result += 1
+                rest &= ~g_mask
+        # then guidance multicolors, that are partially present
+        for g_mask in self.guidance:
+            if g_mask & rest:
+                result += 1
+                rest &= ~g_mask
+        # and the rest is a single chunk on its own
+        if rest:
+            result += 1
+        self.split_counts[mask] = result
+        if len(self.split_counts) > self.cache_size:
+            self.split_counts.popitem(last=False)
+        return result
+
+    def is_vectorizable(self):
+        return np is not None and len(self.colors) <= MAX_VECTORIZED_COLORS
+
+    def get_split_counts(self, masks):
+        """
+        Same as get_split_count, but for a sequence of masks at once
+            masks, that are not cached yet, are processed all together with numpy vectorized operations (if available)
+        """
+        if not self.is_vectorizable():
+            return [self.get_split_count(mask) for mask in masks]
+        missing = [mask for mask in OrderedDict.fromkeys(masks) if mask not in self.split_counts]
+        computed = dict(zip(missing, get_split_counts_vectorized(missing, self.guidance)))
+        result = []
+        for mask in masks:
+            if mask in computed:
+                result.append(computed[mask])
+            else:
+                result.append(self.get_split_count(mask))
+        self.misses += len(missing)
+        self.hits += len(masks) - len(missing) - sum(1 for mask in masks if mask not in computed)
+        for mask in missing:
+            self.split_counts[mask] = computed[mask]
+            if len(self.split_counts) > self.cache_size:
+                self.split_counts.popitem(last=False)
+        return result
+
+    def get_cache_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.split_counts), "max_size": self.cache_size}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["split_counts"] = OrderedDict()
+        state["hits"] = 0
+        state["misses"] = 0
+        return state
+
+
+def get_disjoint_unions(masks):
+    """
+    Generates all distinct unions of pairwise disjoint bitmasks from supplied ones (including single bitmasks themselves)
+        every union is generated exactly once, by extending only previously generated unions, that are disjoint
+        with the next supplied bitmask, so the work is proportional to the number of distinct unions,
+        rather than to the number of all combinations of supplied bitmasks
+    """
+    result = []
+    generated = {0}
+    for mask in masks:
+        # unions, that are generated for current mask, contain it and thus are never extended with it
+        for union in [0] + result[:]:
+            if union & mask == 0 and union | mask not in generated:
+                generated.add(union | mask)
+                result.append(union | mask)
+    return result
+
+
+def get_target_masks(encoder, target_multicolors):
+    """
+    Expands supplied tree consistent target multicolors with all tree consistent multicolors, that are contained in them,
+        and then with all unions of pairwise disjoint multicolors among those (see get_disjoint_unions)
+    Result is a list of bitmasks (see MulticolorEncoder) sorted by the number of colors in them in descending order
+    """
+    target_masks = [encoder.encode(multicolor) for multicolor in target_multicolors]
+    expanded_masks = []
+    for target_mask in target_masks:
+        # encoder guidance consists of all non empty tree consistent multicolors
+        for mask in [target_mask] + encoder.guidance:
+            if mask != 0 and mask & target_mask == mask and mask not in expanded_masks:
+                expanded_masks.append(mask)
+    expanded_masks = sorted(expanded_masks, key=get_bits_count, reverse=True)
+    return sorted(get_disjoint_unions(expanded_masks), key=get_bits_count, reverse=True)
+
+
+def get_split_counts_vectorized(masks, guidance):
+    """
+    Vectorized version of MulticolorEncoder.get_split_count: every step of splitting is performed for all masks at once
+    """
+    rest = np.array(masks, dtype=np.uint64)
+    result = np.zeros(len(masks), dtype=np.int64)
+    for g_mask in guidance:
+        g_mask = np.uint64(g_mask)
+        present = (rest & g_mask) == g_mask
+        result += present
+        rest = np.where(present, rest & ~g_mask, rest)
+    for g_mask in guidance:
+        g_mask = np.uint64(g_mask)
+        result += (rest & g_mask) != 0
+        rest &= ~g_mask
+    result += rest != 0
+    return result.tolist()
+
+
+def _where(condition, value, default):
+    return value if condition else default
+
+
+def get_score_masks(full_mask, target_mask, surrounding1, surrounding2, irregular_mask1, irregular_mask2, support_mask,
+                    where=_where):
+    """
+    Computes multicolors, which split counts are summed up into "before" and "after" scores of a possible assembly point
+        with surroundings of its vertices, irregular multicolors at its vertices and a multicolor of its support edge
+    Works both on bitmasks (integers) and on numpy arrays of bitmasks, with numpy.where supplied as where
+    Returns a pair of triples of bitmasks: for the "before" score and for the "after" score
+    """
+    # complementary multicolors for each vertex (multicolors, that are not present in edges incident to respective vertices)
+    c_1 = full_mask & ~surrounding1
+    c_2 = full_mask & ~surrounding2
+    # their intersection correspond to multicolors, that are not present at both vertices
+    c = c_1 & c_2
+    # and these colors correspond to colors, that are lacking uniquely at each vertex
+    c_a = c_1 & ~c
+    c_b = c_2 & ~c
+    support_mask = where((support_mask & target_mask) == target_mask, support_mask & ~target_mask, support_mask)
+    return ((irregular_mask1 | c_a, irregular_mask2 | c_b, support_mask | c),
+            ((irregular_mask1 & ~target_mask) | c_a, (irregular_mask2 & ~target_mask) | c_b, support_mask | target_mask | c))
+
+
+def get_batch_scores(encoder, target_mask, surroundings1, surroundings2, irregular_masks1, irregular_masks2, support_masks):
+    """
+    Computes "before" and "after" scores for a batch of possible assembly points at once (see get_score_masks)
+        all arguments, except for the encoder and the target mask, are sequences of bitmasks with an entry per assembly point
+        with numpy available bitmask operations and split counts are computed over whole arrays,
+        otherwise assembly points are processed one by one
+    Returns a list of pairs (before, after)
+    """
+    columns = surroundings1, surroundings2, irregular_masks1, irregular_masks2, support_masks
+    if not encoder.is_vectorizable():
+        result = []
+        for masks in zip(*columns):
+            before_masks, after_masks = get_score_masks(encoder.full_mask, target_mask, *masks)
+            result.append((sum(map(encoder.get_split_count, before_masks)), sum(map(encoder.get_split_count, after_masks))))
+        return result
+    if len(support_masks) == 0:
+        return []
+    columns = [np.array(column, dtype=np.uint64) for column in columns]
+    before_masks, after_masks = get_score_masks(np.uint64(encoder.full_mask), np.uint64(target_mask), *columns, where=np.where)
+    counts = np.array(encoder.get_split_counts(np.concatenate(before_masks + after_masks).tolist()))
+    counts = counts.reshape(6, len(support_masks))
+    return list(zip(counts[:3].sum(axis=0).tolist(), counts[3:].sum(axis=0).tolist()))
+
+
+class VertexIndex(object):
+    """
+    An index over vertices of a breakpoint graph, that maps every vertex to
+        its surrounding multicolor (all colors of edges incident to it), encoded as a bitmask (see MulticolorEncoder)
+        and to a list of irregular edges incident to it
+    The index is built in a single pass over all edges of the graph. After the graph is changed,
+        only entries of vertices, which incident edges were changed, are to be refreshed with update
+    If lazy is specified, nothing is computed beforehand and every vertex is indexed on the first lookup,
+        which is suitable for a view on a small portion of a large graph
+    """
+
+    def __init__(self, graph, encoder, lazy=False):
+        self.graph = graph
+        self.encoder = encoder
+        self.lazy = lazy
+        self.surroundings = {}
+        self.irregular_edges = {}
+        if not lazy:
+            for edge in graph.edges():
+                for vertex in {edge.vertex1, edge.vertex2}:
+                    self.add_edge(vertex, edge)
+
+    def add_edge(self, vertex, edge):
+        self.surroundings[vertex] = self.surroundings.get(vertex, 0) | self.encoder.encode(edge.multicolor)
+        irregular_edges = self.irregular_edges.setdefault(vertex, [])
+        if edge.is_irregular_edge:
+            irregular_edges.append(edge)
+
+    def index_vertex(self, vertex):
+        self.surroundings.pop(vertex, None)
+        self.irregular_edges.pop(vertex, None)
+        for edge in self.graph.get_edges_by_vertex(vertex):
+            self.add_edge(vertex, edge)
+
+    def update(self, vertices):
+        """ Refreshes entries for supplied vertices from the current state of the graph """
+        for vertex in vertices:
+            self.index_vertex(vertex)
+
+    def get_surrounding_mask(self, vertex):
+        if self.lazy and vertex not in self.surroundings:
+            self.index_vertex(vertex)
+        return self.surroundings.get(vertex, 0)
+
+    def get_irregular_edges(self, vertex):
+        if self.lazy and vertex not in self.irregular_edges:
+            self.index_vertex(vertex)
+        return self.irregular_edges.get(vertex, [])
+
+    def get_irregular_edge(self, vertex):
+        irregular_edges = self.get_irregular_edges(vertex)
+        return irregular_edges[0] if len(irregular_edges) > 0 else None
+
+    def get_irregular_mask(self, vertex):
+        result = 0
+        for edge in self.get_irregular_edges(vertex):
+            result |= self.encoder.encode(edge.multicolor)
+        return result
+
+
+################################################################################################################
+#
+# maximum weight matching with fast paths for trivial instances
+#
+################################################################################################################
+
+def _get_path_matching(vertices, weights):
+    """
+    Computes a maximum weight matching on a path with supplied consecutive vertices,
+        where weights[i] is a weight of an edge between vertices[i] and vertices[i + 1]
+        the result is a list of matched edges indexes
+    """
+    # best[i] is a weight of a maximum weight matching on first i edges
+    best = [0, weights[0]] if len(weights) > 0 else [0]
+    for i in range(1, len(weights)):
+        best.append(max(best[i], best[i - 1] + weights[i]))
+    result = []
+    i = len(weights)
+    while i > 0:
+        if best[i] == best[i - 1]:
+            i -= 1
+        else:
+            result.append(i - 1)
+            i -= 2
+    return result
+
+
+def _get_chain(start, adjacency, visited):
+    """ Walks over a path or a cycle component, where every vertex has at most two neighbours, starting from supplied vertex """
+    vertices, weights = [start], []
+    visited.add(start)
+    previous, current = None, start
+    while True:
+        for neighbour, weight in adjacency[current].items():
+            if neighbour != previous and neighbour not in visited:
+                vertices.append(neighbour)
+                weights.append(weight)
+                visited.add(neighbour)
+                previous, current = current, neighbour
+                break
+        else:
+            return vertices, weights
+
+
+def get_max_weight_matching(edges):
+    """
+    Computes a maximum weight matching for supplied edges (triples (vertex1, vertex2, weight) with positive weights)
+        the result is a dict, where both vertices of every matched edge are mapped to each other,
+        exactly as networkx max_weight_matching provides it
+    Matching is computed independently for each connected component of the instance:
+        components, that are single edges, paths or cycles, are solved directly in linear time,
+        and only components with vertices of degree greater than two are solved with the general blossom algorithm
+    As in networkx graph, a later edge between the same pair of vertices replaces an earlier one, and self loops are ignored
+    """
+    adjacency = defaultdict(dict)
+    for vertex1, vertex2, weight in edges:
+        if vertex1 == vertex2:
+            continue
+        adjacency[vertex1][vertex2] = weight
+        adjacency[vertex2][vertex1] = weight
+    result = {}
+    if all(len(neighbours) == 1 for neighbours in adjacency.values()):
+        # disjoint edges (the most common case), all of them are in the matching
+        for vertex, neighbours in adjacency.items():
+            result[vertex] = next(iter(neighbours))
+        return result
+    general = nx.Graph()
+    visited = set()
+    for vertex in adjacency:
+        if vertex in visited:
+            continue
+        component, stack = [vertex], [vertex]
+        component_visited = {vertex}
+        while stack:
+            for neighbour in adjacency[stack.pop()]:
+                if neighbour not in component_visited:
+                    component_visited.add(neighbour)
+                    component.append(neighbour)
+                    stack.append(neighbour)
+        visited.update(component)
+        if any(len(adjacency[entry]) > 2 for entry in component):
+            for entry in component:
+                for neighbour, weight in adjacency[entry].items():
+                    general.add_edge(entry, neighbour, weight=weight)
+            continue
+        ends = [entry for entry in component if len(adjacency[entry]) == 1]
+        if len(ends) > 0:
+            # a path
+            vertices, weights = _get_chain(ends[0], adjacency, set())
+            matched = _get_path_matching(vertices, weights)
+        else:
+            # a cycle, in which either the edge between the first two vertices is not matched,
+            #   or it is matched and both edges, that are adjacent to it, are not
+            vertices, weights = _get_chain(component[0], adjacency, set())
+            vertices.append(vertices[0])
+            weights.append(adjacency[vertices[-2]][vertices[0]])
+            without_first = [index + 1 for index in _get_path_matching(vertices[1:], weights[1:])]
+            with_first = [0] + [index + 2 for index in _get_path_matching(vertices[2:-1], weights[2:-1])]
+            if sum(weights[index] for index in with_first) > sum(weights[index] for index in without_first):
+                matched = with_first
+            else:
+                matched = without_first
+        for index in matched:
+            result[vertices[index]] = vertices[index + 1]
+            result[vertices[index + 1]] = vertices[index]
+    if general.number_of_edges() > 0:
+        matching = nx.max_weight_matching(general)
+        if isinstance(matching, dict):
+            result.update(matching)
+        else:
+            # networkx 2.0 and newer provide a matching as a set of pairs
+            for vertex1, vertex2 in matching:
+                result[vertex1] = vertex2
+                result[vertex2] = vertex1
+    return result
+
+
+################################################################################################################
+#
+# parallel processing of irregular subnets
+#
+################################################################################################################
+
+# subnets are processed in batches with at least that many edges in total, so that small subnets do not pay
+#   the scheduling overhead on their own
+DEFAULT_SUBNETS_BATCH_SIZE = 1000
+
+
+def get_subnets_batches(subnets, batch_size=DEFAULT_SUBNETS_BATCH_SIZE):
+    """
+    Splits supplied pairs (subnet, extra arguments) into consecutive batches, each of which (except for the last one)
+        contains at least batch_size edges in total
+    """
+    batch, batch_edges_cnt = [], 0
+    for subnet, arguments in subnets:
+        batch.append((subnet, arguments))
+        batch_edges_cnt += len(subnet)
+        if batch_edges_cnt >= batch_size:
+            yield batch
+            batch, batch_edges_cnt = [], 0
+    if len(batch) > 0:
+        yield batch
+
+
+def _process_subnets_batch(process_subnet, payload):
+    neighbourhood, subnets = payload
+    return [process_subnet(neighbourhood, subnet, *arguments) for subnet, arguments in subnets]
+
+
+def process_subnets(graph, subnets, process_subnet, executor=None, batch_size=DEFAULT_SUBNETS_BATCH_SIZE, subnets_arguments=None):
+    """
+    Applies process_subnet callable (graph, subnet, *arguments) -> result to every supplied subnet
+        and returns results in the same order. subnets_arguments is an optional list of tuples with subnet specific arguments
+    If an executor is supplied, subnets are processed in batches on it. in such case process_subnet must be picklable,
+        and instead of the whole graph it receives a neighbourhood (see get_neighbourhood) of all vertices in a batch,
+        as only surroundings of subnets vertices are examined during processing
+    """
+    if subnets_arguments is None:
+        subnets_arguments = [()] * len(subnets)
+    subnets = list(zip(subnets, subnets_arguments))
+    if executor is None:
+        return [process_subnet(graph, subnet, *arguments) for subnet, arguments in subnets]
+    payloads = []
+    for batch in get_subnets_batches(subnets, batch_size=batch_size):
+        vertices = {vertex for subnet, _ in batch for vertex in subnet.nodes()}
+        payloads.append((get_neighbourhood(graph, vertices), batch))
+    result = []
+    for batch_result in executor.map(functools.partial(_process_subnets_batch, process_subnet), payloads):
+        result.extend(batch_result)
+    return result
+
+
+################################################################################################################
+#
+# speculative identification of assembly points for multiple target multicolors
+#
+################################################################################################################
+
+# every worker process receives its own snapshot of the graph once, rather than with every target multicolor
+_speculative_worker_state = {}
+
+
+def get_component_assemblies(graph, identify_components, target_multicolor):
+    """
+    Identifies assembly points for supplied target multicolor in every connected component of supplied graph
+        identify_components is a callable (graph, target_multicolor=...) -> iterable of pairs (connected component, assembly points)
+        the result is a dict, where every vertex of every component, that has at least one assembly point,
+        is mapped to a list of assembly points, identified in that component,
+        so that a result for a component can later be found by any of its vertices
+    """
+    result = {}
+    for cc, assemblies in identify_components(graph, target_multicolor=target_multicolor):
+        if len(assemblies) > 0:
+            for vertex in cc.nodes():
+                result[vertex] = assemblies
+    return result
+
+
+def _init_speculative_worker(graph, identify_components):
+    _speculative_worker_state["graph"] = graph
+    _speculative_worker_state["identify_components"] = identify_components
+
+
+def _get_component_assemblies_in_worker(target_multicolor):
+    return get_component_assemblies(_speculative_worker_state["graph"], _speculative_worker_state["identify_components"],
+                                    target_multicolor)
+
+
+def identify_speculatively(graph, target_multicolors, identify_components, max_workers=None):
+    """
+    Identifies assembly points for all supplied target multicolors in parallel against a single snapshot of supplied graph
+        identify_components is a picklable callable (see get_component_assemblies)
+        the result is a list of dicts (see get_component_assemblies), one for each target multicolor in the supplied order
+    Speculative results for a connected component stay valid for as long as none of its vertices is touched
+        by assembling for preceding target multicolors
+    """
+    if max_workers == 1:
+        return [get_component_assemblies(graph, identify_components, target_multicolor) for target_multicolor in target_multicolors]
+    if sys.version_info < (3, 7):
+        # worker initializers are only supported since python 3.7, so the graph is shipped along with every target multicolor
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(functools.partial(get_component_assemblies, graph, identify_components), target_multicolors))
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_speculative_worker,
+                             initargs=(graph, identify_components)) as executor:
+        return list(executor.map(_get_component_assemblies_in_worker, target_multicolors))
+
+
+def get_speculative_assemblies(cc, speculative_assemblies, touched_vertices):
+    """
+    Retrieves speculatively identified assembly points for a connected component of the current graph
+        None is returned, if any vertex of the connected component was touched by assembling since the snapshot was taken,
+        as then speculative results are stale and the component must be processed again
+    A connected component without touched vertices is exactly the same, as it was in the snapshot,
+        so its speculative result can be found by any of its vertices
+    """
+    first_vertex = None
+    for vertex in cc.nodes():
+        if vertex in touched_vertices:
+            return None
+        if first_vertex is None:
+            first_vertex = vertex
+    return speculative_assemblies.get(first_vertex, [])
+
+################################################################################################################
+#
+# streaming ingestion of GRIMM formatted sources
+#
+################################################################################################################
+
+# number of gene order lines, that are parsed into a single partial breakpoint graph
+DEFAULT_GRIMM_CHUNK_SIZE = 10000
+
+
+def get_grimm_paths(configuration):
+    """
+    Retrieves paths of GRIMM formatted sources, listed in input->source section of supplied configuration
+        (a source is treated as a GRIMM one, if its format is "grimm", or if no format is specified
+        and its path has a .grimm extension), relative paths are resolved against input->dir
+    """
+    input_config = configuration[Configuration.INPUT]
+    result = []
+    for source in input_config[Configuration.SOURCE]:
+        path = source[Configuration.PATH]
+        source_format = source.get(Configuration.FORMAT) or os.path.splitext(path)[1].lstrip(".")
+        if source_format.lower() == "grimm":
+            result.append(os.path.join(input_config.get(Configuration.DIR) or "", path))
+    return result
+
+
+def get_grimm_chunks(stream, chunk_size=DEFAULT_GRIMM_CHUNK_SIZE):
+    """
+    Splits a GRIMM formatted stream into chunks of at most chunk_size gene order lines, reading it line by line
+        every chunk is a self contained list of GRIMM formatted lines: the declaration of the genome, that chunk
+        gene order lines belong to, fragment data comment lines, that are still in effect for them
+        (the last one for every data key, as later comments override earlier ones), and lines of the chunk itself
+    Comments, that carry no fragment data, are skipped, as they do not affect parsing
+    As every gene order line describes a separate fragment, a breakpoint graph of a stream is the same,
+        as a merge of breakpoint graphs of its chunks
+    """
+    genome = None
+    comments = OrderedDict()  # data key -> the last fragment data comment line for it, declared for the current genome
+    lines, count = [], 0
+    for line in stream:
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        if GRIMMReader.is_genome_declaration_string(data_string=line):
+            genome, comments = line, OrderedDict()
+        elif GRIMMReader.is_comment_string(data_string=line):
+            if not GRIMMReader.is_comment_data_string(string=line):
+                continue
+            path, (key, _) = GRIMMReader.parse_comment_data_string(comment_data_string=line)
+            if len(path) == 0 or path[0] != "fragment":
+                continue
+            data_key = tuple(path) + (key,)
+            comments.pop(data_key, None)
+            comments[data_key] = line
+        else:
+            count += 1
+        lines.append(line)
+        if count >= chunk_size:
+            yield lines
+            lines = ([genome] if genome is not None else []) + list(comments.values())
+            count = 0
+    if count > 0:
+        yield lines
+
+
+def get_file_grimm_chunks(path, chunk_size=DEFAULT_GRIMM_CHUNK_SIZE):
+    with open(path, "rt") as source:
+        for chunk in get_grimm_chunks(source, chunk_size=chunk_size):
+            yield chunk
+
+
+def get_grimm_chunk_graph(chunk):
+    return GRIMMReader.get_breakpoint_graph(chunk)
+
+
+def read_grimm_graph(paths, executor=None, chunk_size=DEFAULT_GRIMM_CHUNK_SIZE, max_pending_chunks=None):
+    """
+    Reads supplied GRIMM formatted files into a single breakpoint graph
+        files are read line by line and are split into chunks (see get_grimm_chunks), so no file is ever read as a whole,
+        and every chunk is parsed into a partial breakpoint graph, that is merged into the result
+    If executor is supplied, chunks from all files are parsed on it in parallel, with at most max_pending_chunks
+        (twice the number of cpus by default) chunks being in flight at any moment, so the memory footprint is bounded
+    Partial graphs are merged in the order of chunks, so the result does not depend on the executor
+    """
+    result = BreakpointGraph()
+    chunks = (chunk for path in paths for chunk in get_file_grimm_chunks(path, chunk_size=chunk_size))
+    if executor is None:
+        for chunk in chunks:
+            result.update(get_grimm_chunk_graph(chunk), merge_edges=True)
+        return result
+    if max_pending_chunks is None:
+        max_pending_chunks = 2 * (os.cpu_count() or 1)
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(get_grimm_chunk_graph, chunk))
+        if len(pending) >= max_pending_chunks:
+            result.update(pending.popleft().result(), merge_edges=True)
+    while len(pending) > 0:
+        result.update(pending.popleft().result(), merge_edges=True)
+    return result
+
+
+################################################################################################################
+#
+# on-disk cache of parsed inputs
+#
+################################################################################################################
+
+INPUTS_CACHE_FILE_PREFIX = "parsed_inputs_"
+INPUTS_CACHE_FILE_SUFFIX = ".pickle"
+
+
+def get_inputs_paths_key(grimm_paths, newick_string):
+    """
+    Computes a key of a set of parsing inputs, that does not depend on contents of files:
+        absolute paths of GRIMM files (in the order they are read in) and a newick string of the tree
+    Cache entries for the same key correspond to different versions of the same inputs
+    """
+    digest = hashlib.sha256()
+    for path in grimm_paths:
+        digest.update(os.path.abspath(path).encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(newick_string.encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def get_inputs_fingerprint(grimm_paths, newick_string):
+    """
+    Computes a fingerprint of parsing inputs: absolute paths, sizes and modification times of GRIMM files
+        (in the order they are read in) and a newick string of the tree
+    """
+    digest = hashlib.sha256()
+    for path in grimm_paths:
+        stat = os.stat(path)
+        for part in (os.path.abspath(path), str(getattr(stat, "st_mtime_ns", stat.st_mtime)), str(stat.st_size)):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+    digest.update(newick_string.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def read_cached_inputs(cache_dir, grimm_paths, newick_string, executor=None, chunk_size=DEFAULT_GRIMM_CHUNK_SIZE,
+                       verbose=False, verbose_destination=None):
+    """
+    Returns a pair (breakpoint graph, tree) for supplied GRIMM files (see read_grimm_graph) and newick string of the tree
+        a parsed pair is stored in cache_dir in a binary form, and on subsequent runs is loaded from there in bulk,
+        as long as none of the GRIMM files has changed (see get_inputs_fingerprint)
+    An entry, that can not be unpickled (i.e. it is truncated, or was written by other versions of bg / gos), is treated as missing
+    When a new entry is stored, outdated entries for the same inputs (see get_inputs_paths_key) are removed,
+        while entries for other inputs, that share the directory, are kept.
+        Entries are written to temporary files first, so an interrupted write never leaves a broken entry
+    """
+    prefix = INPUTS_CACHE_FILE_PREFIX + get_inputs_paths_key(grimm_paths, newick_string) + "_"
+    file_name = prefix + get_inputs_fingerprint(grimm_paths, newick_string) + INPUTS_CACHE_FILE_SUFFIX
+    path = os.path.join(cache_dir, file_name)
+    if os.path.isfile(path):
+        try:
+            with open(path, "rb") as source:
+                return pickle.load(source)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IOError, OSError) as exc:
+            if verbose:
+                print("Cached inputs", path, "can not be loaded (", repr(exc), "), parsing GRIMM files", file=verbose_destination)
+    result = read_grimm_graph(grimm_paths, executor=executor, chunk_size=chunk_size), NewickReader.from_string(newick_string)
+    tmp_path = None
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        for entry_name in os.listdir(cache_dir):
+            if entry_name.startswith(prefix) and entry_name.endswith(INPUTS_CACHE_FILE_SUFFIX) and entry_name != file_name:
+                os.remove(os.path.join(cache_dir, entry_name))
+        descriptor, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as destination:
+            pickle.dump(result, destination, protocol=pickle.HIGHEST_PROTOCOL)
+        replace_file(tmp_path, path)
+    except (IOError, OSError, pickle.PicklingError, TypeError, AttributeError):
+        # inability to cache parsed inputs only slows down next runs
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return result
+
+
+################################################################################################################
+#
+# structured trace of diagnostics
+#
+################################################################################################################
+
+class Tracer(object):
+    """
+    A structured trace of scaffolding diagnostics, written to destination in a JSON lines format
+        (a JSON object per line, with an "event" field and event specific fields)
+    Records are written only for sampled vertices: vertices, which names are listed in vertices,
+        and a sample_rate fraction of all others, which is selected by a stable hash of vertex names,
+        so that the same vertices are sampled in every run
+    Diagnostics are to be collected only under "if tracer is not None and tracer.is_sampled(...)" guards,
+        so that with tracing off (tracer is None) no formatting is done and no extra objects are created
+    A tracer writes to an open stream, so it is never passed to worker processes
+    """
+
+    def __init__(self, destination, sample_rate=1.0, vertices=None):
+        self.destination = destination
+        self.sample_rate = sample_rate
+        self.vertices = set(vertices) if vertices is not None else set()
+        self.threshold = int(sample_rate * 2 ** 32)
+
+    def is_sampled(self, vertex_name):
+        if vertex_name in self.vertices:
+            return True
+        return zlib.crc32(str(vertex_name).encode("utf-8")) & 0xFFFFFFFF < self.threshold
+
+    def write(self, event, **fields):
+        record = OrderedDict([("event", event)])
+        record.update(sorted(fields.items()))
+        self.destination.write(json.dumps(record, separators=(",", ":"), default=str))
+        self.destination.write("\n")
+
+
+################################################################################################################
+#
+# streaming output of assembly points
+#
+################################################################################################################
+
+DEFAULT_ASSEMBLY_POINTS_BUFFER_SIZE = 1000
+DEFAULT_MAX_OPEN_FILES = 64
+
+
+class AssemblyPointsWriter(object):
+    """
+    Streams assembly points into an overall file and, if genome_specific is set, duplicates every line
+        into a file of respective genome, named by genome_specific_file_name_pattern
+        (as described in output->assembly_points section of the configuration, see from_configuration)
+    Lines are buffered per file, and a buffer is written out, once buffer_size lines are accumulated in it,
+        or on flush / close, so only a bounded number of lines is kept in memory
+    At most max_open_files files are kept open at once, the least recently used one is closed, when a limit is reached,
+        and is reopened for appending later on. Every file is truncated, when it is opened for the first time
+    """
+
+    def __init__(self, dir_path, file_name, genome_specific=True,
+                 genome_specific_file_name_pattern=Configuration.DEFAULT_OUTPUT_AP_GSFNP,
+                 buffer_size=DEFAULT_ASSEMBLY_POINTS_BUFFER_SIZE, max_open_files=DEFAULT_MAX_OPEN_FILES):
+        self.dir_path = dir_path
+        self.path = os.path.join(dir_path, file_name)
+        self.genome_specific = genome_specific
+        self.genome_specific_file_name_pattern = genome_specific_file_name_pattern
+        self.buffer_size = buffer_size
+        self.max_open_files = max_open_files
+        self.buffers = {}  # path -> lines, that are not written into a file yet
+        self.handles = OrderedDict()  # path -> open file, the least recently used first
+        self.created = set()  # paths of files, that were already truncated during the run
+        self.count = 0
+
+    @classmethod
+    def from_configuration(cls, configuration, **kwargs):
+        """
+        Creates a writer for output->assembly_points section of supplied configuration
+            (relative assembly points directory is resolved against output->dir)
+        """
+        output_config = configuration[Configuration.OUTPUT]
+        ap_config = output_config.get(Configuration.ASSEMBLY_POINTS) or {}
+        dir_path = os.path.join(output_config.get(Configuration.DIR) or "",
+                                ap_config.get(Configuration.DIR) or Configuration.DEFAULT_OUTPUT_AP_DIR)
+        return cls(dir_path=dir_path,
+                   file_name=ap_config.get(Configuration.FILE) or Configuration.DEFAULT_OUTPUT_AP_FILE,
+                   genome_specific=ap_config.get(Configuration.GENOME_SPECIFIC,
+                                                 Configuration.DEFAULT_OUTPUT_AP_GENOME_SPECIFIC),
+                   genome_specific_file_name_pattern=ap_config.get(Configuration.GENOME_SPECIFIC_FNP) or
+                                                     Configuration.DEFAULT_OUTPUT_AP_GSFNP,
+                   **kwargs)
+
+    def get_genome_path(self, genome_name):
+        return os.path.join(self.dir_path, self.genome_specific_file_name_pattern.format(genome_name=genome_name))
+
+    def write(self, genome_name, *fields):
+        """ Writes a line of space separated fields into the overall file and into a file of supplied genome """
+        line = " ".join(str(field) for field in fields) + "\n"
+        self.count += 1
+        self.add_line(self.path, line)
+        if self.genome_specific:
+            self.add_line(self.get_genome_path(genome_name), line)
+
+    def add_line(self, path, line):
+        buffer = self.buffers.setdefault(path, [])
+        buffer.append(line)
+        if len(buffer) >= self.buffer_size:
+            self.write_buffer(path)
+
+    def get_handle(self, path):
+        handle = self.handles.pop(path, None)
+        if handle is None:
+            if len(self.handles) >= self.max_open_files:
+                _, least_recently_used = self.handles.popitem(last=False)
+                least_recently_used.close()
+            if self.dir_path and not os.path.isdir(self.dir_path):
+                os.makedirs(self.dir_path)
+            handle = open(path, "at" if path in self.created else "wt")
+            self.created.add(path)
+        self.handles[path] = handle
+        return handle
+
+    def write_buffer(self, path):
+        buffer = self.buffers.pop(path, None)
+        if buffer:
+            self.get_handle(path).write("".join(buffer))
+
+    def flush(self):
+        """ Writes out all buffered lines, so that all assembly points written so far are visible in files """
+        for path in list(self.buffers):
+            self.write_buffer(path)
+        for handle in self.handles.values():
+            handle.flush()
+
+    def close(self):
+        try:
+            self.flush()
+            # the overall file is present even if no assembly points were identified
+            if self.path not in self.created:
+                self.get_handle(self.path)
+        finally:
+            for handle in self.handles.values():
+                handle.close()
+            self.handles.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+################################################################################################################
+#
+# END OF supporting infrastructure, that is shared by scaffolding scripts
+#
+################################################################################################################
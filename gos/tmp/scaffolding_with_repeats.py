@@ -1,13 +1,17 @@
 #! /usr/bin/env python
 # -*- coding: utf-8 -*-
-from collections import defaultdict
-from copy import deepcopy
+from collections import defaultdict, OrderedDict
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from bg import Multicolor, KBreak, BreakpointGraph, GRIMMReader, NewickReader, BGGenome
-import itertools
 from bg.vertices import TaggedInfinityVertex, TaggedBlockVertex
-import networkx as nx
 import os
 
+from gos.tmp.scaffolding_utils import MaskedBreakpointGraph, identify_speculatively, get_speculative_assemblies, \
+    process_subnets, DEFAULT_SUBNETS_BATCH_SIZE, MulticolorEncoder, VertexIndex, \
+    DEFAULT_SCORES_CACHE_SIZE, get_target_masks, read_cached_inputs, \
+    ComponentsTracker, get_batch_scores, AssemblyPointsWriter
+
 __author__ = "Sergey Aganezov"
 __email__ = "aganezov(at)gwu.edu"
 
@@ -74,20 +78,26 @@ def get_full_irregular_multicolor(graph, vertex):
 ################################################################################################################
 
 def get_irregular_subnets(cc, target_multicolor, exclude):
+    """
+    Filters edges of a supplied connected component, that are of interest for scaffolding with current target multicolor
+        connected component is never changed, edges of interest are collected into an edge mask,
+        and subnets are returned as read-only views over it
+    Alongside with every subnet an inverted index of its candidate support edges is returned:
+        a dict, where every repeat name is mapped to a list of pairs (h vertex, t vertex) of support edges,
+        that can be assembled through that repeat
+    """
     h_support = defaultdict(set)
     t_support = defaultdict(set)
 
-    to_remove_edges = []
-    to_remove_vertices = []
+    edges = []  # candidate edges in the order of their appearance in the connected component
+    to_remove_vertices = set()
 
     for bgedge, key in cc.edges(keys=True):
         if bgedge.is_irregular_edge:
             if bgedge.is_repeat_edge:
                 if not target_multicolor <= bgedge.multicolor:
-                    to_remove_edges.append((bgedge, key))
                     continue
                 if any(map(lambda color: bgedge.multicolor.multicolors[color] > 1, target_multicolor.colors)):
-                    to_remove_edges.append((bgedge, key))
                     continue
                 repeat = [value for tag, value in get_irregular_vertex(bgedge).tags if tag == "repeat"][0]
                 repeat_name, repeat_dir = repeat[:-1], repeat[-1]
@@ -96,24 +106,22 @@ def get_irregular_subnets(cc, target_multicolor, exclude):
                 elif repeat_dir == "t":
                     t_support[bgedge.vertex1 if bgedge.vertex1.is_regular_vertex else bgedge.vertex2].add(repeat_name)
             elif any(map(lambda color: color in bgedge.multicolor.colors, exclude)):
-                to_remove_vertices.append(bgedge.vertex1 if bgedge.vertex1.is_regular_vertex else bgedge.vertex2)
+                to_remove_vertices.add(bgedge.vertex1 if bgedge.vertex1.is_regular_vertex else bgedge.vertex2)
                 continue
+        edges.append((bgedge, key))
 
-    for bgedge, key in to_remove_edges:
-        cc.delete_bgedge(bgedge, key)
     for vertex in to_remove_vertices:
         if vertex in h_support:
             del h_support[vertex]
         if vertex in t_support:
             del t_support[vertex]
-        edges = list(cc.get_edges_by_vertex(vertex, keys=True))
-        for bgedge, key in edges:
-            cc.delete_bgedge(bgedge, key)
 
-    to_remove_edges = []
-    possible_assemblies = defaultdict(list)
+    mask = MaskedBreakpointGraph()
+    candidates = []  # triples (h vertex, t vertex, names of repeats, that can be utilized between them)
     repeats = set()
-    for bgedge, key in cc.edges(keys=True):
+    for bgedge, key in edges:
+        if bgedge.vertex1 in to_remove_vertices or bgedge.vertex2 in to_remove_vertices:
+            continue
         if not bgedge.is_irregular_edge:
             v1, v2 = bgedge.vertex1, bgedge.vertex2
             flag = True
@@ -121,163 +129,154 @@ def get_irregular_subnets(cc, target_multicolor, exclude):
                 intersection = h_support[v1].intersection(t_support[v2])
                 if len(intersection) > 0:
                     flag = False
-                    for repeat_name in intersection:
-                        possible_assemblies[(v1, v2)].append(repeat_name)
-                        repeats.add(repeat_name)
+                    candidates.append((v1, v2, intersection))
+                    repeats.update(intersection)
             if v1 in t_support and v2 in h_support:
                 intersection = t_support[v1].intersection(h_support[v2])
                 if len(intersection) > 0:
                     flag = False
-                    for repeat_name in intersection:
-                        repeats.add(repeat_name)
-                        possible_assemblies[(v2, v1)].append(repeat_name)
+                    candidates.append((v2, v1, intersection))
+                    repeats.update(intersection)
             if flag:
-                to_remove_edges.append((bgedge, key))
-
-    for bgedge, key in to_remove_edges:
-        cc.delete_bgedge(bgedge, key)
-
-    subnets = []
-    for cc in cc.connected_components_subgraphs(copy=False):
-        if len(list(cc.edges())) > 0:
-            subnets.append(cc)
-    return subnets, possible_assemblies, h_support, t_support, repeats
-
-
-def get_assembly_score(graph, v1, v2, target_multicolor, tree, multicolors_scores, surroundings, full_irregular_multicolors):
-    if surroundings is None:
-        surroundings = {}
-    if multicolors_scores is None:
-        multicolors_scores = {}
-    if full_irregular_multicolors is None:
-        full_irregular_multicolors = {}
-
-    full_multicolor = Multicolor(*max(tree.consistent_multicolors, key=lambda multicolor: len(list(multicolor.multicolors.elements()))).colors)
-    guidance = tree.consistent_multicolors
-
-    if v1 not in surroundings:
-        surroundings[v1] = Multicolor(*get_vertex_surrounding_multicolor(graph, v1).colors)
-    surrounding1 = surroundings[v1]
-    if v1 not in full_irregular_multicolors:
-        full_irregular_multicolors[v1] = Multicolor(*get_full_irregular_multicolor(graph, v1).colors)
-    im1 = full_irregular_multicolors[v1]
-    if v2 not in surroundings:
-        surroundings[v2] = Multicolor(*get_vertex_surrounding_multicolor(graph, v2).colors)
-    surrounding2 = surroundings[v2]
-    if v2 not in full_irregular_multicolors:
-        full_irregular_multicolors[v2] = Multicolor(*get_full_irregular_multicolor(graph, v2).colors)
-    im2 = full_irregular_multicolors[v1]
-
-    c_1_multicolor = full_multicolor - surrounding1
-    c_2_multicolor = full_multicolor - surrounding2
-
-    c = c_1_multicolor.intersect(c_2_multicolor)
-
-    c_a = c_1_multicolor - c
-    c_b = c_2_multicolor - c
-    sedge = graph.get_edge_by_two_vertices(v1, v2)
-    smulticolor = Multicolor(*sedge.multicolor.colors) if sedge is not None else Multicolor()
-    if target_multicolor <= smulticolor:
-        smulticolor -= target_multicolor
-
-    if (im1 + c_a).hashable_representation not in multicolors_scores:
-        multicolors_scores[(im1 + c_a).hashable_representation] = len(Multicolor.split_colors(im1 + c_a, guidance=guidance,
-                                                                                              account_for_color_multiplicity_in_guidance=False))
-    if (im2 + c_b).hashable_representation not in multicolors_scores:
-        multicolors_scores[(im2 + c_b).hashable_representation] = len(Multicolor.split_colors(im2 + c_b, guidance=guidance,
-                                                                                              account_for_color_multiplicity_in_guidance=False))
-    if (smulticolor + c).hashable_representation not in multicolors_scores:
-        multicolors_scores[(smulticolor + c).hashable_representation] = len(
-            Multicolor.split_colors(smulticolor + c, guidance=guidance,
-                                    account_for_color_multiplicity_in_guidance=False))
-    ie1_score = multicolors_scores[(im1 + c_a).hashable_representation]
-    ie2_score = multicolors_scores[(im2 + c_b).hashable_representation]
-    se_score = multicolors_scores[(smulticolor + c).hashable_representation]
-    before = ie1_score + ie2_score + se_score
-
-    if (im1 - target_multicolor + c_a).hashable_representation not in multicolors_scores:
-        multicolors_scores[(im1 - target_multicolor + c_a).hashable_representation] = len(
-            Multicolor.split_colors(im1 - target_multicolor + c_a, guidance=guidance,
-                                    account_for_color_multiplicity_in_guidance=False))
-    if (im2 - target_multicolor + c_b).hashable_representation not in multicolors_scores:
-        multicolors_scores[(im2 - target_multicolor + c_b).hashable_representation] = len(
-            Multicolor.split_colors(im2 - target_multicolor + c_b, guidance=guidance,
-                                    account_for_color_multiplicity_in_guidance=False))
-    if (smulticolor + target_multicolor + c).hashable_representation not in multicolors_scores:
-        multicolors_scores[(smulticolor + target_multicolor + c).hashable_representation] = len(
-            Multicolor.split_colors(smulticolor + target_multicolor + c, guidance=guidance,
-                                    account_for_color_multiplicity_in_guidance=False))
-    new_ie1_score = multicolors_scores[(im1 - target_multicolor + c_a).hashable_representation]
-    new_ie2_score = multicolors_scores[(im2 - target_multicolor + c_b).hashable_representation]
-    new_se_score = multicolors_scores[(smulticolor + target_multicolor + c).hashable_representation]
-
-    after = new_ie1_score + new_ie2_score + new_se_score
-    return before, after
-
-def identify_assembly_points(graph, bgtree, target_multicolor, exclude=None, verbose=False, verbose_destination=None):
+                continue
+        mask.add_bgedge(bgedge, key)
+
+    subnets = list(mask.connected_components_subgraphs(copy=False))
+    vertices_subnets = {vertex: index for index, subnet in enumerate(subnets) for vertex in subnet.nodes()}
+    subnets_candidates = [defaultdict(list) for _ in subnets]
+    for h_vertex, t_vertex, repeat_names in candidates:
+        subnet_candidates = subnets_candidates[vertices_subnets[h_vertex]]
+        for repeat_name in repeat_names:
+            subnet_candidates[repeat_name].append((h_vertex, t_vertex))
+    return subnets, subnets_candidates, h_support, t_support, repeats
+
+
+def get_assembly_scores(graph, pairs, target_mask, encoder, vertex_index):
+    """
+    Computes "before" and "after" scores for a list of possible assembly points (v1, v2) in a single batch
+        (see get_batch_scores)
+        all multicolors are encoded as bitmasks by supplied encoder (see MulticolorEncoder),
+        which also memoizes scores of multicolors, and surroundings and full irregular multicolors
+        of vertices are looked up in supplied vertex index (see VertexIndex)
+    """
+    surroundings1, surroundings2, irregular_masks1, irregular_masks2, support_masks = [], [], [], [], []
+    for v1, v2 in pairs:
+        surroundings1.append(vertex_index.get_surrounding_mask(v1))
+        irregular_masks1.append(vertex_index.get_irregular_mask(v1))
+        surroundings2.append(vertex_index.get_surrounding_mask(v2))
+        irregular_masks2.append(vertex_index.get_irregular_mask(v2))
+        sedge = graph.get_edge_by_two_vertices(v1, v2)
+        support_masks.append(encoder.encode(sedge.multicolor) if sedge is not None else 0)
+    return get_batch_scores(encoder, target_mask, surroundings1, surroundings2, irregular_masks1, irregular_masks2,
+                            support_masks)
+
+
+def get_subnet_assemblies(graph, subnet, candidates, bgtree, target_multicolor, offset, encoder=None, vertex_index=None):
+    """
+    Identifies assembly points in a single irregular subnet, for every repeat, that can be utilized in it
+        candidates is an inverted index of support edges of the subnet (see get_irregular_subnets)
+        subnets are independent of each other, so this function is called for them in any order, or in parallel
+        repeats are processed in a sorted order, so that the result does not depend on the hash seed of the process
+        if vertex_index (see VertexIndex) is not supplied, a lazy one is created over the graph
+    """
+    if encoder is None:
+        encoder = MulticolorEncoder(bgtree)
+    if vertex_index is None:
+        vertex_index = VertexIndex(graph, encoder, lazy=True)
+    target_mask = encoder.encode(target_multicolor)
+    result = []
+    # a score of a support edge does not depend on the repeat, so it is computed once for all of them
+    #   and scores for all support edges of the subnet are computed in a single batch
+    pairs = []
+    for repeat in sorted(candidates):
+        for h_vertex, t_vertex in candidates[repeat]:
+            pairs.append(tuple(sorted((h_vertex, t_vertex), key=lambda vertex: vertex.name)))
+    pairs = list(OrderedDict.fromkeys(pairs))
+    scores = dict(zip(pairs, get_assembly_scores(graph, pairs, target_mask, encoder, vertex_index)))
+    for repeat in sorted(candidates):
+        edges = []
+        added = set()
+        for h_vertex, t_vertex in candidates[repeat]:
+            if (h_vertex, t_vertex) in added:
+                continue
+            added.add((h_vertex, t_vertex))
+            v1, v2 = sorted((h_vertex, t_vertex), key=lambda vertex: vertex.name)
+            before, after = scores[(v1, v2)]
+            if before - after - offset > 1:
+                first, second = sorted(((h_vertex, "h"), (t_vertex, "t")), key=lambda item: item[0].name)
+                edges.append((first, second, before - after - offset))
+        edges = sorted(edges, reverse=True, key=lambda e: (e[2], e[0][0].name, e[0][1], e[1][0].name, e[0][1]))
+        visited = set()
+        for first, second, weight in edges:
+            if first not in visited and second not in visited:
+                visited.add(first)
+                visited.add(second)
+                (h_vertex, _), (t_vertex, _) = (first, second) if first[1] == "h" else (second, first)
+                result.append((t_vertex, h_vertex, weight, repeat))
+    return result
+
+
+def identify_assembly_points(graph, bgtree, target_multicolor, exclude=None, verbose=False, verbose_destination=None,
+                             by_component=False, speculative_assemblies=None, touched_vertices=None,
+                             executor=None, batch_size=DEFAULT_SUBNETS_BATCH_SIZE, encoder=None, vertex_index=None,
+                             components=None):
     """
     The main granular assembling function, that IDENTIFIES assembly points, but does not perform the assembly on its own
     It DOES NOT change the supplied breakpoint graph in any way!!!
+    If by_component is specified, the result is a list of pairs (connected component, assembly points identified in it)
+    If speculative_assemblies (see identify_speculatively) are supplied, they are reused for every connected component,
+        that has no vertices in touched_vertices, and only the rest of connected components is processed
+    If executor is supplied, irregular subnets are processed on it in batches of at least batch_size edges
+    If encoder (see MulticolorEncoder) is supplied, it is reused for scoring, otherwise a new one is created from the tree
+    If vertex_index (see VertexIndex) of the graph is supplied, it is used for scoring,
+        unless subnets are processed on executor, where lazy indices over subnets neighbourhoods are used instead
+    If components (connected components of the graph, see ComponentsTracker) are supplied, they are used,
+        instead of being computed from the graph
     """
+    if encoder is None:
+        encoder = MulticolorEncoder(bgtree)
     if verbose:
         print(">>Identifying assemblies for target multicolor:",
               [e.name for e in target_multicolor.multicolors.elements()], file=verbose_destination)
-    guidance = bgtree.consistent_multicolors[:]
-    offset = len(Multicolor.split_colors(target_multicolor, guidance=guidance,
-                                         account_for_color_multiplicity_in_guidance=False)) - 1
-    assemblies = []  # the overall result
+    offset = encoder.get_split_count(encoder.encode(target_multicolor)) - 1
+    components_assemblies = []  # pairs (connected component, assembly points identified in it)
     if exclude is None:
         exclude = []  # a container with single colors of genomes, that are to be considered fully assembled
-    multicolor_scores = {}
-    surroundings = {}
-    full_irregular_multicolors = {}
-    for i, cc in enumerate(graph.connected_components_subgraphs(copy=True)):
-        subnets, possible_assemblies, h_support, t_support, repeats = get_irregular_subnets(cc, target_multicolor, exclude)
-        for subnet in subnets:
-            vertices = [vertex for vertex in subnet.nodes() if not vertex.is_irregular_vertex]
-            repeats_h = {repeat for vertex in vertices for repeat in h_support[vertex]}
-            repeats_t = {repeat for vertex in vertices for repeat in t_support[vertex]}
-            repeats = repeats_h.intersection(repeats_t)
-            for repeat in repeats:
-                g = nx.Graph()
-                for edge in filter(lambda edge: not edge.is_irregular_edge, subnet.edges()):
-                    v1, v2 = sorted((edge.vertex1, edge.vertex2), key=lambda vertex: vertex.name)
-                    if v1 in h_support and repeat in h_support[v1] and v2 in t_support and repeat in t_support[v2]:
-                        before, after = get_assembly_score(graph, v1, v2, target_multicolor, bgtree,
-                                                           multicolor_scores, surroundings, full_irregular_multicolors)
-                        if before - after - offset > 1:
-                            g.add_edge((v1, "h"), (v2, "t"), weight=before - after - offset)
-                    if v1 in t_support and repeat in t_support[v1] and v2 in h_support and repeat in h_support[v2]:
-                        before, after = get_assembly_score(graph, v1, v2, target_multicolor, bgtree,
-                                                           multicolor_scores, surroundings, full_irregular_multicolors)
-                        if before - after - offset > 1:
-                            g.add_edge((v1, "t"), (v2, "h"), weight=before - after - offset)
-                edges = g.edges(data=True)
-                if len(edges) == 0:
-                    continue
-                new_edges = []
-                for edge in edges:
-                    first, second = edge[0], edge[1]
-                    v1, v2 = sorted((first, second), key=lambda item: item[0].name)
-                    new_edges.append((v1, v2, edge[2]))
-                edges = sorted(new_edges, reverse=True, key=lambda e: (e[2]["weight"], e[0][0].name, e[0][1], e[1][0].name, e[0][1]))
-                visited = set()
-                for v1, v2, data in edges:
-                    weight = data["weight"]
-                    if v1 not in visited and v2 not in visited:
-                        visited.add(v1)
-                        visited.add(v2)
-                        v1, dir1 = v1
-                        v2, dir2 = v2
-                        assert (dir1 == "h" and dir2 == "t") or (dir1 == "t" and dir2 == "h")
-                        if dir1 == "h":
-                            assemblies.append((v2, v1, weight, repeat))
-                        else:
-                            assemblies.append((v1, v2, weight, repeat))
-    return assemblies
-
-
-def assemble_points(graph, assemblies, multicolor):
+    subnets = []  # pairs (assembly points of a connected component, irregular subnet in it), that are yet to be processed
+    subnets_arguments = []
+    if components is None:
+        components = graph.connected_components_subgraphs(copy=False)
+    for i, cc in enumerate(components):
+        if speculative_assemblies is not None:
+            component_assemblies = get_speculative_assemblies(cc, speculative_assemblies, touched_vertices)
+            if component_assemblies is not None:
+                components_assemblies.append((cc, component_assemblies))
+                continue
+        component_assemblies = []
+        components_assemblies.append((cc, component_assemblies))
+        component_subnets, subnets_candidates, h_support, t_support, repeats = get_irregular_subnets(cc, target_multicolor, exclude)
+        for subnet, subnet_candidates in zip(component_subnets, subnets_candidates):
+            subnets.append((component_assemblies, subnet))
+            subnets_arguments.append((subnet_candidates,))
+
+    process_subnet = functools.partial(get_subnet_assemblies, bgtree=bgtree, target_multicolor=target_multicolor, offset=offset,
+                                       encoder=encoder, vertex_index=vertex_index if executor is None else None)
+    subnets_assemblies = process_subnets(graph, [subnet for _, subnet in subnets], process_subnet,
+                                         executor=executor, batch_size=batch_size, subnets_arguments=subnets_arguments)
+    for (component_assemblies, _), subnet_assemblies in zip(subnets, subnets_assemblies):
+        component_assemblies.extend(subnet_assemblies)
+
+    if by_component:
+        return components_assemblies
+    return [assembly for _, component_assemblies in components_assemblies for assembly in component_assemblies]
+
+
+def assemble_points(graph, assemblies, multicolor, touched_vertices=None, vertex_index=None, components_tracker=None):
+    """
+    If touched_vertices set is supplied, all vertices, which edges are changed by assembling, are added to it
+    If vertex_index (see VertexIndex) is supplied, its entries for all such vertices are updated
+    If components_tracker (see ComponentsTracker) is supplied, all such vertices are reported to it
+    """
     for assembly in assemblies:
         v1, v2, weight, repeat_name = assembly
         iv1 = TaggedInfinityVertex(v1.name)
@@ -287,11 +286,38 @@ def assemble_points(graph, assemblies, multicolor):
         kbreak = KBreak(start_edges=[(v1, iv1), (v2, iv2)],
                         result_edges=[(v1, v2), (iv1, iv2)],
                         multicolor=multicolor)
+        if touched_vertices is not None:
+            touched_vertices.update((v1, v2, iv1, iv2))
         graph.apply_kbreak(kbreak=kbreak, merge=True)
+        if vertex_index is not None:
+            vertex_index.update((v1, v2, iv1, iv2))
+        if components_tracker is not None:
+            components_tracker.update((v1, v2, iv1, iv2))
 
 
-def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=False, verbose_destination=None):
+def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=False, verbose_destination=None,
+                       speculative=False, parallel=False, max_workers=None, batch_size=DEFAULT_SUBNETS_BATCH_SIZE,
+                       scores_cache_size=DEFAULT_SCORES_CACHE_SIZE, writer=None):
+    """
+    Iteratively identifies and performs assemblies for all tree consistent target multicolors
+        If speculative is specified, assembly points for all target multicolors are identified in parallel
+        (on max_workers processes) against the original graph, and are then committed in the regular order.
+        Only connected components, that were touched by preceding assemblies, are processed again,
+        so the result is exactly the same, as in the regular mode
+        If parallel is specified, irregular subnets are processed on max_workers processes in batches of
+        at least batch_size edges
+    All multicolors are encoded as bitmasks for scoring purposes with a single color <-> bit index for the whole run
+        and their scores are cached for the whole run as well, in a cache of at most scores_cache_size entries
+    Irregular edges and surrounding multicolors of vertices are indexed once (see VertexIndex),
+        and the index is updated, as assemblies are performed
+    Connected components are computed once as well (see ComponentsTracker),
+        and only components, that were changed by assembling, are recomputed
+    If writer (see AssemblyPointsWriter) is supplied, assembly points are written to it (a line per genome),
+        as soon as they are committed for every target multicolor (sorted by vertices names and a repeat name),
+        instead of being accumulated in the result
+    """
     overall_assembling_result = []
+    encoder = MulticolorEncoder(bgtree, cache_size=scores_cache_size)
 
     # all genomes stacked up together
     overall_target_multicolor = Multicolor(*target_organisms)
@@ -309,50 +335,55 @@ def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=Fa
         print("Expanding target multicolors to include all T-consistent subcolors")
 
     # now we need to expand that list into a larger list to include every possible tree consistent sub-color,
-    #   of whatever is already in the list
+    #   of whatever is already in the list, and every union of pairwise disjoint multicolors from the expanded list
     #
-    # we will change it as we go, so better iterate over a copy
-    for target_multicolor in tree_consistent_target_multicolors[:]:
-        for tree_c_multicolor in deepcopy(bgtree.consistent_multicolors):
-            if tree_c_multicolor <= target_multicolor\
-                    and tree_c_multicolor not in tree_consistent_target_multicolors\
-                    and len(tree_c_multicolor.colors) > 0:
-                tree_consistent_target_multicolors.append(tree_c_multicolor)
-
-    tree_consistent_target_multicolors = sorted(tree_consistent_target_multicolors,
-                                                key=lambda mc: len(mc.hashable_representation),
-                                                reverse=True)
-
-    all_target_multicolors = tree_consistent_target_multicolors[:]
-    for i in range(2, len(tree_consistent_target_multicolors) + 1):
-        for comb in itertools.combinations(tree_consistent_target_multicolors[:], i):
-            comb = list(comb)
-            for mc1, mc2 in itertools.combinations(comb, 2):
-                if len(mc1.intersect(mc2).colors) > 0:
-                    break
-            else:
-                new_mc = Multicolor()
-                for mc in comb:
-                    new_mc += mc
-                all_target_multicolors.append(new_mc)
-    hashed_vertex_tree_consistent_multicolors = {mc.hashable_representation for mc in all_target_multicolors}
-    all_target_multicolors = [Multicolor(*hashed_multicolor) for hashed_multicolor in
-                                       hashed_vertex_tree_consistent_multicolors]
-    all_target_multicolors = sorted(all_target_multicolors,
-                                                key=lambda mc: len(mc.hashable_representation),
-                                                reverse=True)
+    # unions are generated directly on bitmasks, every distinct one exactly once, and the largest ones go first
+    all_target_multicolors = [Multicolor(*encoder.decode(mask))
+                              for mask in get_target_masks(encoder, tree_consistent_target_multicolors)]
     if verbose:
         print("Determined full list of targeted for scaffolding multicolors of length",
-              len(tree_consistent_target_multicolors), file=verbose_destination)
+              len(all_target_multicolors), file=verbose_destination)
         for multicolor in all_target_multicolors:
             print("\t", [color.name for color in multicolor.multicolors.elements()], file=verbose_destination)
 
-    for multicolor in all_target_multicolors:
-        assembly_points = identify_assembly_points(graph, bgtree, target_multicolor=multicolor, exclude=exclude,
-                                                   verbose_destination=verbose_destination)
-        for v1, v2, weight, repeat_name in assembly_points:
-            overall_assembling_result.append((v1, v2, weight, repeat_name, multicolor))
-        assemble_points(graph, assemblies=assembly_points, multicolor=multicolor)
+    speculative_results = None
+    touched_vertices = set()
+    if speculative:
+        identify_components = functools.partial(identify_assembly_points, bgtree=bgtree, exclude=exclude, by_component=True,
+                                                encoder=encoder)
+        speculative_results = identify_speculatively(graph, all_target_multicolors, identify_components,
+                                                     max_workers=max_workers)
+    vertex_index = VertexIndex(graph, encoder)
+    components_tracker = ComponentsTracker(graph)
+    executor = ProcessPoolExecutor(max_workers=max_workers) if parallel else None
+    try:
+        for i, multicolor in enumerate(all_target_multicolors):
+            assembly_points = identify_assembly_points(graph, bgtree, target_multicolor=multicolor, exclude=exclude,
+                                                       verbose_destination=verbose_destination,
+                                                       speculative_assemblies=speculative_results[i] if speculative else None,
+                                                       touched_vertices=touched_vertices,
+                                                       executor=executor, batch_size=batch_size, encoder=encoder,
+                                                       vertex_index=vertex_index,
+                                                       components=components_tracker.get_components())
+            if writer is not None:
+                # the overall result used to be sorted before it was written out, which can only be done per multicolor,
+                #   as assembly points are streamed
+                for v1, v2, weight, repeat_name in sorted(assembly_points, key=lambda entry: (entry[0].name, entry[1].name,
+                                                                                               entry[3])):
+                    for color in multicolor.colors:
+                        writer.write(color.name, v1.name, v2.name, color.name, "+" + repeat_name, weight)
+                writer.flush()
+            else:
+                for v1, v2, weight, repeat_name in assembly_points:
+                    overall_assembling_result.append((v1, v2, weight, repeat_name, multicolor))
+            assemble_points(graph, assemblies=assembly_points, multicolor=multicolor,
+                            touched_vertices=touched_vertices if speculative else None, vertex_index=vertex_index,
+                            components_tracker=components_tracker)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if verbose:
+        print("Multicolor scores cache statistics:", encoder.get_cache_stats(), file=verbose_destination)
     return overall_assembling_result
 
 ################################################################################################################
@@ -368,6 +399,9 @@ def assemble_scaffolds(graph, bgtree, target_organisms, exclude=None, verbose=Fa
 ################################################################################################################
 
 GRIMM_FILES = ["./all.grimm"]
+INPUTS_CACHE_DIR = "."
+ASSEMBLY_POINTS_DIR = "."
+ASSEMBLY_POINTS_FILE = "sor.txt"
 NEWICK_STRING_TREE = "(((human, chimp), gorilla), orangutan);"
 TARGET_ORGANISM_NAMES = ["chimp"]
 COMPLETE_ORGANISM_NAMES = ["human", "gorilla", "orangutan"]
@@ -379,28 +413,21 @@ COMPLETE_ORGANISM_NAMES = ["human", "gorilla", "orangutan"]
 ################################################################################################################
 
 if __name__ == "__main__":
-    print("Reading data into breakpoint graph...")
-    graph = BreakpointGraph()
-    for file in GRIMM_FILES:
-        with open(file, "rt") as source:
-            graph.update(GRIMMReader.get_breakpoint_graph(source), merge_edges=True)
-
-    print("Getting a tree...")
-    bgtree = NewickReader.from_string(NEWICK_STRING_TREE)
+    print("Reading data into breakpoint graph and getting a tree...")
+    # parsed inputs are cached in a binary form, and are reused, until any of the GRIMM files changes
+    # otherwise files are streamed in chunks, that are parsed in parallel into partial graphs, and merged afterwards
+    with ProcessPoolExecutor() as executor:
+        graph, bgtree = read_cached_inputs(INPUTS_CACHE_DIR, GRIMM_FILES, NEWICK_STRING_TREE, executor=executor,
+                                           verbose=True)
 
     print("Preparing organisms for assembling...")
     target_organisms = [BGGenome(organism) for organism in TARGET_ORGANISM_NAMES]
     exclude = [BGGenome(organism) for organism in COMPLETE_ORGANISM_NAMES]
 
     print("Staring the assembly process...")
-    result = assemble_scaffolds(graph=graph, bgtree=bgtree, target_organisms=target_organisms, exclude=exclude,
-                                verbose=True)
+    # assembly points are written out, as they are committed, into an overall file and into per genome files
+    with AssemblyPointsWriter(ASSEMBLY_POINTS_DIR, ASSEMBLY_POINTS_FILE) as writer:
+        assemble_scaffolds(graph=graph, bgtree=bgtree, target_organisms=target_organisms, exclude=exclude,
+                           verbose=True, writer=writer)
     print("Finished assembling!")
-    print("Were identified",
-          sum([len(multicolor.colors) for v1, v2, weight, repeat_name, multicolor in result]),
-          "assembly points")
-    with open("sor.txt", "wt") as destination:
-        result = sorted(result, key=lambda entry: (entry[0].name, entry[1].name, entry[3]))
-        for v1, v2, weight, repeat_name, multicolor in result:
-            for color in multicolor.colors:
-                print(v1.name, v2.name, color.name, "+" + repeat_name, weight, file=destination )
+    print("Were identified", writer.count, "assembly points")
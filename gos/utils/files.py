@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+import os
+
+
+def replace_file(src_path, dst_path):
+    """ Moves a file at src_path to dst_path, replacing an existing file at dst_path (if any) atomically
+
+    On Python 2 on Windows, where an existing file can not be renamed over, it is removed first,
+        so there a failure between removal and renaming leaves no file at dst_path
+    """
+    if hasattr(os, "replace"):
+        os.replace(src_path, dst_path)
+    elif os.name == "posix":
+        os.rename(src_path, dst_path)
+    else:
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        os.rename(src_path, dst_path)
@@ -22,4 +22,19 @@ class Loader(object):
         module_name = file_name[:file_name.rfind(".")]
         module = importlib.import_module(module_name)
         objects = [getattr(module, attr_name) for attr_name in dir(module)]
-        return file_name, module_path, objects
\ No newline at end of file
+        return file_name, module_path, objects
+
+    @staticmethod
+    def import_object(reference):
+        """ Imports an object (e.g. a function) by its fully qualified dotted name, such as "package.module.function" """
+        module_name, _, attr_name = reference.rpartition(".")
+        if module_name == "":
+            raise GOSIOException("Specified reference {reference!r} is not a fully qualified name".format(reference=reference))
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            raise GOSIOException("Specified module {module!r} can not be imported".format(module=module_name))
+        try:
+            return getattr(module, attr_name)
+        except AttributeError:
+            raise GOSIOException("Specified module {module!r} has no {attr!r} attribute".format(module=module_name, attr=attr_name))
@@ -10,6 +10,8 @@ setup(name="gos",
       version="0.1.3",
       packages=["gos", "tests", "gos.utils",
                 "gos.algo", "gos.algo.executable_containers"],
+      # concurrent.futures, that executable containers run entries with, is a part of the standard library on Python 3 only
+      install_requires=['futures; python_version < "3"'],
       author="Sergey Aganezov",
       author_email="aganezov@cs.jhu.edu",
       description="Generically organizable supervisor to create multi-level executable pipelines",
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Coroutine based fixtures for tests in test_async_tasks.py
+
+This module uses the "async def" syntax, and thus is imported only on Python 3.5+
+"""
+import asyncio
+
+from gos.async_tasks import AsyncBaseTask
+
+
+async def get_value(value):
+    return value
+
+
+def get_setup_task(events):
+    class SetupTask(AsyncBaseTask):
+        name = "setup_task"
+
+        async def run(self, manager):
+            # events are created inside the loop, that is going to await them
+            events["first"], events["second"] = asyncio.Event(), asyncio.Event()
+
+    return SetupTask()
+
+
+def get_waiting_task(name, log, events, wait_for, notify):
+    class WaitingTask(AsyncBaseTask):
+        independent = True
+
+        async def run(self, manager):
+            events[notify].set()
+            await asyncio.wait_for(events[wait_for].wait(), timeout=5)
+            log.append(self.name)
+
+    task = WaitingTask()
+    task.name = name
+    return task
+
+
+def get_sleeping_task(log):
+    class MyTask(AsyncBaseTask):
+        name = "my_async_task"
+
+        async def run(self, manager):
+            await asyncio.sleep(0)
+            log.append(self.name)
+
+    return MyTask()
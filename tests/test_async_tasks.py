@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import logging
+import sys
+import threading
+import unittest
+
+from gos.executable_containers import ExecutableContainer
+from gos.manager import Manager
+from gos.tasks import BaseTask
+
+# coroutines are not even parsed on Python versions, that do not support them
+ASYNC_SUPPORTED = sys.version_info >= (3, 5)
+if ASYNC_SUPPORTED:
+    from gos.async_tasks import AsyncBaseTask, run_coroutine
+    from tests.async_tasks_helpers import get_value, get_setup_task, get_waiting_task, get_sleeping_task
+
+
+@unittest.skipIf(not ASYNC_SUPPORTED, "coroutines require Python 3.5+")
+class AsyncBaseTaskTestCase(unittest.TestCase):
+    def test_asynchronous_property(self):
+        self.assertTrue(AsyncBaseTask.asynchronous)
+        self.assertFalse(BaseTask.asynchronous)
+
+    def test_run_coroutine(self):
+        self.assertEqual(run_coroutine(get_value(5)), 5)
+
+
+@unittest.skipIf(not ASYNC_SUPPORTED, "coroutines require Python 3.5+")
+class AsyncExecutableContainerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.manager = Manager({})
+        self.ec = ExecutableContainer(name="stage", asynchronous=True)
+        self.log = []
+
+    def get_sync_task(self, name, independent=False):
+        log = self.log
+
+        class SyncTask(BaseTask):
+            def run(self, manager):
+                log.append((self.name, threading.current_thread() is threading.main_thread()))
+
+        task = SyncTask()
+        task.name = name
+        task.independent = independent
+        return task
+
+    def test_setup_from_config_asynchronous_value(self):
+        self.manager.logger = logging.getLogger()
+        ec = ExecutableContainer.setup_from_config(manager=self.manager, config={"name": "my_name", "asynchronous": True})
+        self.assertTrue(ec.asynchronous)
+
+    def test_independent_async_tasks_are_awaited_concurrently(self):
+        events = {}
+        self.ec.entries = [get_setup_task(events),
+                           get_waiting_task("task1", self.log, events, wait_for="second", notify="first"),
+                           get_waiting_task("task2", self.log, events, wait_for="first", notify="second")]
+        self.ec.run(manager=self.manager)
+        self.assertSetEqual(set(self.log), {"task1", "task2"})
+
+    def test_sync_tasks_are_offloaded_to_executor(self):
+        self.ec.entries = [self.get_sync_task("task1"), self.get_sync_task("task2")]
+        self.ec.run(manager=self.manager)
+        self.assertListEqual(self.log, [("task1", False), ("task2", False)])
+
+    def test_async_task_in_synchronous_container(self):
+        ec = ExecutableContainer(name="stage")
+        ec.entries = [get_sleeping_task(self.log)]
+        ec.run(manager=self.manager)
+        self.assertListEqual(self.log, ["my_async_task"])
+
+
+if __name__ == '__main__':
+    unittest.main()
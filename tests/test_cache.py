@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import unittest
+import sys
+
+if sys.version_info[0] >= 3:
+    from tempfile import *
+else:
+    from tempfile import *
+    from backports import tempfile
+    TemporaryDirectory = tempfile.TemporaryDirectory
+from gos.cache import TaskResultCache
+from gos.configuration import Configuration
+from gos.exceptions import GOSIOException
+from gos.executable_containers import ExecutableContainer
+from gos.manager import Manager
+from gos.tasks import BaseTask
+
+
+class CountingTask(BaseTask):
+    name = "counting_task"
+    cacheable = True
+    inputs = ["value"]
+    outputs = ["result"]
+    runs = 0
+
+    def run(self, manager):
+        CountingTask.runs += 1
+        manager.data["result"] = manager.data["value"] * 2
+
+
+class TaskResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.cache = TaskResultCache(dir_path=os.path.join(self.tmp_dir.name, "cache"))
+        self.configuration = Configuration()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_key_is_stable(self):
+        key1 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 1})
+        key2 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 1, "other": 2})
+        self.assertEqual(key1, key2)
+
+    def test_key_depends_on_inputs(self):
+        key1 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 1})
+        key2 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 2})
+        self.assertNotEqual(key1, key2)
+
+    def test_key_depends_on_task_configuration(self):
+        key1 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 1})
+        self.configuration[Configuration.ALGORITHM][Configuration.TASKS][CountingTask.name] = {"threshold": 2}
+        key2 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": 1})
+        self.assertNotEqual(key1, key2)
+
+    def test_key_depends_on_input_file_content(self):
+        file_path = os.path.join(self.tmp_dir.name, "input.txt")
+        with open(file_path, "wt") as destination:
+            destination.write("content")
+        key1 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": file_path})
+        with open(file_path, "wt") as destination:
+            destination.write("changed content")
+        key2 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": file_path})
+        self.assertNotEqual(key1, key2)
+
+    def test_key_unpicklable_input(self):
+        self.assertIsNone(self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": lambda: 1}))
+
+    def test_key_does_not_depend_on_hash_seed(self):
+        code = ("from gos.cache import TaskResultCache; "
+                "print(TaskResultCache.get_value_fingerprint({'set': {'a', 'b', 'c', 'd'}, 'dict': {'x': 1, 'y': [2, 'z']}}))")
+        fingerprints = set()
+        for seed in ("1", "2", "3"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            fingerprints.add(subprocess.check_output([sys.executable, "-c", code], env=env).strip())
+        self.assertEqual(len(fingerprints), 1)
+
+    def test_key_does_not_depend_on_items_order(self):
+        key1 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": {"a": 1, "b": 2}})
+        key2 = self.cache.get_key(task=CountingTask(), configuration=self.configuration, data={"value": {"b": 2, "a": 1}})
+        self.assertEqual(key1, key2)
+
+    def test_store_unpicklable_output(self):
+        with self.assertRaises(GOSIOException):
+            self.cache.store(key="key", task=CountingTask(), data={"result": lambda: 1})
+        self.assertListEqual(os.listdir(self.cache.dir_path), [])
+
+    def test_store_and_restore(self):
+        self.cache.store(key="key", task=CountingTask(), data={"value": 1, "result": 2})
+        data = {}
+        self.assertTrue(self.cache.restore(key="key", data=data))
+        self.assertDictEqual(data, {"result": 2})
+
+    def test_restore_missing_entry(self):
+        self.assertFalse(self.cache.restore(key="missing_key", data={}))
+
+
+class ManagerTaskCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        CountingTask.runs = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def run_manager(self, value, cacheable=True):
+        config = Configuration()
+        config[Configuration.DIR] = self.tmp_dir.name
+        config[Configuration.ALGORITHM][Configuration.CACHE] = {Configuration.ENABLED: True}
+        manager = Manager(config=config)
+        manager.data["value"] = value
+        task = CountingTask()
+        task.cacheable = cacheable
+        manager.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline", entries=[task])
+        manager.run()
+        return manager
+
+    def test_unchanged_task_is_skipped(self):
+        self.run_manager(value=1)
+        manager = self.run_manager(value=1)
+        self.assertEqual(CountingTask.runs, 1)
+        self.assertEqual(manager.data["result"], 2)
+
+    def test_changed_input_task_is_executed(self):
+        self.run_manager(value=1)
+        manager = self.run_manager(value=2)
+        self.assertEqual(CountingTask.runs, 2)
+        self.assertEqual(manager.data["result"], 4)
+
+    def test_non_cacheable_task_is_executed(self):
+        self.run_manager(value=1, cacheable=False)
+        self.run_manager(value=1, cacheable=False)
+        self.assertEqual(CountingTask.runs, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
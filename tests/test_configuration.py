@@ -1,7 +1,8 @@
 import os
 import unittest
 from copy import deepcopy
-from gos.configuration import Configuration
+from gos.configuration import Configuration, FrozenDict
+from gos.exceptions import GOSConfigurationException
 
 
 class ConfigurationTestCase(unittest.TestCase):
@@ -475,6 +476,14 @@ class ConfigurationTestCase(unittest.TestCase):
         self.assertDictEqual(self.init_config[self.init_config.ALGORITHM][self.init_config.PIPELINE],
                              expected_pipeline_config)
 
+    def test_update_with_default_algorithm_scheduler(self):
+        self.init_config[self.init_config.ALGORITHM] = {}
+        self.init_config.update_with_default_values()
+        self.assertEqual(self.init_config[self.init_config.ALGORITHM][self.init_config.SCHEDULER],
+                         self.init_config.DEFAULT_ALGORITHM_SCHEDULER)
+        self.assertEqual(self.init_config[self.init_config.ALGORITHM][self.init_config.MAX_WORKERS],
+                         self.init_config.DEFAULT_ALGORITHM_MAX_WORKERS)
+
     def test_update_with_default_algorithm_predefined_tasks_paths(self):
         my_path_list = ["my_path1", "my_path2"]
         self.init_config[self.init_config.ALGORITHM] = {
@@ -583,5 +592,74 @@ class ConfigurationTestCase(unittest.TestCase):
         self.assertListEqual(stage3[self.init_config.ENTRIES], ["task1", "task2", "task3"])
 
 
+class ConfigurationCompileTestCase(unittest.TestCase):
+    def test_compile_resolves_references(self):
+        config = Configuration({Configuration.IOSF: True})
+        compiled = config.compile()
+        self.assertTrue(compiled.algorithm.io_silent_fail)
+        self.assertTrue(compiled.output.stats.io_silent_fail)
+        self.assertEqual(compiled.output.stats.logger.name, Configuration.DEFAULT_LOGGER_NAME)
+        self.assertEqual(compiled.algorithm.tasks.paths, (Configuration.DEFAULT_ALGORITHM_TASKS_PATH,))
+
+    def test_compile_does_not_change_configuration(self):
+        config = Configuration()
+        snapshot = deepcopy(config)
+        config.compile()
+        self.assertDictEqual(config, snapshot)
+
+    def test_compiled_configuration_is_immutable(self):
+        compiled = Configuration().compile()
+        with self.assertRaises(AttributeError):
+            compiled.algorithm.io_silent_fail = True
+        with self.assertRaises(AttributeError):
+            compiled.algorithm.new_value = True
+
+    def test_compile_non_attribute_keys(self):
+        config = Configuration()
+        config[Configuration.ALGORITHM][Configuration.TASKS]["my-task"] = {"value": 1}
+        compiled = config.compile()
+        self.assertIsInstance(compiled.algorithm.tasks, FrozenDict)
+        self.assertEqual(compiled.algorithm.tasks["my-task"].value, 1)
+        with self.assertRaises(TypeError):
+            compiled.algorithm.tasks["my-task"] = {}
+
+    def test_validate_valid_configuration(self):
+        config = Configuration()
+        config.update_with_default_values()
+        self.assertListEqual(config.validate(), [])
+
+    def test_compile_reports_all_errors(self):
+        config = Configuration({
+            Configuration.ALGORITHM: {
+                Configuration.SCHEDULER: "unknown",
+                Configuration.MAX_WORKERS: 0,
+                Configuration.EXECUTABLE_CONTAINERS: [{Configuration.NAME: "stage"}],
+                Configuration.STAGES: [{Configuration.NAME: "stage1", Configuration.PARALLEL: "yes"},
+                                       {Configuration.NAME: "stage1"}],
+            },
+        })
+        with self.assertRaises(GOSConfigurationException) as context:
+            config.compile()
+        errors = context.exception.errors
+        self.assertEqual(len(errors), 4)
+        self.assertTrue(any(Configuration.SCHEDULER in error for error in errors))
+        self.assertTrue(any(Configuration.MAX_WORKERS in error for error in errors))
+        self.assertTrue(any(Configuration.PARALLEL in error for error in errors))
+        self.assertTrue(any("not unique" in error for error in errors))
+
+    def test_validate_convergence_predicate(self):
+        config = Configuration({
+            Configuration.ALGORITHM: {
+                Configuration.EXECUTABLE_CONTAINERS: [{Configuration.NAME: "stage", Configuration.REFERENCE: Configuration.STAGES}],
+                Configuration.STAGES: [{Configuration.NAME: "stage1", Configuration.CONVERGENCE_PREDICATE: "my_module.has_converged"},
+                                       {Configuration.NAME: "stage2", Configuration.CONVERGENCE_PREDICATE: "has_converged"}],
+            },
+        })
+        config.update_with_default_values()
+        errors = config.validate()
+        self.assertEqual(len(errors), 1)
+        self.assertIn(Configuration.STAGES + "[1]->" + Configuration.CONVERGENCE_PREDICATE, errors[0])
+
+
 if __name__ == '__main__':
     unittest.main()
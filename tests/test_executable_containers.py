@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+import threading
 import unittest
 import sys
 
@@ -15,6 +16,7 @@ from gos.algo.executable_containers.pipeline import Pipeline
 from gos.exceptions import GOSExecutableContainerException, GOSIOException
 from gos.executable_containers import ExecutableContainer
 from gos.manager import Manager
+from gos.tasks import BaseTask
 
 
 def invalidate_caches():
@@ -28,6 +30,10 @@ except (ImportError, AttributeError):
     pass
 
 
+def has_converged_after_two_runs(executable_container, manager):
+    return executable_container.entries[0].runs >= 2
+
+
 class ExecutableContainerTestCase(unittest.TestCase):
     def setUp(self):
         self.executable_container = ExecutableContainer()
@@ -157,6 +163,179 @@ class ExecutableContainerTestCase(unittest.TestCase):
                                                    manager=self.dm)
         self.assertListEqual(ec.entries_names, stage_name_list)
 
+    def test_setup_from_config_parallel_values(self):
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name",
+                                                           "parallel": True,
+                                                           "max_workers": 3,
+                                                           "independent": True},
+                                                   manager=self.dm)
+        self.assertTrue(ec.parallel)
+        self.assertEqual(ec.max_workers, 3)
+        self.assertTrue(ec.independent)
+
+    def test_setup_from_config_parallel_default_values(self):
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name"}, manager=self.dm)
+        self.assertFalse(ec.parallel)
+        self.assertIsNone(ec.max_workers)
+        self.assertFalse(ec.independent)
+
+    ################################################################################
+    #
+    # testing execution of entries
+    #
+    ################################################################################
+    @staticmethod
+    def _get_recording_task(name, log, independent=False, barrier=None):
+        class RecordingTask(BaseTask):
+            def run(self, manager):
+                if barrier is not None:
+                    barrier.wait()
+                log.append(self.name)
+
+        task = RecordingTask()
+        task.name = name
+        task.independent = independent
+        return task
+
+    def test_run_sequential_preserves_order(self):
+        log = []
+        self.ec.entries = [self._get_recording_task(name, log) for name in ["task1", "task2", "task3"]]
+        self.ec.run(manager=self.dm)
+        self.assertListEqual(log, ["task1", "task2", "task3"])
+
+    def test_run_self_loop(self):
+        class SelfLoopTask(BaseTask):
+            name = "self_loop_task"
+            self_loop = True
+
+            def __init__(self):
+                self.runs = 0
+
+            def run(self, manager):
+                self.runs += 1
+                self.do_self_loop = self.runs < 3
+
+        task = SelfLoopTask()
+        self.ec.entries = [task]
+        self.ec.run(manager=self.dm)
+        self.assertEqual(task.runs, 3)
+
+    @staticmethod
+    def _get_endless_self_loop_task():
+        class EndlessSelfLoopTask(BaseTask):
+            name = "endless_self_loop_task"
+            self_loop = True
+
+            def __init__(self):
+                self.runs = 0
+
+            def run(self, manager):
+                self.runs += 1
+                self.do_self_loop = True
+
+        return EndlessSelfLoopTask()
+
+    def test_run_self_loop_max_iterations(self):
+        task = self._get_endless_self_loop_task()
+        task.max_self_loop_iterations = 5
+        self.ec.entries = [task]
+        self.ec.run(manager=self.dm)
+        self.assertEqual(task.runs, 5)
+        self.assertEqual(len(self.dm.self_loop_statistics[task.name]), 1)
+        self.assertEqual(len(self.dm.self_loop_statistics[task.name][0]), 5)
+
+    def test_run_self_loop_convergence(self):
+        task = self._get_endless_self_loop_task()
+        task.has_converged = lambda manager: task.runs >= 3
+        self.ec.entries = [task]
+        self.ec.run(manager=self.dm)
+        self.assertEqual(task.runs, 3)
+
+    def test_executable_container_convergence_predicate(self):
+        task = self._get_endless_self_loop_task()
+        inner_ec = ExecutableContainer(name="inner", self_loop=True, entries=[task],
+                                       convergence_predicate=lambda ec, manager: ec.entries[0].runs >= 4)
+        inner_ec.entries[0].max_self_loop_iterations = 1
+        original_run = inner_ec.run
+
+        def run(manager, path=None):
+            original_run(manager=manager, path=path)
+            inner_ec.do_self_loop = True
+
+        inner_ec.run = run
+        self.ec.entries = [inner_ec]
+        self.ec.run(manager=self.dm)
+        self.assertEqual(task.runs, 4)
+        self.assertEqual(len(self.dm.self_loop_statistics["inner"][0]), 4)
+
+    def test_setup_from_config_max_self_loop_iterations(self):
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name", "max_self_loop_iterations": 7},
+                                                   manager=self.dm)
+        self.assertEqual(ec.max_self_loop_iterations, 7)
+
+    def test_setup_from_config_convergence_predicate(self):
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name"}, manager=self.dm)
+        self.assertIsNone(ec.convergence_predicate)
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name", "self_loop": True,
+                                                           "convergence_predicate": __name__ + ".has_converged_after_two_runs"},
+                                                   manager=self.dm)
+        self.assertIs(ec.convergence_predicate, has_converged_after_two_runs)
+        ec.entries = [self._get_endless_self_loop_task()]
+        self.assertFalse(ec.has_converged(manager=self.dm))
+        ec.entries[0].runs = 2
+        self.assertTrue(ec.has_converged(manager=self.dm))
+
+    def test_setup_from_config_unknown_convergence_predicate(self):
+        for reference in ("has_converged_after_two_runs", __name__ + ".unknown_predicate", "unknown_module.has_converged"):
+            with self.assertRaises(GOSIOException):
+                ExecutableContainer.setup_from_config(config={"name": "my_name", "convergence_predicate": reference},
+                                                      manager=self.dm)
+
+    def test_get_entry_path(self):
+        task = self._get_recording_task("task1", [])
+        self.assertEqual(ExecutableContainer.get_entry_path("pipeline/0:round1", 2, task), "pipeline/0:round1/2:task1")
+
+    def test_setup_from_config_checkpoint(self):
+        ec = ExecutableContainer.setup_from_config(config={"name": "my_name", "checkpoint": True}, manager=self.dm)
+        self.assertTrue(ec.checkpoint)
+
+    def test_get_entries_batches(self):
+        log = []
+        task1 = self._get_recording_task("task1", log, independent=True)
+        task2 = self._get_recording_task("task2", log, independent=True)
+        task3 = self._get_recording_task("task3", log)
+        task4 = self._get_recording_task("task4", log, independent=True)
+        self.ec.entries = [task1, task2, task3, task4, task4]
+        batches = list(self.ec.get_entries_batches())
+        self.assertEqual(len(batches), 4)
+        self.assertListEqual([len(batch) for batch in batches], [2, 1, 1, 1])
+        self.assertIs(batches[1][0], task3)
+
+    def test_run_parallel_independent_entries_run_concurrently(self):
+        log = []
+        barrier = threading.Barrier(2, timeout=5)
+        self.ec.parallel = True
+        self.ec.max_workers = 2
+        self.ec.entries = [self._get_recording_task("task1", log, independent=True, barrier=barrier),
+                           self._get_recording_task("task2", log, independent=True, barrier=barrier),
+                           self._get_recording_task("task3", log)]
+        self.ec.run(manager=self.dm)
+        self.assertSetEqual(set(log[:2]), {"task1", "task2"})
+        self.assertEqual(log[2], "task3")
+
+    def test_run_parallel_exception_propagation(self):
+        class ErrorTask(BaseTask):
+            name = "error_task"
+            independent = True
+
+            def run(self, manager):
+                raise ValueError()
+
+        self.ec.parallel = True
+        self.ec.entries = [ErrorTask(), self._get_recording_task("task1", [], independent=True)]
+        with self.assertRaises(ValueError):
+            self.ec.run(manager=self.dm)
+
     def test_setup_from_file_file_does_not_exists(self):
         non_existing_path = "non_existing_path.py"
         with self.assertRaises(GOSIOException):
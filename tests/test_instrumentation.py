@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import threading
+import unittest
+import sys
+
+if sys.version_info[0] >= 3:
+    from tempfile import *
+else:
+    from tempfile import *
+    from backports import tempfile
+    TemporaryDirectory = tempfile.TemporaryDirectory
+from gos.configuration import Configuration
+from gos.executable_containers import ExecutableContainer
+from gos.instrumentation import Instrumentation, mark_offloaded_work
+from gos.manager import Manager
+from gos.tasks import BaseTask
+
+
+class BusyTask(BaseTask):
+    name = "busy_task"
+
+    def run(self, manager):
+        sum(range(10000))
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_measure(self):
+        instrumentation = Instrumentation()
+        with instrumentation.measure(entry=BusyTask(), path="pipeline/0:busy_task"):
+            BusyTask().run(manager=None)
+        self.assertEqual(len(instrumentation.records), 1)
+        record = instrumentation.records[0]
+        self.assertEqual(record["name"], "busy_task")
+        self.assertEqual(record["path"], "pipeline/0:busy_task")
+        self.assertEqual(record["type"], "task")
+        self.assertGreaterEqual(record["wall_time"], 0)
+        self.assertGreaterEqual(record["cpu_time"], 0)
+        self.assertIn(record["cpu_time_scope"], ("thread", "process"))
+        self.assertFalse(record["failed"])
+
+    def test_import_without_thread_clocks(self):
+        # imitates Python 2.7 / 3.5 / 3.6 on a platform without a per thread rusage
+        code = "\n".join([
+            "import time",
+            "try:",
+            "    import resource",
+            "    del resource.RUSAGE_THREAD",
+            "except (ImportError, AttributeError):",
+            "    pass",
+            "for name in ('thread_time', 'process_time'):",
+            "    if hasattr(time, name):",
+            "        delattr(time, name)",
+            "if not hasattr(time, 'clock'):",
+            "    time.clock = time.time",
+            "from gos.instrumentation import Instrumentation",
+            "instrumentation = Instrumentation()",
+            "with instrumentation.measure(entry=type('Entry', (object, ), {'name': 'entry'})()):",
+            "    pass",
+            "print(instrumentation.get_report()['summary']['entry']['cpu_time_scope'])",
+        ])
+        output = subprocess.check_output([sys.executable, "-c", code])
+        self.assertEqual(output.decode("utf-8").strip(), "process")
+
+    def test_measure_failed_invocation(self):
+        instrumentation = Instrumentation()
+        with self.assertRaises(ValueError):
+            with instrumentation.measure(entry=BusyTask()):
+                raise ValueError()
+        self.assertTrue(instrumentation.records[0]["failed"])
+
+    def test_report_summary(self):
+        instrumentation = Instrumentation()
+        for _ in range(3):
+            with instrumentation.measure(entry=BusyTask()):
+                pass
+        summary = instrumentation.get_report()["summary"]
+        self.assertEqual(summary["busy_task"]["invocations"], 3)
+
+    def test_offloaded_work(self):
+        instrumentation = Instrumentation()
+
+        def measure_on_thread():
+            with instrumentation.measure(entry=BusyTask(), path="thread"):
+                pass
+
+        with instrumentation.measure(entry=BusyTask(), path="outer"):
+            with instrumentation.measure(entry=BusyTask(), path="inner"):
+                mark_offloaded_work()
+                # neither measurements on other threads, nor ones, that start later, are affected
+                thread = threading.Thread(target=measure_on_thread)
+                thread.start()
+                thread.join()
+                with instrumentation.measure(entry=BusyTask(), path="later"):
+                    pass
+        records = {record["path"]: record for record in instrumentation.records}
+        for path in ("outer", "inner"):
+            self.assertIsNone(records[path]["cpu_time"])
+            self.assertEqual(records[path]["cpu_time_scope"], "unavailable")
+        for path in ("thread", "later"):
+            self.assertIn(records[path]["cpu_time_scope"], ("thread", "process"))
+
+    def test_report_summary_with_unavailable_cpu_time(self):
+        instrumentation = Instrumentation()
+        with instrumentation.measure(entry=BusyTask()):
+            pass
+        with instrumentation.measure(entry=BusyTask(), cpu_time_available=False):
+            pass
+        summary = instrumentation.get_report()["summary"]["busy_task"]
+        self.assertEqual(summary["invocations"], 2)
+        self.assertIsNone(summary["cpu_time"])
+        self.assertEqual(summary["cpu_time_scope"], "unavailable")
+
+    def test_profile(self):
+        instrumentation = Instrumentation(profile_names=["busy_task"], profile_dir=self.tmp_dir.name)
+        with instrumentation.measure(entry=BusyTask()):
+            BusyTask().run(manager=None)
+        self.assertTrue(os.path.isfile(os.path.join(self.tmp_dir.name, "busy_task.0.prof")))
+
+    def test_manager_execution_report(self):
+        config = Configuration()
+        config[Configuration.DIR] = self.tmp_dir.name
+        config[Configuration.OUTPUT][Configuration.STATS] = {Configuration.INSTRUMENTATION: True}
+        manager = Manager(config=config)
+        stage = ExecutableContainer(name="stage", type_name="stage", entries=[BusyTask(), BusyTask()])
+        manager.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline", entries=[stage])
+        manager.run()
+        file_path = os.path.join(self.tmp_dir.name, Configuration.DEFAULT_OUTPUT_DIR, Configuration.DEFAULT_OUTPUT_STATS_DIR,
+                                 Configuration.DEFAULT_OUTPUT_STATS_INSTRUMENTATION_FILE)
+        with open(file_path, "rt") as source:
+            report = json.load(source)
+        self.assertEqual(report["summary"]["busy_task"]["invocations"], 2)
+        self.assertEqual(report["summary"]["stage"]["type"], "stage")
+        self.assertEqual(report["summary"]["pipeline"]["invocations"], 1)
+        self.assertIn("pipeline/0:stage/1:busy_task", [record["path"] for record in report["invocations"]])
+
+    def test_manager_execution_report_parallel_stage(self):
+        config = Configuration()
+        config[Configuration.DIR] = self.tmp_dir.name
+        config[Configuration.OUTPUT][Configuration.STATS] = {Configuration.INSTRUMENTATION: True}
+        manager = Manager(config=config)
+        tasks = [BusyTask(), BusyTask()]
+        for task in tasks:
+            task.independent = True
+        stage = ExecutableContainer(name="stage", type_name="stage", entries=tasks, parallel=True)
+        manager.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline", entries=[stage])
+        manager.run()
+        summary = manager.instrumentation.get_report()["summary"]
+        # tasks are measured on threads of the pool, while the stage and the pipeline only dispatch them there
+        self.assertIn(summary["busy_task"]["cpu_time_scope"], ("thread", "process"))
+        for name in ("stage", "pipeline"):
+            self.assertIsNone(summary[name]["cpu_time"])
+            self.assertEqual(summary[name]["cpu_time_scope"], "unavailable")
+
+
+if __name__ == '__main__':
+    unittest.main()
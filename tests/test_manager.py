@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+import threading
 import unittest
 import sys
 
@@ -9,8 +11,9 @@ else:
     from backports import tempfile
     TemporaryDirectory = tempfile.TemporaryDirectory
 from gos.configuration import Configuration
-from gos.exceptions import GOSTaskException
-from gos.manager import Manager
+from gos.exceptions import GOSTaskException, GOSExecutableContainerException, GOSIOException
+from gos.executable_containers import ExecutableContainer
+from gos.manager import Manager, DAGScheduler
 from gos.tasks import BaseTask, TaskLoader
 from tests.test_tasks import TaskLoaderTestCase
 
@@ -28,6 +31,17 @@ except (ImportError, AttributeError):
 def runTest(self):
     pass
 
+
+class RemoteTask(BaseTask):
+    name = "remote_task"
+    remote = True
+    inputs = ["value"]
+    outputs = ["value", "pid"]
+
+    def run(self, manager):
+        manager.data["value"] += 1
+        manager.data["pid"] = os.getpid()
+
 class ManagerTestCase(unittest.TestCase):
     def setUp(self):
         self.am = Manager(config=Configuration())
@@ -65,6 +79,29 @@ class ManagerTestCase(unittest.TestCase):
             self.assertIn(task_name, self.am.tasks_classes)
             self.assertTrue(issubclass(self.am.tasks_classes[task_name], BaseTask))
 
+    def test_manager_initiate_tasks_lazy(self):
+        tmp_files = self.create_correct_temporary_tasks_files()
+        with TemporaryDirectory() as tmp_dir:
+            self.am.configuration[Configuration.ALGORITHM][Configuration.TASKS] = {
+                Configuration.PATHS: [f.name for f in tmp_files],
+                Configuration.INDEX_FILE: os.path.join(tmp_dir, "index.json"),
+                Configuration.LAZY: True,
+            }
+            invalidate_caches()
+            self.am.initiate_tasks()
+            self.assertIn("my_task_two", self.am.tasks_classes)
+            self.am.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline",
+                                                                                      entries_names=["my_task_one"])
+            self.am.initiate_tasks()
+            self.assertSetEqual(set(self.am.tasks_classes) - {BaseTask.name}, {"my_task_one"})
+            self.assertSetEqual(self.am.get_referenced_entries_names(), {"my_task_one"})
+
+    def test_manager_get_compiled_configuration(self):
+        self.am.configuration[Configuration.IOSF] = True
+        compiled = self.am.get_compiled_configuration()
+        self.assertTrue(compiled.algorithm.io_silent_fail)
+        self.assertIs(self.am.get_compiled_configuration(), compiled)
+
     def test_manager_instantiate_tasks(self):
         self.am.tasks_classes = self.get_tasks_classes()
         self.am.instantiate_tasks()
@@ -120,6 +157,24 @@ class ManagerTestCase(unittest.TestCase):
         with self.assertRaises(KeyError):
             self.am.get_task_instance("non_existing_name")
 
+    def test_manager_get_task_context(self):
+        self.am.data = {"value": 1, "graph": "graph"}
+        context = self.am.get_task_context(RemoteTask())
+        self.assertDictEqual(context.data, {"value": 1})
+        self.assertIs(context.configuration, self.am.configuration)
+
+    def test_manager_run_remote_tasks_on_process_pool(self):
+        self.am.configuration[Configuration.ALGORITHM][Configuration.EXECUTOR] = "process"
+        self.am.configuration[Configuration.ALGORITHM][Configuration.MAX_WORKERS] = 1
+        self.am.data["value"] = 1
+        pipeline = ExecutableContainer(name="pipeline")
+        pipeline.entries = [RemoteTask(), RemoteTask()]
+        self.am.executable_containers_instances["pipeline"] = pipeline
+        self.am.run()
+        self.assertEqual(self.am.data["value"], 3)
+        self.assertNotEqual(self.am.data["pid"], os.getpid())
+        self.assertIsNone(self.am.process_pool)
+
     def _get_my_task_class(self):
         class MyTask(BaseTask):
             name = "my_task"
@@ -133,5 +188,205 @@ class ManagerTestCase(unittest.TestCase):
         return self._get_my_task_class()()
 
 
+class DAGSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = DAGScheduler(max_workers=4)
+        self.log = []
+        self.lock = threading.Lock()
+
+    def get_task(self, name, depends_on=None, inputs=None, outputs=None, barrier=None):
+        log, lock = self.log, self.lock
+
+        class MyTask(BaseTask):
+            def run(self, manager):
+                if barrier is not None:
+                    barrier.wait()
+                with lock:
+                    log.append(self.name)
+
+        task = MyTask()
+        task.name = name
+        task.depends_on = depends_on or []
+        task.inputs = inputs or []
+        task.outputs = outputs or []
+        return task
+
+    def test_depends_on_order(self):
+        entries = [self.get_task("task1", depends_on=["task2"]), self.get_task("task2")]
+        self.assertListEqual(self.scheduler.get_order(entries), [1, 0])
+
+    def test_inputs_outputs_dependencies(self):
+        entries = [self.get_task("task1", outputs=["graph"]),
+                   self.get_task("task2", inputs=["graph"], outputs=["points"]),
+                   self.get_task("task3", inputs=["tree"]),
+                   self.get_task("task4", outputs=["graph"])]
+        dependencies = self.scheduler.get_dependencies(entries)
+        self.assertSetEqual(dependencies[0], set())
+        self.assertSetEqual(dependencies[1], {0})
+        self.assertSetEqual(dependencies[2], set())
+        self.assertSetEqual(dependencies[3], {0, 1})
+
+    def test_repeated_entry_is_ordered(self):
+        task = self.get_task("task1")
+        self.assertSetEqual(self.scheduler.get_dependencies([task, self.get_task("task2"), task])[2], {0})
+
+    def test_unknown_dependency(self):
+        with self.assertRaises(GOSExecutableContainerException):
+            self.scheduler.get_dependencies([self.get_task("task1", depends_on=["non_existing_task"])])
+
+    def test_cycle(self):
+        entries = [self.get_task("task1", depends_on=["task2"]), self.get_task("task2", depends_on=["task1"])]
+        with self.assertRaises(GOSExecutableContainerException):
+            self.scheduler.get_order(entries)
+
+    def test_run_independent_entries_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        entries = [self.get_task("task1", barrier=barrier),
+                   self.get_task("task2", barrier=barrier),
+                   self.get_task("task3", depends_on=["task1", "task2"])]
+        self.scheduler.run(entries=entries, manager=Manager({}), run_entry=ExecutableContainer._run_entry)
+        self.assertSetEqual(set(self.log[:2]), {"task1", "task2"})
+        self.assertEqual(self.log[2], "task3")
+
+    def test_manager_run_with_dag_scheduler(self):
+        config = Configuration()
+        config[Configuration.ALGORITHM][Configuration.SCHEDULER] = "dag"
+        manager = Manager(config=config)
+        pipeline = ExecutableContainer(name="pipeline")
+        pipeline.entries = [self.get_task("task1", inputs=["graph"]), self.get_task("task2", outputs=["graph"])]
+        manager.executable_containers_instances["pipeline"] = pipeline
+        manager.run()
+        self.assertIsInstance(manager.dag_scheduler, DAGScheduler)
+        self.assertListEqual(self.log, ["task1", "task2"])
+
+
+class ManagerCheckpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.runs = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def get_task(self, name, fail=False):
+        runs = self.runs
+
+        class MyTask(BaseTask):
+            def run(self, manager):
+                if fail:
+                    raise ValueError()
+                runs.append(self.name)
+                manager.data[self.name] = manager.data.get(self.name, 0) + 1
+
+        task = MyTask()
+        task.name = name
+        return task
+
+    def get_manager(self, fail, resume_from=None):
+        config = Configuration()
+        config[Configuration.DIR] = self.tmp_dir.name
+        config[Configuration.ALGORITHM][Configuration.CHECKPOINTS] = {Configuration.RESUME_FROM: resume_from}
+        manager = Manager(config=config)
+        round1 = ExecutableContainer(name="round1", checkpoint=True, entries=[self.get_task("task1")])
+        round2 = ExecutableContainer(name="round2", checkpoint=True, entries=[self.get_task("task2", fail=fail)])
+        manager.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline", entries=[round1, round2, round1])
+        return manager
+
+    def test_resume_from_last_checkpoint(self):
+        with self.assertRaises(ValueError):
+            self.get_manager(fail=True).run()
+        self.assertListEqual(self.runs, ["task1"])
+        manager = self.get_manager(fail=False, resume_from="last")
+        manager.run()
+        self.assertListEqual(self.runs, ["task1", "task2", "task1"])
+        self.assertDictEqual(manager.data, {"task1": 2, "task2": 1})
+        self.assertSetEqual(manager.completed_paths, {"pipeline/0:round1", "pipeline/1:round2", "pipeline/2:round1"})
+
+    def test_no_resume(self):
+        self.get_manager(fail=False).run()
+        manager = self.get_manager(fail=False)
+        manager.run()
+        self.assertListEqual(self.runs, ["task1", "task2", "task1"] * 2)
+
+    def get_self_loop_manager(self, fail_at=None, resume_from=None, asynchronous=False):
+        """ Creates a manager for a pipeline with a round, that is self looped twice over two checkpointed stages,
+        where a stage can fail at its supplied iteration
+        """
+        config = Configuration()
+        config[Configuration.DIR] = self.tmp_dir.name
+        config[Configuration.ALGORITHM][Configuration.CHECKPOINTS] = {Configuration.RESUME_FROM: resume_from}
+        manager = Manager(config=config)
+        runs = self.runs
+        round1 = ExecutableContainer(name="round1", self_loop=True)
+
+        class MyTask(BaseTask):
+            def run(self, manager):
+                iteration = manager.data.get(self.name, 0) + 1
+                if (self.name, iteration) == fail_at:
+                    raise ValueError()
+                runs.append((self.name, iteration))
+                manager.data[self.name] = iteration
+                round1.do_self_loop = iteration < 2
+
+        for name in ("task1", "task2"):
+            task = MyTask()
+            task.name = name
+            round1.entries.append(ExecutableContainer(name="stage_" + name, checkpoint=True, entries=[task]))
+        manager.executable_containers_instances["pipeline"] = ExecutableContainer(name="pipeline", entries=[round1],
+                                                                                  asynchronous=asynchronous)
+        return manager
+
+    def test_resume_self_loop_mid_iteration(self, asynchronous=False):
+        with self.assertRaises(ValueError):
+            self.get_self_loop_manager(fail_at=("task2", 2), asynchronous=asynchronous).run()
+        self.assertListEqual(self.runs, [("task1", 1), ("task2", 1), ("task1", 2)])
+        manager = self.get_self_loop_manager(resume_from="last", asynchronous=asynchronous)
+        manager.run()
+        # only the stage, that has not been finished in the second iteration, is executed
+        self.assertListEqual(self.runs[3:], [("task2", 2)])
+        self.assertDictEqual(manager.data, {"task1": 2, "task2": 2})
+
+    @unittest.skipIf(sys.version_info < (3, 5), "coroutines require Python 3.5+")
+    def test_resume_asynchronous_self_loop_mid_iteration(self):
+        self.test_resume_self_loop_mid_iteration(asynchronous=True)
+
+    def test_resume_self_loop_at_iteration_start(self):
+        with self.assertRaises(ValueError):
+            self.get_self_loop_manager(fail_at=("task1", 2)).run()
+        self.assertListEqual(self.runs, [("task1", 1), ("task2", 1)])
+        manager = self.get_self_loop_manager(resume_from="last")
+        manager.run()
+        # stages, that have been finished in the first iteration only, are executed in the second one
+        self.assertListEqual(self.runs[2:], [("task1", 2), ("task2", 2)])
+        self.assertDictEqual(manager.data, {"task1": 2, "task2": 2})
+        self.assertSetEqual(manager.completed_paths, {"pipeline/0:round1/0:stage_task1", "pipeline/0:round1/1:stage_task2"})
+
+    def test_checkpoint_is_replaced_without_removal(self):
+        manager = self.get_manager(fail=False)
+        manager.setup_checkpoints()
+        manager.data["value"] = 1
+        manager.save_checkpoint(path="pipeline/0:round1")
+        remove = os.remove
+
+        def fail_on_removal(path):
+            raise AssertionError("{path} is removed".format(path=path))
+
+        os.remove = fail_on_removal
+        try:
+            manager.data["value"] = 2
+            manager.save_checkpoint(path="pipeline/1:round2")
+        finally:
+            os.remove = remove
+        self.assertListEqual(os.listdir(os.path.dirname(manager.checkpoint_file)), [os.path.basename(manager.checkpoint_file)])
+        manager = self.get_manager(fail=False, resume_from="last")
+        manager.setup_checkpoints()
+        self.assertDictEqual(manager.data, {"value": 2})
+        self.assertSetEqual(manager.completed_paths, {"pipeline/0:round1", "pipeline/1:round2"})
+
+    def test_resume_from_missing_checkpoint(self):
+        with self.assertRaises(GOSIOException):
+            self.get_manager(fail=False, resume_from=os.path.join(self.tmp_dir.name, "missing.pickle")).run()
+
+
 if __name__ == '__main__':
     unittest.main()
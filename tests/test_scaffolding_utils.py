@@ -0,0 +1,1075 @@
+# -*- coding: utf-8 -*-
+import io
+import itertools
+import json
+import os
+import pickle
+import random
+import unittest
+import sys
+
+if sys.version_info[0] >= 3:
+    from tempfile import *
+else:
+    from tempfile import *
+    from backports import tempfile
+    TemporaryDirectory = tempfile.TemporaryDirectory
+
+try:
+    import networkx as nx
+    from concurrent.futures import ProcessPoolExecutor
+    from bg import BGGenome, GRIMMReader, KBreak, Multicolor
+    from gos.configuration import Configuration
+    from gos.tmp import scaffolding_utils, scaffolding_with_repeats
+except ImportError:  # scaffolding scripts depend on bg and networkx, that are not required by gos itself
+    scaffolding_utils = None
+
+
+class GuidanceTree(object):
+    """ Mimics a bg tree, of which only tree consistent multicolors are utilized by the encoder """
+
+    def __init__(self, consistent_multicolors):
+        self.consistent_multicolors = consistent_multicolors
+
+
+def get_random_clades(rnd, genomes):
+    """ Generates all clades of a random rooted binary tree on supplied genomes, that are pairwise either nested or disjoint """
+    result = [genomes]
+    if len(genomes) > 1:
+        shuffled = genomes[:]
+        rnd.shuffle(shuffled)
+        split = rnd.randint(1, len(genomes) - 1)
+        result.extend(get_random_clades(rnd, shuffled[:split]))
+        result.extend(get_random_clades(rnd, shuffled[split:]))
+    return result
+
+
+def get_random_tree(rnd, genomes_cnt):
+    genomes = [BGGenome("genome{}".format(index)) for index in range(genomes_cnt)]
+    return GuidanceTree([Multicolor(*clade) for clade in get_random_clades(rnd, genomes)]), genomes
+
+
+def get_random_multicolor(rnd, genomes):
+    return Multicolor(*[genome for genome in genomes if rnd.random() < 0.5])
+
+
+def get_small_tree(*clades):
+    """ Creates a tree on genomes named by single letters, from its clades written as strings, e.g. "abc", "ab", "a" """
+    return GuidanceTree([Multicolor(*[BGGenome(name) for name in clade]) for clade in clades])
+
+
+def get_random_grimm_lines(rnd, genomes_cnt, genes_cnt, with_comments=False):
+    """
+    Generates GRIMM formatted genomes, each of which is a random subset of genes, split into linear and circular fragments
+        if with_comments is specified, fragments are interleaved with fragment data comments, that override each other,
+        with comments, that carry data, which is not related to fragments, and with plain comments
+    """
+    result = []
+    for genome_index in range(genomes_cnt):
+        result.append(">genome{}".format(genome_index))
+        genes = [gene for gene in range(1, genes_cnt + 1) if rnd.random() < 0.9]
+        rnd.shuffle(genes)
+        while len(genes) > 0:
+            if with_comments and rnd.random() < 0.3:
+                key = rnd.choice(["name", "origin"])
+                result.append("# data :: fragment : {} = value{}".format(key, rnd.randint(0, 100)))
+            if with_comments and rnd.random() < 0.1:
+                result.append(rnd.choice(["# data :: genome : name = value", "# a plain comment", ""]))
+            length = rnd.randint(1, 6)
+            fragment, genes = genes[:length], genes[length:]
+            signed_genes = ["-{}".format(gene) if rnd.random() < 0.5 else str(gene) for gene in fragment]
+            result.append(" ".join(signed_genes + [rnd.choice("$@")]))
+    return result
+
+
+def apply_random_two_breaks(rnd, graph, cnt):
+    """
+    Applies supplied number of random 2-breaks, every one of which replaces two edges between regular vertices,
+        that share a genome, with two other ones, and returns vertices, which incident edges were changed
+    """
+    result = set()
+    for _ in range(cnt):
+        genome = BGGenome("genome{}".format(rnd.randint(0, 2)))
+        edges = [edge for edge in graph.edges() if genome in edge.multicolor.colors and
+                 not edge.is_irregular_edge and edge.vertex1 != edge.vertex2]
+        rnd.shuffle(edges)
+        for edge1, edge2 in itertools.combinations(edges, 2):
+            vertices = [edge1.vertex1, edge1.vertex2, edge2.vertex1, edge2.vertex2]
+            if len(set(vertices)) == 4:
+                break
+        else:
+            continue
+        graph.apply_kbreak(KBreak(start_edges=[(vertices[0], vertices[1]), (vertices[2], vertices[3])],
+                                  result_edges=[(vertices[0], vertices[2]), (vertices[1], vertices[3])],
+                                  multicolor=Multicolor(genome)), merge=True)
+        result.update(vertices)
+    return result
+
+
+def get_components_representation(components):
+    return sorted(sorted(vertex.name for vertex in cc.nodes()) for cc in components)
+
+
+def get_vertices_by_names(graph, *names):
+    vertices = {vertex.name: vertex for vertex in graph.nodes()}
+    return [vertices[name] for name in names]
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class MaskedBreakpointGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.graph = GRIMMReader.get_breakpoint_graph(get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30))
+        self.edges = [(bgedge, key) for bgedge, key in self.graph.edges(keys=True) if self.random.random() < 0.7]
+        self.view = scaffolding_utils.MaskedBreakpointGraph(self.edges)
+
+    def test_edges(self):
+        self.assertEqual(len(self.view), len(self.edges))
+        self.assertListEqual(list(self.view.edges(keys=True)), self.edges)
+        self.assertListEqual(list(self.view.edges()), [bgedge for bgedge, _ in self.edges])
+        self.assertSetEqual(set(self.view.nodes()), {vertex for bgedge, _ in self.edges for vertex in (bgedge.vertex1, bgedge.vertex2)})
+
+    def test_edges_by_vertex(self):
+        for vertex in self.view.nodes():
+            expected = [(bgedge, key) for bgedge, key in self.edges if vertex in (bgedge.vertex1, bgedge.vertex2)]
+            self.assertListEqual(list(self.view.get_edges_by_vertex(vertex, keys=True)), expected)
+            for bgedge, _ in expected:
+                self.assertIsNotNone(self.view.get_edge_by_two_vertices(bgedge.vertex2, bgedge.vertex1))
+        bgedge, _ = self.edges[0]
+        self.assertIsNone(self.view.get_edge_by_two_vertices(bgedge.vertex1, bgedge.vertex1))
+
+    def test_connected_components(self):
+        view = scaffolding_utils.MaskedBreakpointGraph(self.graph.edges(keys=True))
+        self.assertListEqual(get_components_representation(view.connected_components_subgraphs()),
+                             get_components_representation(self.graph.connected_components_subgraphs(copy=False)))
+        for cc in view.connected_components_subgraphs():
+            # edges of components keep the order of the view
+            edges = list(cc.edges(keys=True))
+            self.assertListEqual(edges, [entry for entry in view.edges(keys=True) if entry in edges])
+
+    def test_small_graph_components(self):
+        graph = GRIMMReader.get_breakpoint_graph([">genome0", "1 2 $", "3 @"])
+        view = scaffolding_utils.MaskedBreakpointGraph(graph.edges(keys=True))
+        self.assertListEqual(get_components_representation(view.connected_components_subgraphs()),
+                             [["1h", "2t"], ["1t", "1t__infinity"], ["2h", "2h__infinity"], ["3h", "3t"]])
+        view = scaffolding_utils.MaskedBreakpointGraph([(bgedge, key) for bgedge, key in graph.edges(keys=True)
+                                                        if not bgedge.is_irregular_edge])
+        self.assertListEqual(get_components_representation(view.connected_components_subgraphs()), [["1h", "2t"], ["3h", "3t"]])
+
+    def test_neighbourhood(self):
+        vertices = [vertex for vertex in self.graph.nodes() if self.random.random() < 0.2]
+        neighbourhood = scaffolding_utils.get_neighbourhood(self.graph, vertices)
+        expected = {(frozenset((bgedge.vertex1, bgedge.vertex2)), key) for bgedge, key in self.graph.edges(keys=True)
+                    if bgedge.vertex1 in vertices or bgedge.vertex2 in vertices}
+        edges = [(frozenset((bgedge.vertex1, bgedge.vertex2)), key) for bgedge, key in neighbourhood.edges(keys=True)]
+        self.assertEqual(len(edges), len(set(edges)))
+        self.assertSetEqual(set(edges), expected)
+
+    def test_small_graph_neighbourhood(self):
+        graph = GRIMMReader.get_breakpoint_graph([">genome0", "1 2 $", ">genome1", "1 -2 $"])
+        neighbourhood = scaffolding_utils.get_neighbourhood(graph, get_vertices_by_names(graph, "1h"))
+        self.assertListEqual(sorted(sorted((bgedge.vertex1.name, bgedge.vertex2.name)) for bgedge in neighbourhood.edges()),
+                             [["1h", "2h"], ["1h", "2t"]])
+
+
+def identify_components_by_size(graph, target_multicolor):
+    """ Picklable stand-in for components identification, that "assembles" components with more edges, than target colors """
+    for cc in graph.connected_components_subgraphs(copy=False):
+        if len(list(cc.edges())) > len(target_multicolor.colors):
+            yield cc, [(len(target_multicolor.colors), len(list(cc.edges())))]
+        else:
+            yield cc, []
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class SpeculativeIdentificationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.graph = GRIMMReader.get_breakpoint_graph(get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30))
+        self.targets = [Multicolor(*[BGGenome("genome{}".format(index)) for index in range(cnt)]) for cnt in (3, 2, 1)]
+
+    def get_names_representation(self, speculative_assemblies):
+        return [sorted((vertex.name, assemblies) for vertex, assemblies in entry.items()) for entry in speculative_assemblies]
+
+    def test_component_assemblies(self):
+        assemblies = scaffolding_utils.get_component_assemblies(self.graph, identify_components_by_size, self.targets[1])
+        for cc in self.graph.connected_components_subgraphs(copy=False):
+            edges_cnt = len(list(cc.edges()))
+            for vertex in cc.nodes():
+                if edges_cnt > 2:
+                    self.assertListEqual(assemblies[vertex], [(2, edges_cnt)])
+                else:
+                    self.assertNotIn(vertex, assemblies)
+
+    def test_small_graph_component_assemblies(self):
+        graph = GRIMMReader.get_breakpoint_graph([">genome0", "1 2 $", ">genome1", "1 -2 $"])
+        assemblies = scaffolding_utils.get_component_assemblies(graph, identify_components_by_size, Multicolor(BGGenome("genome0")))
+        # edges 1h-2t, 2h-2h__infinity of genome0 and 1h-2h, 2t-2t__infinity of genome1 are in a single component,
+        #   while 1t-1t__infinity edge is the only one in its component
+        self.assertDictEqual({vertex.name: value for vertex, value in assemblies.items()},
+                             {name: [(1, 4)] for name in ["1h", "2t", "2h", "2h__infinity", "2t__infinity"]})
+
+    def test_parallel_identification(self):
+        expected = scaffolding_utils.identify_speculatively(self.graph, self.targets, identify_components_by_size, max_workers=1)
+        self.assertEqual(len(expected), len(self.targets))
+        result = scaffolding_utils.identify_speculatively(self.graph, self.targets, identify_components_by_size, max_workers=2)
+        self.assertListEqual(self.get_names_representation(result), self.get_names_representation(expected))
+
+    def test_parallel_identification_without_worker_initializer(self):
+        class Python36(object):
+            version_info = (3, 6)
+
+        expected = scaffolding_utils.identify_speculatively(self.graph, self.targets, identify_components_by_size, max_workers=1)
+        scaffolding_utils.sys = Python36
+        try:
+            result = scaffolding_utils.identify_speculatively(self.graph, self.targets, identify_components_by_size, max_workers=2)
+        finally:
+            scaffolding_utils.sys = sys
+        self.assertListEqual(self.get_names_representation(result), self.get_names_representation(expected))
+
+    def test_speculative_assemblies(self):
+        speculative_assemblies = scaffolding_utils.get_component_assemblies(self.graph, identify_components_by_size,
+                                                                            self.targets[2])
+        for cc in self.graph.connected_components_subgraphs(copy=False):
+            vertices = list(cc.nodes())
+            expected = [(1, len(list(cc.edges())))] if len(list(cc.edges())) > 1 else []
+            self.assertListEqual(scaffolding_utils.get_speculative_assemblies(cc, speculative_assemblies, set()), expected)
+            self.assertIsNone(scaffolding_utils.get_speculative_assemblies(cc, speculative_assemblies, {vertices[-1]}))
+
+
+def get_subnet_surroundings(graph, subnet, tag):
+    """ Picklable stand-in for subnet processing, that examines surroundings of subnet vertices in supplied graph """
+    return tag, sorted((vertex.name, len(list(graph.get_edges_by_vertex(vertex)))) for vertex in subnet.nodes())
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class SubnetsProcessingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.graph = GRIMMReader.get_breakpoint_graph(get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30))
+        view = scaffolding_utils.MaskedBreakpointGraph(self.graph.edges(keys=True))
+        self.subnets = [scaffolding_utils.MaskedBreakpointGraph([entry for entry in cc.edges(keys=True) if self.random.random() < 0.5])
+                        for cc in view.connected_components_subgraphs()]
+        self.arguments = [(index,) for index in range(len(self.subnets))]
+
+    def test_batches(self):
+        subnets = list(zip(self.subnets, self.arguments))
+        batches = list(scaffolding_utils.get_subnets_batches(subnets, batch_size=5))
+        self.assertListEqual([entry for batch in batches for entry in batch], subnets)
+        for batch in batches[:-1]:
+            self.assertGreaterEqual(sum(len(subnet) for subnet, _ in batch), 5)
+            self.assertLess(sum(len(subnet) for subnet, _ in batch[:-1]), 5)
+
+    def test_small_batches(self):
+        # lists stand in for subnets, as only their sizes are examined
+        subnets = [([1, 2], ("a",)), ([3], ("b",)), ([4, 5, 6], ("c",)), ([7], ("d",))]
+        batches = scaffolding_utils.get_subnets_batches(subnets, batch_size=3)
+        self.assertListEqual([[arguments for _, arguments in batch] for batch in batches], [[("a",), ("b",)], [("c",)], [("d",)]])
+
+    def test_serial_processing(self):
+        result = scaffolding_utils.process_subnets(self.graph, self.subnets, get_subnet_surroundings, subnets_arguments=self.arguments)
+        self.assertListEqual(result, [get_subnet_surroundings(self.graph, subnet, *arguments)
+                                      for subnet, arguments in zip(self.subnets, self.arguments)])
+
+    def test_parallel_processing(self):
+        expected = scaffolding_utils.process_subnets(self.graph, self.subnets, get_subnet_surroundings,
+                                                     subnets_arguments=self.arguments)
+        for batch_size in (1, 10, 1000):
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                result = scaffolding_utils.process_subnets(self.graph, self.subnets, get_subnet_surroundings, executor=executor,
+                                                           batch_size=batch_size, subnets_arguments=self.arguments)
+            self.assertListEqual(result, expected)
+
+
+def get_matching_weight(matching, weights):
+    return sum(weights[frozenset((vertex1, vertex2))] for vertex1, vertex2 in matching.items() if vertex1 < vertex2)
+
+
+def get_networkx_matching(edges):
+    graph = nx.Graph()
+    for vertex1, vertex2, weight in edges:
+        graph.add_edge(vertex1, vertex2, weight=weight)
+    matching = nx.max_weight_matching(graph)
+    if isinstance(matching, dict):
+        return matching
+    result = {}
+    for vertex1, vertex2 in matching:
+        result[vertex1] = vertex2
+        result[vertex2] = vertex1
+    return result
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class MaxWeightMatchingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def assertMatchingIsMaximum(self, edges):
+        weights = {frozenset((vertex1, vertex2)): weight for vertex1, vertex2, weight in edges}
+        matching = scaffolding_utils.get_max_weight_matching(edges)
+        for vertex1, vertex2 in matching.items():
+            self.assertEqual(matching[vertex2], vertex1)
+            self.assertIn(frozenset((vertex1, vertex2)), weights)
+        # ties may be broken differently, so only weights of matchings are compared
+        self.assertEqual(get_matching_weight(matching, weights), get_matching_weight(get_networkx_matching(edges), weights))
+
+    def get_weight(self):
+        return self.random.randint(1, 10)
+
+    def test_empty(self):
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching([]), {})
+
+    def test_disjoint_edges(self):
+        edges = [(1, 2, 3), (3, 4, 1), (5, 6, 2)]
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching(edges), {1: 2, 2: 1, 3: 4, 4: 3, 5: 6, 6: 5})
+
+    def test_small_path(self):
+        # both outer edges (2 + 2) outweigh the middle one (3)
+        edges = [(1, 2, 2), (2, 3, 3), (3, 4, 2)]
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching(edges), {1: 2, 2: 1, 3: 4, 4: 3})
+
+    def test_small_cycle(self):
+        edges = [(1, 2, 1), (2, 3, 1), (3, 1, 5)]
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching(edges), {1: 3, 3: 1})
+
+    def test_self_loops_are_ignored(self):
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching([(1, 1, 5), (1, 2, 1)]), {1: 2, 2: 1})
+
+    def test_later_edge_replaces_earlier(self):
+        edges = [(1, 2, 10), (2, 3, 3), (2, 1, 1)]
+        self.assertDictEqual(scaffolding_utils.get_max_weight_matching(edges), {2: 3, 3: 2})
+
+    def test_paths(self):
+        for length in range(2, 12):
+            for _ in range(20):
+                self.assertMatchingIsMaximum([(index, index + 1, self.get_weight()) for index in range(length)])
+
+    def test_cycles(self):
+        for length in range(3, 12):
+            for _ in range(20):
+                edges = [(index, (index + 1) % length, self.get_weight()) for index in range(length)]
+                self.assertMatchingIsMaximum(edges)
+
+    def test_general_graphs(self):
+        for vertices_cnt in range(3, 10):
+            for _ in range(20):
+                pairs = [pair for pair in itertools.combinations(range(vertices_cnt), 2) if self.random.random() < 0.4]
+                self.assertMatchingIsMaximum([(vertex1, vertex2, self.get_weight()) for vertex1, vertex2 in pairs])
+
+    def test_mixed_components(self):
+        edges = [(0, 1, 2), (1, 2, 3), (2, 3, 2),  # a path
+                 (10, 11, 1), (11, 12, 1), (12, 10, 5),  # a cycle
+                 (20, 21, 4), (20, 22, 4), (20, 23, 1), (23, 24, 3),  # a component with a vertex of degree three
+                 (30, 31, 1)]  # a single edge
+        self.assertMatchingIsMaximum(edges)
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class MulticolorEncoderTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def test_encode_decode(self):
+        tree, genomes = get_random_tree(self.random, 6)
+        encoder = scaffolding_utils.MulticolorEncoder(tree)
+        self.assertEqual(encoder.full_mask, 2 ** 6 - 1)
+        for _ in range(50):
+            multicolor = get_random_multicolor(self.random, genomes)
+            mask = encoder.encode(multicolor)
+            self.assertEqual(scaffolding_utils.get_bits_count(mask), len(multicolor.colors))
+            self.assertEqual(Multicolor(*encoder.decode(mask)), Multicolor(*multicolor.colors))
+            self.assertListEqual(encoder.get_names(mask), sorted(genome.name for genome in multicolor.colors))
+
+    def test_encode_ignores_multiplicity(self):
+        tree, genomes = get_random_tree(self.random, 3)
+        encoder = scaffolding_utils.MulticolorEncoder(tree)
+        self.assertEqual(encoder.encode(Multicolor(genomes[0], genomes[0], genomes[1])),
+                         encoder.encode(Multicolor(genomes[0], genomes[1])))
+
+    def test_small_tree_split_counts(self):
+        encoder = scaffolding_utils.MulticolorEncoder(get_small_tree("abc", "ab", "a", "b", "c"))
+        a, b, c = [encoder.encode(Multicolor(BGGenome(name))) for name in "abc"]
+        self.assertListEqual(sorted([a, b, c]), [1, 2, 4])
+        self.assertListEqual(encoder.guidance, [a | b | c, a | b, a, b, c])
+        # {a, b} and {a, b, c} are clades of ((a, b), c) tree, while {a, c} and {b, c} are split into single genomes
+        self.assertListEqual([encoder.get_split_count(mask) for mask in (0, a, a | b, a | c, b | c, a | b | c)], [0, 1, 1, 2, 2, 1])
+
+    def test_split_count_matches_split_colors(self):
+        for genomes_cnt in range(1, 9):
+            tree, genomes = get_random_tree(self.random, genomes_cnt)
+            encoder = scaffolding_utils.MulticolorEncoder(tree)
+            for _ in range(30):
+                multicolor = get_random_multicolor(self.random, genomes)
+                expected = Multicolor.split_colors(multicolor, guidance=tree.consistent_multicolors,
+                                                   account_for_color_multiplicity_in_guidance=False)
+                self.assertEqual(encoder.get_split_count(encoder.encode(multicolor)), len(expected))
+
+    def test_split_counts_match_split_count(self):
+        tree, genomes = get_random_tree(self.random, 8)
+        masks = list(range(2 ** 8)) * 2
+        encoder = scaffolding_utils.MulticolorEncoder(tree)
+        expected = [encoder.get_split_count(mask) for mask in masks]
+        self.assertListEqual(scaffolding_utils.MulticolorEncoder(tree).get_split_counts(masks), expected)
+
+    def test_split_count_cache_is_bounded(self):
+        tree, _ = get_random_tree(self.random, 6)
+        encoder = scaffolding_utils.MulticolorEncoder(tree, cache_size=4)
+        for mask in range(10):
+            encoder.get_split_count(mask)
+        self.assertListEqual(list(encoder.split_counts), [6, 7, 8, 9])
+        encoder.get_split_count(6)
+        encoder.get_split_count(10)
+        # the least recently used entry is evicted, rather than the earliest added one
+        self.assertListEqual(list(encoder.split_counts), [8, 9, 6, 10])
+        self.assertDictEqual(encoder.get_cache_stats(), {"hits": 1, "misses": 11, "size": 4, "max_size": 4})
+
+    def test_split_counts_cache_is_bounded(self):
+        tree, _ = get_random_tree(self.random, 6)
+        encoder = scaffolding_utils.MulticolorEncoder(tree, cache_size=4)
+        encoder.get_split_counts(list(range(10)) + [9])
+        self.assertEqual(len(encoder.split_counts), 4)
+        self.assertEqual(encoder.hits + encoder.misses, 11)
+
+    def test_pickled_encoder_has_empty_cache(self):
+        tree, genomes = get_random_tree(self.random, 6)
+        encoder = scaffolding_utils.MulticolorEncoder(tree)
+        for mask in range(2 ** 6):
+            encoder.get_split_count(mask)
+        restored = pickle.loads(pickle.dumps(encoder))
+        self.assertEqual(len(restored.split_counts), 0)
+        self.assertDictEqual(restored.get_cache_stats(), {"hits": 0, "misses": 0, "size": 0, "max_size": encoder.cache_size})
+        self.assertEqual(len(encoder.split_counts), 2 ** 6)
+        self.assertListEqual(restored.guidance, encoder.guidance)
+        for genome in genomes:
+            self.assertEqual(restored.encode(Multicolor(genome)), encoder.encode(Multicolor(genome)))
+        self.assertListEqual([restored.get_split_count(mask) for mask in range(2 ** 6)],
+                             [encoder.get_split_count(mask) for mask in range(2 ** 6)])
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class VertexIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.graph = GRIMMReader.get_breakpoint_graph(get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30))
+        tree, _ = get_random_tree(self.random, 3)
+        self.encoder = scaffolding_utils.MulticolorEncoder(tree)
+
+    def assertIndexIsUpToDate(self, index):
+        for vertex in self.graph.nodes():
+            edges = list(self.graph.get_edges_by_vertex(vertex))
+            surrounding = Multicolor()
+            for edge in edges:
+                surrounding += edge.multicolor
+            irregular_edges = [edge for edge in edges if edge.is_irregular_edge]
+            self.assertEqual(index.get_surrounding_mask(vertex), self.encoder.encode(surrounding))
+            self.assertEqual(len(index.get_irregular_edges(vertex)), len(irregular_edges))
+            for edge in irregular_edges:
+                self.assertIn(edge, index.get_irregular_edges(vertex))
+            irregular_mask = 0
+            for edge in irregular_edges:
+                irregular_mask |= self.encoder.encode(edge.multicolor)
+            self.assertEqual(index.get_irregular_mask(vertex), irregular_mask)
+            if len(irregular_edges) > 0:
+                self.assertIs(index.get_irregular_edge(vertex), index.get_irregular_edges(vertex)[0])
+            else:
+                self.assertIsNone(index.get_irregular_edge(vertex))
+
+    def test_index(self):
+        self.assertIndexIsUpToDate(scaffolding_utils.VertexIndex(self.graph, self.encoder))
+
+    def test_lazy_index(self):
+        self.assertIndexIsUpToDate(scaffolding_utils.VertexIndex(self.graph, self.encoder, lazy=True))
+
+    def test_small_graph_index(self):
+        graph = GRIMMReader.get_breakpoint_graph([">genome0", "1 2 $", ">genome1", "1 -2 $"])
+        encoder = scaffolding_utils.MulticolorEncoder(GuidanceTree([Multicolor(BGGenome("genome0"), BGGenome("genome1")),
+                                                                    Multicolor(BGGenome("genome0")),
+                                                                    Multicolor(BGGenome("genome1"))]))
+        index = scaffolding_utils.VertexIndex(graph, encoder)
+        genome0, both = encoder.encode(Multicolor(BGGenome("genome0"))), encoder.full_mask
+        vertex_1t, vertex_1h, vertex_2h = get_vertices_by_names(graph, "1t", "1h", "2h")
+        # 1h is adjacent to 2t in genome0 and to 2h in genome1
+        self.assertEqual(index.get_surrounding_mask(vertex_1h), both)
+        self.assertEqual(index.get_irregular_mask(vertex_1h), 0)
+        self.assertIsNone(index.get_irregular_edge(vertex_1h))
+        # 2h is an extremity of genome0 fragment only
+        self.assertEqual(index.get_surrounding_mask(vertex_2h), both)
+        self.assertEqual(index.get_irregular_mask(vertex_2h), genome0)
+        self.assertEqual(index.get_irregular_edge(vertex_2h).vertex2.name, "2h__infinity")
+        # 1t is an extremity of both fragments
+        self.assertEqual(index.get_irregular_mask(vertex_1t), both)
+
+    def test_update(self):
+        index = scaffolding_utils.VertexIndex(self.graph, self.encoder)
+        for _ in range(5):
+            index.update(apply_random_two_breaks(self.random, self.graph, cnt=3))
+            self.assertIndexIsUpToDate(index)
+
+
+def get_disjoint_unions_by_combinations(masks):
+    result = set()
+    for size in range(1, len(masks) + 1):
+        for combination in itertools.combinations(masks, size):
+            if all(mask1 & mask2 == 0 for mask1, mask2 in itertools.combinations(combination, 2)):
+                union = 0
+                for mask in combination:
+                    union |= mask
+                result.add(union)
+    return result
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class TargetMasksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+
+    def test_disjoint_unions(self):
+        for _ in range(50):
+            masks = list({self.random.randint(1, 2 ** 6 - 1) for _ in range(self.random.randint(1, 8))})
+            unions = scaffolding_utils.get_disjoint_unions(masks)
+            self.assertEqual(len(unions), len(set(unions)))
+            self.assertSetEqual(set(unions), get_disjoint_unions_by_combinations(masks))
+
+    def test_small_disjoint_unions(self):
+        self.assertListEqual(scaffolding_utils.get_disjoint_unions([0b011, 0b100, 0b001, 0b110]),
+                             [0b011, 0b100, 0b111, 0b001, 0b101, 0b110])
+
+    def test_target_masks(self):
+        for genomes_cnt in range(1, 7):
+            tree, genomes = get_random_tree(self.random, genomes_cnt)
+            encoder = scaffolding_utils.MulticolorEncoder(tree)
+            targets = Multicolor.split_colors(get_random_multicolor(self.random, genomes), guidance=tree.consistent_multicolors,
+                                              account_for_color_multiplicity_in_guidance=False)
+            target_masks = [encoder.encode(multicolor) for multicolor in targets]
+            expanded = {mask for mask in target_masks + encoder.guidance
+                        if mask != 0 and any(mask & target_mask == mask for target_mask in target_masks)}
+            result = scaffolding_utils.get_target_masks(encoder, targets)
+            self.assertEqual(len(result), len(set(result)))
+            self.assertSetEqual(set(result), get_disjoint_unions_by_combinations(list(expanded)))
+            counts = [scaffolding_utils.get_bits_count(mask) for mask in result]
+            self.assertListEqual(counts, sorted(counts, reverse=True))
+
+    def test_small_tree_target_masks(self):
+        encoder = scaffolding_utils.MulticolorEncoder(get_small_tree("abc", "ab", "a", "b", "c"))
+        a, b = [encoder.encode(Multicolor(BGGenome(name))) for name in "ab"]
+        # {a, b} target is expanded with its subclades {a} and {b}, and their union is {a, b} itself
+        self.assertListEqual(scaffolding_utils.get_target_masks(encoder, [Multicolor(BGGenome("a"), BGGenome("b"))]), [a | b, a, b])
+
+
+def get_edges_representation(graph):
+    """ Represents edges of a breakpoint graph by names of their vertices and colors, so that different graphs can be compared """
+    result = []
+    for edge in graph.edges():
+        data = dict(edge.data)
+        fragment_data = dict(data.get("fragment") or {})
+        if "forward_orientation" in fragment_data:
+            fragment_data["forward_orientation"] = tuple(vertex.name for vertex in fragment_data["forward_orientation"])
+        data["fragment"] = fragment_data
+        result.append((tuple(sorted((edge.vertex1.name, edge.vertex2.name))),
+                       tuple(sorted(color.name for color in edge.multicolor.multicolors.elements())),
+                       repr(sorted((key, sorted(value.items()) if isinstance(value, dict) else value)
+                                   for key, value in data.items()))))
+    return sorted(result)
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class GRIMMChunksTestCase(unittest.TestCase):
+    small_lines = [">genome0", "# data :: fragment : name = s1", "1 $", "2 $", "# data :: fragment : name = s2", "3 $",
+                   "# a plain comment", "4 $"]
+
+    def setUp(self):
+        self.random = random.Random(42)
+        self.tmp_dir = TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_grimm_file(self, file_name, lines):
+        path = os.path.join(self.tmp_dir.name, file_name)
+        with open(path, "wt") as destination:
+            destination.write("\n".join(lines) + "\n")
+        return path
+
+    def get_chunks_graph(self, lines, chunk_size):
+        graph = None
+        for chunk in scaffolding_utils.get_grimm_chunks(lines, chunk_size=chunk_size):
+            chunk_graph = scaffolding_utils.get_grimm_chunk_graph(chunk)
+            if graph is None:
+                graph = chunk_graph
+            else:
+                graph.update(chunk_graph, merge_edges=True)
+        return graph
+
+    def test_chunks_sizes(self):
+        lines = get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=50, with_comments=True)
+        for chunk_size in (1, 2, 5, 100):
+            chunks = list(scaffolding_utils.get_grimm_chunks(lines, chunk_size=chunk_size))
+            genes_lines_cnts = [len([line for line in chunk if not GRIMMReader.is_genome_declaration_string(data_string=line)
+                                     and not GRIMMReader.is_comment_string(data_string=line)]) for chunk in chunks]
+            self.assertTrue(all(0 < cnt <= chunk_size for cnt in genes_lines_cnts))
+            self.assertEqual(sum(genes_lines_cnts), len([line for line in lines if line.endswith(("$", "@"))]))
+            for chunk in chunks:
+                self.assertTrue(GRIMMReader.is_genome_declaration_string(data_string=chunk[0]))
+
+    def test_small_chunks(self):
+        # the fragment name, that is in effect at the end of the first chunk, is carried over into the second one
+        self.assertListEqual(list(scaffolding_utils.get_grimm_chunks(self.small_lines, chunk_size=2)),
+                             [[">genome0", "# data :: fragment : name = s1", "1 $", "2 $"],
+                              [">genome0", "# data :: fragment : name = s1", "# data :: fragment : name = s2", "3 $", "4 $"]])
+
+    def test_chunks_comments_are_not_accumulated(self):
+        lines = [">genome0"] + ["# data :: fragment : name = value{}\n1 2 3 $".format(index) for index in range(100)]
+        lines = "\n".join(lines).split("\n")
+        # only the last comment for a key is carried over: a genome declaration, a carried comment, a new one and a fragment
+        for chunk in scaffolding_utils.get_grimm_chunks(lines, chunk_size=1):
+            self.assertLessEqual(len(chunk), 4)
+
+    def test_small_chunks_graph(self):
+        graph = self.get_chunks_graph(self.small_lines, chunk_size=2)
+        names = {}
+        for edge in graph.edges():
+            for vertex in (edge.vertex1, edge.vertex2):
+                names[vertex.name] = edge.data["fragment"]["name"]
+        self.assertListEqual([names[name] for name in ("1t", "2h", "3t", "4t")], ["s1", "s1", "s2", "s2"])
+
+    def test_chunks_graph_equals_whole_graph(self):
+        for _ in range(20):
+            lines = get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30, with_comments=True)
+            expected = get_edges_representation(GRIMMReader.get_breakpoint_graph(lines))
+            for chunk_size in (1, 3, 1000):
+                self.assertListEqual(get_edges_representation(self.get_chunks_graph(lines, chunk_size)), expected)
+
+    def test_read_grimm_graph(self):
+        lines1 = get_random_grimm_lines(self.random, genomes_cnt=2, genes_cnt=30, with_comments=True)
+        lines2 = get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=30, with_comments=True)
+        paths = [self.write_grimm_file("genomes1.grimm", lines1), self.write_grimm_file("genomes2.grimm", lines2)]
+        expected = get_edges_representation(GRIMMReader.get_breakpoint_graph(lines1 + lines2))
+        self.assertListEqual(get_edges_representation(scaffolding_utils.read_grimm_graph(paths, chunk_size=4)), expected)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            graph = scaffolding_utils.read_grimm_graph(paths, executor=executor, chunk_size=4, max_pending_chunks=3)
+        self.assertListEqual(get_edges_representation(graph), expected)
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class CachedInputsTestCase(unittest.TestCase):
+    newick_string = "(genome0,(genome1,genome2));"
+
+    def setUp(self):
+        self.random = random.Random(42)
+        self.tmp_dir = TemporaryDirectory()
+        self.cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        self.grimm_path = os.path.join(self.tmp_dir.name, "genomes.grimm")
+        self.lines = self.write_grimm_file(genes_cnt=20)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_grimm_file(self, genes_cnt=None, lines=None):
+        if lines is None:
+            lines = get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=genes_cnt)
+        with open(self.grimm_path, "wt") as destination:
+            destination.write("\n".join(lines) + "\n")
+        return lines
+
+    def read_cached_inputs(self, newick_string=None, **kwargs):
+        return scaffolding_utils.read_cached_inputs(self.cache_dir, [self.grimm_path], newick_string or self.newick_string,
+                                                    **kwargs)
+
+    def replace_entries(self, content):
+        for entry_name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, entry_name), "wb") as destination:
+                destination.write(content)
+
+    def test_parsed_inputs(self):
+        graph, tree = self.read_cached_inputs()
+        self.assertListEqual(get_edges_representation(graph),
+                             get_edges_representation(GRIMMReader.get_breakpoint_graph(self.lines)))
+        self.assertIsNotNone(tree)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_small_inputs(self):
+        self.write_grimm_file(lines=[">genome0", "1 2 $", ">genome1", "1 @"])
+        for _ in range(2):
+            graph, tree = self.read_cached_inputs(newick_string="(genome0,genome1);")
+            self.assertListEqual(sorted(vertex.name for vertex in graph.nodes() if not vertex.is_irregular_vertex),
+                                 ["1h", "1t", "2h", "2t"])
+            full_multicolor = max(tree.consistent_multicolors, key=lambda multicolor: len(multicolor.colors))
+            self.assertListEqual(sorted(genome.name for genome in full_multicolor.colors), ["genome0", "genome1"])
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_unchanged_inputs_are_loaded(self):
+        self.read_cached_inputs()
+        self.replace_entries(pickle.dumps(("graph", "tree")))
+        self.assertEqual(self.read_cached_inputs(), ("graph", "tree"))
+
+    def test_changed_inputs_replace_outdated_entry(self):
+        self.read_cached_inputs()
+        self.read_cached_inputs(newick_string="((genome0,genome1),genome2);")
+        entries = set(os.listdir(self.cache_dir))
+        self.lines = self.write_grimm_file(genes_cnt=30)
+        graph, _ = self.read_cached_inputs()
+        self.assertListEqual(get_edges_representation(graph),
+                             get_edges_representation(GRIMMReader.get_breakpoint_graph(self.lines)))
+        new_entries = set(os.listdir(self.cache_dir))
+        # an entry for other inputs is kept, and an outdated one for the same inputs is replaced
+        self.assertEqual(len(new_entries), 2)
+        self.assertEqual(len(new_entries & entries), 1)
+
+    def test_broken_entry_is_missing(self):
+        self.read_cached_inputs()
+        self.replace_entries(b"not a pickle")
+        graph, _ = self.read_cached_inputs()
+        self.assertListEqual(get_edges_representation(graph),
+                             get_edges_representation(GRIMMReader.get_breakpoint_graph(self.lines)))
+        self.replace_entries(pickle.dumps(("graph", "tree"))[:-1])
+        graph, _ = self.read_cached_inputs()
+        self.assertListEqual(get_edges_representation(graph),
+                             get_edges_representation(GRIMMReader.get_breakpoint_graph(self.lines)))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_broken_entry_is_logged(self):
+        self.read_cached_inputs()
+        self.replace_entries(b"")
+        destination = io.StringIO()
+        self.read_cached_inputs(verbose=True, verbose_destination=destination)
+        self.assertIn("EOFError", destination.getvalue())
+        destination = io.StringIO()
+        self.read_cached_inputs(verbose=True, verbose_destination=destination)
+        self.assertEqual(destination.getvalue(), "")
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class ComponentsTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.graph = GRIMMReader.get_breakpoint_graph(get_random_grimm_lines(self.random, genomes_cnt=3, genes_cnt=40))
+
+    def assertComponentsAreUpToDate(self, tracker):
+        components = tracker.get_components()
+        self.assertListEqual(get_components_representation(components),
+                             get_components_representation(self.graph.connected_components_subgraphs(copy=False)))
+        for cc in components:
+            vertices = list(cc.nodes())
+            self.assertListEqual(sorted(get_edges_representation(cc)),
+                                 sorted(entry for entry in get_edges_representation(self.graph)
+                                        if entry[0][0] in {vertex.name for vertex in vertices}))
+
+    def test_initial_components(self):
+        self.assertComponentsAreUpToDate(scaffolding_utils.ComponentsTracker(self.graph))
+
+    def test_components_after_kbreaks(self):
+        tracker = scaffolding_utils.ComponentsTracker(self.graph)
+        for _ in range(10):
+            tracker.update(apply_random_two_breaks(self.random, self.graph, cnt=self.random.randint(1, 3)))
+            self.assertComponentsAreUpToDate(tracker)
+
+    def test_small_graph_components_after_kbreak(self):
+        graph = GRIMMReader.get_breakpoint_graph([">genome0", "1 2 3 4 $", ">genome1", "1 2 3 4 $"])
+        tracker = scaffolding_utils.ComponentsTracker(graph)
+        vertex_1h, vertex_2t, vertex_3h, vertex_4t = get_vertices_by_names(graph, "1h", "2t", "3h", "4t")
+        graph.apply_kbreak(KBreak(start_edges=[(vertex_1h, vertex_2t), (vertex_3h, vertex_4t)],
+                                  result_edges=[(vertex_1h, vertex_3h), (vertex_2t, vertex_4t)],
+                                  multicolor=Multicolor(BGGenome("genome0"))), merge=True)
+        tracker.update({vertex_1h, vertex_2t, vertex_3h, vertex_4t})
+        # 1h, 2t, 3h and 4t are joined by genome0 and genome1 edges into a single cycle, while 2h-3t edge is intact
+        self.assertListEqual(get_components_representation(tracker.get_components()),
+                             [["1h", "2t", "3h", "4t"], ["1t", "1t__infinity"], ["2h", "3t"], ["4h", "4h__infinity"]])
+
+    def test_untouched_components_are_reused(self):
+        tracker = scaffolding_utils.ComponentsTracker(self.graph)
+        components = tracker.get_components()
+        touched_vertices = apply_random_two_breaks(self.random, self.graph, cnt=1)
+        tracker.update(touched_vertices)
+        untouched = [cc for cc in components if not touched_vertices & set(cc.nodes())]
+        new_components = tracker.get_components()
+        for cc in untouched:
+            self.assertTrue(any(cc is new_cc for new_cc in new_components))
+
+
+def get_random_repeats_grimm_lines(rnd, genes_cnt):
+    """
+    Generates GRIMM formatted genomes, where genome1 and genome2 consist of a single fragment,
+        while the same fragment in genome0 is split into several ones with repeats at every split
+    """
+    genes = ["-{}".format(gene) if rnd.random() < 0.5 else str(gene) for gene in range(1, genes_cnt + 1)]
+    rnd.shuffle(genes)
+    result = [">genome1", " ".join(genes + ["$"]), ">genome2", " ".join(genes + ["$"]), ">genome0"]
+    fragment = []
+    for gene in genes:
+        fragment.append(gene)
+        if gene != genes[-1] and rnd.random() < 0.3:
+            repeat = "{}r{}__repeat".format("-" if rnd.random() < 0.5 else "", rnd.randint(1, 3))
+            result.append(" ".join(fragment + [repeat, "$"]))
+            fragment = [repeat]
+    result.append(" ".join(fragment + ["$"]))
+    return result
+
+
+def get_subnet_assemblies_by_repeats(graph, subnet, h_support, t_support, target_multicolor, offset, encoder):
+    """ Identifies assembly points in a subnet by filtering all of its edges for every repeat, that can be utilized in it """
+    vertex_index = scaffolding_utils.VertexIndex(graph, encoder)
+    target_mask = encoder.encode(target_multicolor)
+    vertices = [vertex for vertex in subnet.nodes() if not vertex.is_irregular_vertex]
+    repeats = ({repeat for vertex in vertices for repeat in h_support.get(vertex, ())} &
+               {repeat for vertex in vertices for repeat in t_support.get(vertex, ())})
+    supports = {"h": h_support, "t": t_support}
+    result = []
+    for repeat in sorted(repeats):
+        edges = set()
+        for edge in subnet.edges():
+            if edge.is_irregular_edge:
+                continue
+            v1, v2 = sorted((edge.vertex1, edge.vertex2), key=lambda vertex: vertex.name)
+            (before, after), = scaffolding_with_repeats.get_assembly_scores(graph, [(v1, v2)], target_mask, encoder, vertex_index)
+            for dir1, dir2 in (("h", "t"), ("t", "h")):
+                if repeat in supports[dir1].get(v1, ()) and repeat in supports[dir2].get(v2, ()) and before - after - offset > 1:
+                    edges.add(((v1, dir1), (v2, dir2), before - after - offset))
+        edges = sorted(edges, reverse=True, key=lambda e: (e[2], e[0][0].name, e[0][1], e[1][0].name, e[0][1]))
+        visited = set()
+        for first, second, weight in edges:
+            if first not in visited and second not in visited:
+                visited.update((first, second))
+                (h_vertex, _), (t_vertex, _) = (first, second) if first[1] == "h" else (second, first)
+                result.append((t_vertex, h_vertex, weight, repeat))
+    return result
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class RepeatsCandidatesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.target_multicolor = Multicolor(BGGenome("genome0"))
+        self.tree = GuidanceTree([Multicolor(*[BGGenome("genome{}".format(index)) for index in indexes])
+                                  for indexes in ((0, 1, 2), (1, 2), (0,), (1,), (2,))])
+
+    def get_subnets(self, lines=None):
+        graph = GRIMMReader.get_breakpoint_graph(lines or get_random_repeats_grimm_lines(self.random, genes_cnt=40))
+        for cc in graph.connected_components_subgraphs(copy=False):
+            subnets, subnets_candidates, h_support, t_support, repeats = \
+                scaffolding_with_repeats.get_irregular_subnets(cc, self.target_multicolor, [])
+            self.assertSetEqual({repeat for candidates in subnets_candidates for repeat in candidates}, repeats)
+            for subnet, candidates in zip(subnets, subnets_candidates):
+                yield graph, subnet, candidates, h_support, t_support
+
+    def test_candidates(self):
+        candidates_cnt = 0
+        for _ in range(10):
+            for graph, subnet, candidates, h_support, t_support in self.get_subnets():
+                expected = set()
+                for edge in subnet.edges():
+                    if not edge.is_irregular_edge:
+                        for v1, v2 in ((edge.vertex1, edge.vertex2), (edge.vertex2, edge.vertex1)):
+                            expected.update((repeat, v1, v2) for repeat in h_support.get(v1, set()) & t_support.get(v2, set()))
+                result = [(repeat, h_vertex, t_vertex) for repeat in candidates for h_vertex, t_vertex in candidates[repeat]]
+                self.assertEqual(len(result), len(set(result)))
+                self.assertSetEqual(set(result), expected)
+                candidates_cnt += len(result)
+        self.assertGreater(candidates_cnt, 0)
+
+    def test_small_graph_assemblies(self):
+        # genome0 fragment 1 2 is broken by repeat r, that is a tail extension of 1h and a head extension of 2t
+        lines = [">genome1", "1 2 $", ">genome2", "1 2 $", ">genome0", "1 r__repeat $", "r__repeat 2 $"]
+        result = []
+        for graph, subnet, candidates, _, _ in self.get_subnets(lines):
+            result.append(({repeat: [(h_vertex.name, t_vertex.name) for h_vertex, t_vertex in candidates[repeat]]
+                            for repeat in candidates},
+                           [(t_vertex.name, h_vertex.name, weight, repeat) for t_vertex, h_vertex, weight, repeat
+                            in scaffolding_with_repeats.get_subnet_assemblies(graph, subnet, candidates, self.tree,
+                                                                              self.target_multicolor, 0)]))
+        # {genome0} irregular edges at 1h and 2t (2 in total) and {genome1, genome2} support edge (1) are replaced
+        #   with a single {genome0, genome1, genome2} edge, so that the score is 3 - 1 = 2
+        self.assertListEqual(sorted(result, key=lambda entry: len(entry[1])), [({}, []), ({}, []), ({"r": [("2t", "1h")]}, [("1h", "2t", 2, "r")])])
+
+    def test_small_graph_assembly_scores(self):
+        encoder = scaffolding_utils.MulticolorEncoder(get_small_tree("abc", "a", "bc", "b", "c"))
+        graph = GRIMMReader.get_breakpoint_graph([">a", "1 $", "2 $", ">b", "1 2 $", ">c", "1 $", "3 2 $"])
+        v1, v2 = get_vertices_by_names(graph, "1h", "2t")
+        # {a, c} irregular edges at 1h, {a} irregular edges at 2t and {b} support edge (2 + 1 + 1)
+        #   are replaced with a {c} irregular edge at 1h and a {a, b} edge (1 + 0 + 2)
+        self.assertListEqual(scaffolding_with_repeats.get_assembly_scores(graph, [(v1, v2)], encoder.encode(Multicolor(BGGenome("a"))),
+                                                                          encoder, scaffolding_utils.VertexIndex(graph, encoder)),
+                             [(4, 3)])
+
+    def test_subnet_assemblies(self):
+        assemblies_cnt = 0
+        encoder = scaffolding_utils.MulticolorEncoder(self.tree)
+        for _ in range(10):
+            for graph, subnet, candidates, h_support, t_support in self.get_subnets():
+                result = scaffolding_with_repeats.get_subnet_assemblies(graph, subnet, candidates, self.tree,
+                                                                        self.target_multicolor, 0, encoder=encoder)
+                self.assertListEqual(result, get_subnet_assemblies_by_repeats(graph, subnet, h_support, t_support,
+                                                                              self.target_multicolor, 0, encoder))
+                assemblies_cnt += len(result)
+        self.assertGreater(assemblies_cnt, 0)
+
+
+def get_multicolor_scores(tree, target, surrounding1, surrounding2, irregular1, irregular2, support):
+    """ Computes "before" and "after" scores of a possible assembly point with Multicolor operations """
+    def get_split_count(multicolor):
+        return len(Multicolor.split_colors(multicolor, guidance=tree.consistent_multicolors,
+                                           account_for_color_multiplicity_in_guidance=False))
+
+    full = Multicolor(*max(tree.consistent_multicolors, key=lambda multicolor: len(multicolor.colors)).colors)
+    c_1, c_2 = full - surrounding1, full - surrounding2
+    c = c_1.intersect(c_2)
+    c_a, c_b = c_1 - c, c_2 - c
+    if target <= support:
+        support -= target
+    before = get_split_count(irregular1 + c_a) + get_split_count(irregular2 + c_b) + get_split_count(support + c)
+    after = (get_split_count(irregular1 - target + c_a) + get_split_count(irregular2 - target + c_b) +
+             get_split_count(support + target + c))
+    return before, after
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class BatchScoresTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(42)
+        self.tree, self.genomes = get_random_tree(self.random, 7)
+        self.encoder = scaffolding_utils.MulticolorEncoder(self.tree)
+        self.target = self.random.choice(self.tree.consistent_multicolors)
+        self.points = []
+        for _ in range(100):
+            irregular1, irregular2, support = [get_random_multicolor(self.random, self.genomes) for _ in range(3)]
+            surrounding1 = Multicolor(*(irregular1 + support + get_random_multicolor(self.random, self.genomes)).colors)
+            surrounding2 = Multicolor(*(irregular2 + support + get_random_multicolor(self.random, self.genomes)).colors)
+            self.points.append((surrounding1, surrounding2, irregular1, irregular2, support))
+
+    def get_batch_scores(self, encoder):
+        columns = [[encoder.encode(multicolor) for multicolor in column] for column in zip(*self.points)]
+        return scaffolding_utils.get_batch_scores(encoder, encoder.encode(self.target), *columns)
+
+    def get_expected_scores(self):
+        return [get_multicolor_scores(self.tree, self.target, *point) for point in self.points]
+
+    def test_batch_scores(self):
+        self.assertListEqual(self.get_batch_scores(self.encoder), self.get_expected_scores())
+
+    def test_batch_scores_one_by_one(self):
+        self.encoder.is_vectorizable = lambda: False
+        self.assertListEqual(self.get_batch_scores(self.encoder), self.get_expected_scores())
+
+    def test_small_tree_batch_scores(self):
+        encoder = scaffolding_utils.MulticolorEncoder(get_small_tree("abc", "a", "bc", "b", "c"))
+        a, b, c = [encoder.encode(Multicolor(BGGenome(name))) for name in "abc"]
+        # {a} irregular edges and {b, c} support edge (1 + 1 + 1) are replaced with a single {a, b, c} edge (1),
+        #   and then {a} irregular edges with {c} and {b} colors, that are missing around vertices, (2 + 2 + 0)
+        #   are replaced with {c} and {b} edges and {a} support edge (1 + 1 + 1)
+        self.assertListEqual(scaffolding_utils.get_batch_scores(encoder, a, [a | b | c, a | b], [a | b | c, a | c], [a, a], [a, a],
+                                                                [b | c, 0]), [(3, 1), (4, 3)])
+
+    def test_empty_batch(self):
+        self.assertListEqual(scaffolding_utils.get_batch_scores(self.encoder, self.encoder.full_mask, [], [], [], [], []), [])
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class TracerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.names = ["{}{}".format(gene, extremity) for gene in range(1000) for extremity in "th"]
+
+    def test_sample_rate(self):
+        self.assertTrue(all(scaffolding_utils.Tracer(io.StringIO(), sample_rate=1).is_sampled(name) for name in self.names))
+        self.assertFalse(any(scaffolding_utils.Tracer(io.StringIO(), sample_rate=0).is_sampled(name) for name in self.names))
+        sampled = [name for name in self.names if scaffolding_utils.Tracer(io.StringIO(), sample_rate=0.1).is_sampled(name)]
+        self.assertTrue(0.05 * len(self.names) < len(sampled) < 0.15 * len(self.names))
+
+    def test_sampling_is_stable(self):
+        tracer1 = scaffolding_utils.Tracer(io.StringIO(), sample_rate=0.1)
+        tracer2 = scaffolding_utils.Tracer(io.StringIO(), sample_rate=0.1)
+        self.assertListEqual([tracer1.is_sampled(name) for name in self.names], [tracer2.is_sampled(name) for name in self.names])
+        # a bigger sample contains a smaller one
+        tracer3 = scaffolding_utils.Tracer(io.StringIO(), sample_rate=0.5)
+        self.assertTrue(all(tracer3.is_sampled(name) for name in self.names if tracer1.is_sampled(name)))
+
+    def test_listed_vertices_are_sampled(self):
+        tracer = scaffolding_utils.Tracer(io.StringIO(), sample_rate=0, vertices=["1t", "2h"])
+        self.assertListEqual([name for name in self.names if tracer.is_sampled(name)], ["1t", "2h"])
+
+    def test_write(self):
+        destination = io.StringIO()
+        tracer = scaffolding_utils.Tracer(destination)
+        tracer.write("assembly_point", vertex2="2h", vertex1="1t", score=1.5, genomes=["a", "b"])
+        tracer.write("target", colors=BGGenome("a"))
+        lines = destination.getvalue().splitlines()
+        self.assertEqual(lines[0], '{"event":"assembly_point","genomes":["a","b"],"score":1.5,"vertex1":"1t","vertex2":"2h"}')
+        self.assertEqual(json.loads(lines[1])["event"], "target")
+
+
+@unittest.skipIf(scaffolding_utils is None, "scaffolding scripts require bg and networkx")
+class AssemblyPointsWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.dir_path = os.path.join(self.tmp_dir.name, "assembly_points")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def read_lines(self, file_name):
+        with open(os.path.join(self.dir_path, file_name), "rt") as source:
+            return source.read().splitlines()
+
+    def write_points(self, points, **kwargs):
+        with scaffolding_utils.AssemblyPointsWriter(self.dir_path, "points.txt", **kwargs) as writer:
+            for point in points:
+                writer.write(*point)
+        return writer
+
+    def test_genome_specific_files(self):
+        points = [(genome, genome, index, "{}t".format(index), "{}h".format(index))
+                  for index, genome in enumerate(["a", "b", "a", "c", "b", "a"])]
+        writer = self.write_points(points, genome_specific_file_name_pattern="points_{genome_name}.txt",
+                                   buffer_size=2, max_open_files=2)
+        self.assertEqual(writer.count, len(points))
+        self.assertListEqual(self.read_lines("points.txt"), [" ".join(str(field) for field in point[1:]) for point in points])
+        for genome in "abc":
+            self.assertListEqual(self.read_lines("points_{}.txt".format(genome)),
+                                 [" ".join(str(field) for field in point[1:]) for point in points if point[0] == genome])
+        self.assertEqual(len(writer.handles), 0)
+
+    def test_overall_file_only(self):
+        self.write_points([("a", "a", 1), ("b", "b", 2)], genome_specific=False)
+        self.assertListEqual(os.listdir(self.dir_path), ["points.txt"])
+        self.assertListEqual(self.read_lines("points.txt"), ["a 1", "b 2"])
+
+    def test_open_files_are_bounded(self):
+        with scaffolding_utils.AssemblyPointsWriter(self.dir_path, "points.txt", buffer_size=1, max_open_files=3) as writer:
+            for index in range(20):
+                writer.write("genome{}".format(index % 7), index)
+                self.assertLessEqual(len(writer.handles), 3)
+        for genome_index in range(7):
+            file_name = Configuration.DEFAULT_OUTPUT_AP_GSFNP.format(genome_name="genome{}".format(genome_index))
+            self.assertListEqual(self.read_lines(file_name), [str(index) for index in range(20) if index % 7 == genome_index])
+
+    def test_files_are_truncated_per_run(self):
+        self.write_points([("a", 1), ("a", 2)], buffer_size=1, max_open_files=1)
+        self.write_points([("a", 3)])
+        self.assertListEqual(self.read_lines("points.txt"), ["3"])
+
+    def test_flush(self):
+        writer = scaffolding_utils.AssemblyPointsWriter(self.dir_path, "points.txt", genome_specific=False)
+        writer.write("a", 1)
+        writer.flush()
+        self.assertListEqual(self.read_lines("points.txt"), ["1"])
+        writer.close()
+
+    def test_empty_overall_file(self):
+        self.write_points([])
+        self.assertListEqual(os.listdir(self.dir_path), ["points.txt"])
+        self.assertListEqual(self.read_lines("points.txt"), [])
+
+    def test_from_configuration(self):
+        configuration = Configuration()
+        configuration[Configuration.OUTPUT][Configuration.DIR] = self.tmp_dir.name
+        configuration[Configuration.OUTPUT][Configuration.ASSEMBLY_POINTS] = {
+            Configuration.FILE: "points.txt",
+            Configuration.GENOME_SPECIFIC: False,
+        }
+        writer = scaffolding_utils.AssemblyPointsWriter.from_configuration(configuration, buffer_size=5)
+        self.assertEqual(writer.path, os.path.join(self.dir_path, "points.txt"))
+        self.assertFalse(writer.genome_specific)
+        self.assertEqual(writer.genome_specific_file_name_pattern, Configuration.DEFAULT_OUTPUT_AP_GSFNP)
+        self.assertEqual(writer.buffer_size, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,7 @@ else:
     from backports import tempfile
     TemporaryDirectory = tempfile.TemporaryDirectory
 from gos.exceptions import GOSTaskException, GOSIOException
-from gos.tasks import BaseTask, TaskLoader
+from gos.tasks import BaseTask, TaskLoader, TaskContext, run_task_in_context
 
 
 def invalidate_caches():
@@ -44,6 +44,27 @@ class BaseTaskTestCase(unittest.TestCase):
         self.assertTrue(hasattr(task, "run"))
         self.assertTrue(callable(getattr(task, "run")))
 
+    def test_remote_property(self):
+        self.assertFalse(self.task_class().remote)
+
+
+class TaskContextTestCase(unittest.TestCase):
+    def test_run_task_in_context(self):
+        class MyTask(BaseTask):
+            name = "my_task"
+            outputs = ["result"]
+            self_loop = True
+
+            def run(self, manager):
+                manager.data["result"] = manager.data["value"] * 2
+                manager.data["tmp"] = 0
+                self.do_self_loop = True
+
+        context = TaskContext(configuration={}, data={"value": 2})
+        outputs, do_self_loop = run_task_in_context(MyTask(), context)
+        self.assertDictEqual(outputs, {"result": 4})
+        self.assertTrue(do_self_loop)
+
 
 class TaskLoaderTestCase(unittest.TestCase):
     def test_load_from_file_file_does_not_exists(self):
@@ -322,5 +343,62 @@ class TaskLoaderTestCase(unittest.TestCase):
         tmp_dir.cleanup()
 
 
+class TaskLoaderDiscoveryIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.index_file = os.path.join(self.tmp_dir.name, "index.json")
+        self.tasks_dir = os.path.join(self.tmp_dir.name, "tasks")
+        os.mkdir(self.tasks_dir)
+        self.tasks_strings = TaskLoaderTestCase.get_custom_task_files_values(None)[:2]
+        self.tasks_files = []
+        for task_string in self.tasks_strings:
+            tmp_file = NamedTemporaryFile(mode="wt", suffix=".py", dir=self.tasks_dir, delete=False)
+            tmp_file.write(TaskLoaderTestCase.get_base_task_import_code_string(None))
+            tmp_file.write(task_string)
+            tmp_file.close()
+            self.tasks_files.append(tmp_file.name)
+        invalidate_caches()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_index_is_persisted(self):
+        TaskLoader(index_file=self.index_file).load_tasks(paths=[self.tasks_dir])
+        self.assertTrue(os.path.isfile(self.index_file))
+        loader = TaskLoader(index_file=self.index_file)
+        self.assertSetEqual(loader.get_indexed_task_names(self.tasks_files[0]), {"my_task_one"})
+        self.assertSetEqual(loader.get_indexed_task_names(self.tasks_files[1]), {"my_task_two"})
+
+    def test_no_index_file(self):
+        loader = TaskLoader()
+        result = loader.load_tasks(paths=[self.tasks_dir], names=["my_task_one"])
+        self.assertSetEqual(set(result) - {BaseTask.name}, {"my_task_one", "my_task_two"})
+        self.assertDictEqual(loader.index, {})
+
+    def test_unreferenced_indexed_modules_are_not_imported(self):
+        TaskLoader(index_file=self.index_file).load_tasks(paths=[self.tasks_dir])
+        result = TaskLoader(index_file=self.index_file).load_tasks(paths=[self.tasks_dir], names=["my_task_one"])
+        self.assertSetEqual(set(result) - {BaseTask.name}, {"my_task_one"})
+        result = TaskLoader(index_file=self.index_file).load_tasks(paths=self.tasks_files, names=["my_task_two"])
+        self.assertSetEqual(set(result) - {BaseTask.name}, {"my_task_two"})
+
+    def test_changed_modules_are_rescanned(self):
+        TaskLoader(index_file=self.index_file).load_tasks(paths=[self.tasks_dir])
+        with open(self.tasks_files[1], "at") as destination:
+            destination.write("\n")
+        invalidate_caches()
+        loader = TaskLoader(index_file=self.index_file)
+        self.assertIsNone(loader.get_indexed_task_names(self.tasks_files[1]))
+        result = loader.load_tasks(paths=[self.tasks_dir], names=["my_task_one"])
+        self.assertSetEqual(set(result) - {BaseTask.name}, {"my_task_one", "my_task_two"})
+        self.assertSetEqual(TaskLoader(index_file=self.index_file).get_indexed_task_names(self.tasks_files[1]), {"my_task_two"})
+
+    def test_corrupted_index_file(self):
+        with open(self.index_file, "wt") as destination:
+            destination.write("not a json")
+        result = TaskLoader(index_file=self.index_file).load_tasks(paths=[self.tasks_dir], names=["my_task_one"])
+        self.assertSetEqual(set(result) - {BaseTask.name}, {"my_task_one", "my_task_two"})
+
+
 if __name__ == '__main__':
     unittest.main()